@@ -0,0 +1,185 @@
+"""
+Splits large source files into chunks at function/class boundaries.
+
+Python files are split with `ast`; other languages use a brace-depth
+heuristic (or indentation for Ruby). Chunks keep their 1-based line range
+so explanations can quote line numbers from the original file.
+"""
+import ast
+import os
+import re
+from typing import Dict, List, Tuple
+
+
+CHUNK_MAX_LINES = int(os.getenv("CHUNK_MAX_LINES", "400"))
+
+# Languages whose blocks are delimited by indentation/`end` instead of braces
+INDENT_LANGUAGES = {"python", "ruby"}
+
+_CLOSING_LINE = re.compile(r"^\s*(\}|\)|end\b)")
+_COMMENT_LINE = re.compile(r"^\s*(//|/\*|\*|#)")
+# Strings and comment openers, matched left to right so `"//"` or `'/*'` inside a string is ignored
+_CODE_TOKENS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//|/\*')
+
+
+def _code_only(line: str, in_comment: bool) -> Tuple[str, bool]:
+    """
+    The parts of `line` outside strings and // and /* */ comments, and
+    whether a block comment is still open at the end of the line.
+    """
+    code = []
+    position = 0
+    while True:
+        if in_comment:
+            close = line.find("*/", position)
+            if close < 0:
+                return "".join(code), True
+            position = close + 2
+            in_comment = False
+        match = _CODE_TOKENS.search(line, position)
+        if not match:
+            code.append(line[position:])
+            return "".join(code), False
+        code.append(line[position:match.start()])
+        if match.group() == "//":
+            return "".join(code), False
+        if match.group() == "/*":
+            in_comment = True
+        position = match.end()
+
+
+def _make_chunk(lines: List[str], start: int, end: int, name: str) -> Dict:
+    return {
+        "name": name,
+        "start": start,
+        "end": end,
+        "content": "\n".join(lines[start - 1:end]),
+    }
+
+
+def _label(names: List[str]) -> str:
+    unique = list(dict.fromkeys(name for name in names if name)) or ["module code"]
+    label = ", ".join(unique[:4])
+    return label + (f" (+{len(unique) - 4} more)" if len(unique) > 4 else "")
+
+
+def _pack(lines: List[str], spans: List[Tuple[int, int, str]], max_lines: int) -> List[Dict]:
+    """
+    Greedily merge consecutive (start, end, name) spans into chunks of at most
+    `max_lines`. A single span longer than that is cut into fixed windows.
+    """
+    chunks = []
+    group: List[Tuple[int, int, str]] = []
+
+    def flush():
+        if group:
+            chunks.append(_make_chunk(lines, group[0][0], group[-1][1], _label([name for _, _, name in group])))
+            group.clear()
+
+    for start, end, name in spans:
+        if end - start + 1 > max_lines:
+            flush()
+            for window_start in range(start, end + 1, max_lines):
+                window_end = min(window_start + max_lines - 1, end)
+                chunks.append(_make_chunk(lines, window_start, window_end, f"{name} (lines {window_start}-{window_end})"))
+            continue
+        if group and end - group[0][0] + 1 > max_lines:
+            flush()
+        group.append((start, end, name))
+    flush()
+    return chunks
+
+
+def _node_name(node: ast.AST) -> str:
+    if isinstance(node, ast.ClassDef):
+        return f"class {node.name}"
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return f"def {node.name}"
+    return ""  # Imports, assignments etc. are named after the defs they are packed with
+
+
+def _python_spans(body: List[ast.stmt], first_line: int, last_line: int, max_lines: int,
+                  prefix: str = "") -> List[Tuple[int, int, str]]:
+    """
+    One span per statement, starting at its first decorator and running up to
+    the next statement. Classes too large for one chunk are split into their methods.
+    """
+    starts = [min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) for node in body]
+    starts[0] = first_line
+    spans = []
+    for index, node in enumerate(body):
+        start = starts[index]
+        end = starts[index + 1] - 1 if index + 1 < len(body) else last_line
+        name = prefix + _node_name(node) if _node_name(node) else ""
+        if isinstance(node, ast.ClassDef) and end - start + 1 > max_lines and node.body:
+            header_end = node.body[0].lineno - 1
+            spans.append((start, header_end, name))
+            spans.extend(_python_spans(node.body, header_end + 1, end, max_lines, prefix=f"{node.name}."))
+        else:
+            spans.append((start, end, name))
+    return spans
+
+
+def chunk_python(content: str, max_lines: int = CHUNK_MAX_LINES) -> List[Dict]:
+    lines = content.split("\n")
+    tree = ast.parse(content)
+    if not tree.body:
+        return [_make_chunk(lines, 1, len(lines), "module")]
+    return _pack(lines, _python_spans(tree.body, 1, len(lines), max_lines), max_lines)
+
+
+def chunk_by_blocks(content: str, language: str, max_lines: int = CHUNK_MAX_LINES) -> List[Dict]:
+    """
+    Heuristic splitter: a new top-level block starts on a line after a blank
+    line, at brace depth 0 (or zero indentation for indent-based languages),
+    that does not close a previous block. Braces in strings and comments
+    are not counted.
+    """
+    lines = content.split("\n")
+    starts = []
+    depth = 0
+    in_comment = False
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if language.lower() in INDENT_LANGUAGES:
+            top_level = stripped and not line[0].isspace() and not _CLOSING_LINE.match(line)
+        else:
+            top_level = stripped and depth <= 0 and not in_comment and not _CLOSING_LINE.match(line)
+            code, in_comment = _code_only(line, in_comment)
+            depth += code.count("{") - code.count("}")
+        # Only blank-line-separated starts, so comments/annotations stay with their block
+        if top_level and (number == 1 or not lines[number - 2].strip()):
+            starts.append(number)
+    if not starts or starts[0] != 1:
+        starts.insert(0, 1)
+
+    spans = []
+    for index, start in enumerate(starts):
+        end = starts[index + 1] - 1 if index + 1 < len(starts) else len(lines)
+        signature = next((line.strip() for line in lines[start - 1:end]
+                          if line.strip() and not _COMMENT_LINE.match(line)), "block")
+        spans.append((start, end, signature[:60]))
+    return _pack(lines, spans, max_lines)
+
+
+def chunk_code(content: str, language: str, max_lines: int = CHUNK_MAX_LINES) -> List[Dict]:
+    """
+    Split `content` into chunks of at most `max_lines` lines, cutting at
+    function/class boundaries where possible. Files that already fit are
+    returned as a single chunk.
+    """
+    lines = content.split("\n")
+    if len(lines) <= max_lines:
+        return [_make_chunk(lines, 1, len(lines), "whole file")]
+    if language.lower() == "python":
+        try:
+            return chunk_python(content, max_lines)
+        except SyntaxError:
+            pass  # Fall back to the indentation heuristic
+    return chunk_by_blocks(content, language, max_lines)
+
+
+def numbered(chunk: Dict) -> str:
+    """Chunk content with original line numbers in the margin"""
+    return "\n".join(f"{number:>5}  {line}" for number, line
+                     in enumerate(chunk["content"].split("\n"), chunk["start"]))
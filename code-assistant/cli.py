@@ -0,0 +1,150 @@
+"""
+Headless batch CLI - generate learning docs without starting the Gradio UI.
+
+Takes files as arguments, one per line on stdin, or from
+`git diff --name-only`, runs the concurrent batch path and prints the
+per-file results as JSON on stdout (progress goes to stderr). Paths on
+stdin that don't exist from the current directory are also tried from the
+repository root, which is what `git diff --name-only` prints. Skipped
+paths are listed on stderr and under "skipped". Only `.env` in the current
+directory is read, and the agent modules are imported after the file list
+is known, so an empty change set exits immediately.
+
+    python cli.py src/app.py src/db.py
+    git diff --name-only main | python cli.py -
+    python cli.py --git-diff HEAD --task "Added retry logic"
+
+Exit status is 1 if any file failed or a file named as an argument does
+not exist.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def changed_files(ref: str) -> list:
+    """Files changed relative to `ref` (working tree included), as paths from the current directory"""
+    result = subprocess.run(["git", "diff", "--name-only", "--relative", ref], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"git diff failed: {result.stderr.strip()}")
+    return result.stdout.split("\n")
+
+
+def git_toplevel() -> str:
+    """Root of the repository containing the current directory ("" outside a repo)"""
+    result = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def resolve_paths(named: list, piped: list):
+    """
+    (files, skipped) for the argument paths and the stdin/git paths; piped
+    paths not found from the current directory are retried from the
+    repository root. skipped entries are {"file", "reason", "named"}.
+    """
+    files, skipped = [], []
+    toplevel = None
+    for path, is_named in [(path, True) for path in named] + [(path, False) for path in piped]:
+        path = path.strip()
+        if not path:
+            continue
+        if not os.path.isfile(path) and not is_named and not os.path.isabs(path):
+            if toplevel is None:
+                toplevel = git_toplevel()
+            from_root = os.path.join(toplevel, path) if toplevel else ""
+            if from_root and os.path.isfile(from_root):
+                path = os.path.relpath(from_root)
+        if os.path.isfile(path):
+            # Duplicates in combined inputs
+            if path not in files:
+                files.append(path)
+        else:
+            # Deleted files show up in diffs too
+            skipped.append({"file": path, "reason": "not found", "named": is_named})
+    return files, skipped
+
+
+def load_env():
+    """Read ./.env only (no walk up the tree) and disable tracing like the UI does"""
+    if os.path.exists(".env"):
+        from dotenv import load_dotenv
+        load_dotenv(".env")
+    os.environ['LANGCHAIN_TRACING_V2'] = "false"
+    os.environ['LANGSMITH_TRACING'] = "false"
+    os.environ['OPENAI_AGENTS_DISABLE_TRACING'] = "1"
+
+
+async def run_batch(files: list, args) -> list:
+    """analyze_multiple_files with progress on stderr; returns the per-file results"""
+    from learning_manager import LearningManager
+
+    manager = LearningManager(output_dir=args.output_dir)
+    async for event in manager.analyze_multiple_files(
+        files,
+        project_description=args.task,
+        max_concurrency=args.max_concurrency,
+        mode=args.mode,
+        use_cache=not args.no_cache,
+        skip_unchanged=not args.all
+    ):
+        if not args.quiet:
+            print(event, file=sys.stderr, flush=True)
+    return manager.batch_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="files to document ('-' reads paths from stdin)")
+    parser.add_argument("--git-diff", metavar="REF", help="document the files `git diff --name-only REF` lists")
+    parser.add_argument("--task", default="", help="task context passed to the specialists")
+    parser.add_argument("--mode", choices=["pipeline", "update", "orchestrator"], default="pipeline")
+    parser.add_argument("--max-concurrency", type=int, help="files at a time (default BATCH_MAX_CONCURRENCY or 4)")
+    parser.add_argument("--output-dir", help="where docs are saved (default learning_docs/)")
+    parser.add_argument("--all", action="store_true", help="also re-document files whose docs are up to date")
+    parser.add_argument("--no-cache", action="store_true", help="re-run every specialist instead of using the cache")
+    parser.add_argument("--policy", choices=["size", "fixed"], help="model routing policy (default MODEL_POLICY or size)")
+    parser.add_argument("--depth", choices=["quick", "standard", "deep"], help="documentation depth (default DOC_DEPTH)")
+    parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+
+    named = [path for path in args.files if path != "-"]
+    piped = []
+    if "-" in args.files or (not args.files and not args.git_diff and not sys.stdin.isatty()):
+        piped += sys.stdin.read().split("\n")
+    if args.git_diff:
+        piped += changed_files(args.git_diff)
+    files, skipped = resolve_paths(named, piped)
+
+    results = []
+    if files:
+        load_env()
+        if args.policy:
+            os.environ["MODEL_POLICY"] = args.policy
+        if args.depth:
+            os.environ["DOC_DEPTH"] = args.depth
+        from tools import detect_language
+        skipped += [{"file": path, "reason": "unsupported language", "named": path in named}
+                    for path in files if detect_language(path) == "Unknown"]
+        files = [path for path in files if detect_language(path) != "Unknown"]
+        if files:
+            results = asyncio.run(run_batch(files, args))
+
+    for entry in skipped:
+        print(f"⚠️  Skipped {entry['file']}: {entry['reason']}", file=sys.stderr)
+    print(json.dumps({
+        "files": sorted(results, key=lambda r: r["file"]),
+        "skipped": [{"file": entry["file"], "reason": entry["reason"]} for entry in skipped],
+        "failed": sum(r["status"] == "failed" for r in results),
+        "seconds": round(time.perf_counter() - started, 2),
+    }, indent=2))
+    missing = any(entry["named"] and entry["reason"] == "not found" for entry in skipped)
+    return 1 if missing or any(r["status"] == "failed" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
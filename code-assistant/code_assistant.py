@@ -47,6 +47,7 @@ if base_url != 'https://api.openai.com/v1':
 
 # Suppress tracing error messages
 import sys
+import asyncio
 import warnings
 warnings.filterwarnings("ignore", message=".*Tracing client error.*")
 
@@ -61,89 +62,121 @@ class SuppressTracingErrors:
 
 sys.stderr = SuppressTracingErrors(sys.stderr)
 
+import re
+import time
+from datetime import datetime
+
 import gradio as gr
 from learning_manager import LearningManager
+from repo_index import get_repo_index
+from tools import get_doc_store
+
+
+# Analyses running at once (further requests wait in the queue) and queue capacity
+GRADIO_CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "4"))
+GRADIO_MAX_QUEUE = int(os.getenv("GRADIO_MAX_QUEUE", "64"))
+
+
+def session_manager(request: gr.Request = None) -> LearningManager:
+    """
+    A LearningManager saving to learning_docs/<session id>, so concurrent
+    users never share files; every session uses the one shared RepoIndex.
+    """
+    session = re.sub(r"[^\w-]", "", getattr(request, "session_hash", None) or "")
+    return LearningManager(output_dir=os.path.join("learning_docs", session) if session else None)
+
+
+def _download_path(doc: dict):
+    doc_path = doc.get("doc_path")
+    return os.path.abspath(doc_path) if doc_path and os.path.exists(doc_path) else None
+
+
+def render_doc(doc: dict, note: str = "") -> str:
+    """Success banner + the stored markdown of a doc"""
+    created = datetime.fromtimestamp(doc["created_at"]).strftime("%Y-%m-%d %H:%M")
+    success_message = f'''
+> ✅ **Document Saved Successfully!**
+> 
+> 🆔 **Doc ID:** `{doc['id']}` · 📁 **Saved to:** `{doc['doc_path']}` · 🕒 {created}
+> 
+> 💾 **Use the download button below to save a copy**
+'''
+    # Show the actual markdown content ON SCREEN + provide download
+    return f"**✅ Analysis Complete!**\n\n{success_message}\n\n{note}---\n\n{doc['content']}"
+
+
+def search_docs(query: str):
+    """Full-text search over saved learning docs"""
+    if not query or not query.strip():
+        return "⚠️ Enter a search query"
+    started = time.perf_counter()
+    results = get_doc_store().search(query)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not results:
+        return f"No docs match `{query}` ({elapsed_ms:.1f} ms)"
+    lines = [f"**{len(results)} docs** ({elapsed_ms:.1f} ms)", ""]
+    for result in results:
+        created = datetime.fromtimestamp(result["created_at"]).strftime("%Y-%m-%d %H:%M")
+        snippet = " ".join(result["snippet"].split())
+        lines.append(f"- **#{result['doc_id']}** `{result['file_name']}` · {created}  \n  {snippet}")
+    return "\n".join(lines)
 
 
-async def analyze_code(file_path: str, task_description: str, include_git_diff: bool, include_commit_history: bool):
+def open_doc(doc_id):
+    """Show a saved doc by its ID"""
+    doc = get_doc_store().get(int(doc_id)) if doc_id else None
+    if not doc:
+        return f"⚠️ No doc with ID {doc_id}", None
+    return render_doc(doc).replace("**✅ Analysis Complete!**\n\n", "", 1), _download_path(doc)
+
+
+async def analyze_code(file_path: str, task_description: str, include_git_diff: bool, include_commit_history: bool, fast_pipeline: bool = True, use_cache: bool = True, update_existing: bool = False, request: gr.Request = None):
     """Analyze code and generate learning documentation"""
     if not file_path:
         yield "⚠️ Please provide a file path", "", "", None
         return
     
-    manager = LearningManager()
+    manager = session_manager(request)
     status_message = ""
-    saved_file_path = None
+    doc_id = None
+    cache_note = ""
+    partial_doc = "*Generating documentation...*"
     
     try:
         async for chunk in manager.analyze_code(
             file_path=file_path,
             task_description=task_description,
             include_git_diff=include_git_diff,
-            include_commit_history=include_commit_history
+            include_commit_history=include_commit_history,
+            mode="update" if update_existing else "pipeline" if fast_pipeline else "orchestrator",
+            use_cache=use_cache,
+            stream=True
         ):
+            # Streaming update: the document so far and the specialists still writing
+            if isinstance(chunk, dict):
+                # The saved doc is identified by its doc-store ID, not by scanning learning_docs/
+                if "saved" in chunk:
+                    doc_id = chunk["saved"]["doc_id"]
+                    continue
+                partial_doc = chunk.get("document") or partial_doc
+                active = f"✍️ **Active:** {', '.join(chunk['active'])}\n" if chunk["active"] else ""
+                yield status_message + active, partial_doc, "", None
+                continue
             # Check if this is a status update or final result
             if chunk and not chunk.startswith("#") and len(chunk) < 500:
                 status_message += f"✓ {chunk}\n\n"
+                if chunk.startswith("♻️"):
+                    cache_note = f"> {chunk} (unchanged file - no model calls for these sections)\n\n"
                 # Yield status, empty output, empty link, no file
-                yield status_message, "*Generating documentation...*", "", None
+                yield status_message, partial_doc, "", None
             else:
                 # This is the final documentation
-                # Try to extract the saved file path from the documentation
-                import re
-                # Look for file path in various formats
-                patterns = [
-                    r'learning_docs/[^\s\)"\'\]]+\.md',
-                    r'saved_to["\']?:\s*["\']?([^"\'\s\)]+\.md)',
-                    r'Documentation saved to:?\s*([^\s\)]+\.md)'
-                ]
-                
-                for pattern in patterns:
-                    match = re.search(pattern, chunk, re.IGNORECASE)
-                    if match:
-                        if match.groups():
-                            saved_file_path = match.group(1)
-                        else:
-                            saved_file_path = match.group(0)
-                        break
-                
-                # Also check for files created in the learning_docs directory recently
-                if not saved_file_path:
-                    import glob
-                    from datetime import datetime, timedelta
-                    recent_files = glob.glob("learning_docs/*.md")
-                    if recent_files:
-                        # Get the most recent file
-                        recent_files.sort(key=os.path.getmtime, reverse=True)
-                        saved_file_path = recent_files[0]
-                
-                # Provide download file and ALWAYS show content on screen
-                if saved_file_path and os.path.exists(saved_file_path):
-                    abs_path = os.path.abspath(saved_file_path)
-                    
-                    # Read the saved file to display it
-                    try:
-                        with open(saved_file_path, 'r', encoding='utf-8') as f:
-                            file_content = f.read()
-                    except:
-                        file_content = chunk  # Fallback to original chunk
-                    
-                    # Create clean markdown success message
-                    success_message = f'''
-> ✅ **Document Saved Successfully!**
-> 
-> 📁 **Saved to:** `{saved_file_path}`
-> 
-> 💾 **Use the download button below to save a copy**
-'''
-                    
-                    # Show the actual markdown content ON SCREEN + provide download
-                    display_output = f"**✅ Analysis Complete!**\n\n{success_message}\n\n---\n\n{file_content}"
-                    
-                    yield status_message + "✓ Documentation complete!\n", display_output, "", abs_path
+                doc = get_doc_store().get(doc_id) if doc_id else None
+                if doc:
+                    yield status_message + "✓ Documentation complete!\n", render_doc(doc, cache_note), "", _download_path(doc)
                 else:
-                    # No file found but still display the content on screen
-                    display_output = f"**✅ Analysis Complete!**\n\n---\n\n{chunk}"
+                    # Not saved (e.g. the orchestrator skipped saving) - still display the content on screen
+                    display_output = f"**✅ Analysis Complete!**\n\n{cache_note}---\n\n{chunk}"
                     yield status_message + "✓ Documentation complete!\n", display_output, "", None
                     
     except Exception as e:
@@ -155,6 +188,77 @@ async def analyze_code(file_path: str, task_description: str, include_git_diff:
         yield status_message + "❌ Analysis failed\n", error_msg, "", None
 
 
+def scan_repository(root: str):
+    """Index a directory and list the files whose docs are missing or out of date"""
+    root = root or "."
+    if not os.path.isdir(root):
+        return f"⚠️ Not a directory: `{root}`"
+    index = get_repo_index()
+    stats = index.scan(root)
+    pending = index.needs_docs(root=root)
+    lines = [
+        f"**Indexed {stats['files']} files in {stats['seconds']}s** "
+        f"({stats['added']} new, {stats['updated']} changed, {stats['removed']} removed)",
+        "",
+        f"**{len(pending)} need documentation:**" if pending else "✅ All docs are up to date",
+    ]
+    for row in pending[:50]:
+        lines.append(f"- `{os.path.relpath(row['path'], root)}` - {row['language']}, {row['lines']} lines")
+    if len(pending) > 50:
+        lines.append(f"- ... and {len(pending) - 50} more")
+    return "\n".join(lines)
+
+
+async def document_changed_files(root: str, task_description: str, fast_pipeline: bool = True, use_cache: bool = True,
+                                 request: gr.Request = None):
+    """Run the batch path on every file under `root` that changed since its last doc"""
+    root = root or "."
+    manager = session_manager(request)
+    await asyncio.to_thread(manager.index.scan, root)
+    targets = [row["path"] for row in manager.index.needs_docs(root=root)]
+    if not targets:
+        yield "✓ All docs are up to date - nothing to do\n", "", "", None
+        return
+
+    status_message = ""
+    async for event in manager.analyze_multiple_files(
+        targets,
+        project_description=task_description,
+        mode="pipeline" if fast_pipeline else "orchestrator",
+        use_cache=use_cache
+    ):
+        status_message += f"✓ {event}\n\n"
+        yield status_message, "*Documenting changed files...*", "", None
+
+    rows = [f"| `{os.path.relpath(r['file'], root)}` | {r['status']} | {r['seconds']}s | {r['saved_to'] or r['error'] or ''} |"
+            for r in manager.batch_results]
+    table = "| File | Status | Time | Doc |\n|---|---|---|---|\n" + "\n".join(rows)
+    yield status_message, f"**✅ Batch Complete!**\n\n{table}", "", None
+
+
+async def document_repository(root: str, task_description: str, use_cache: bool = True, request: gr.Request = None):
+    """Document a whole repository in dependency order"""
+    root = root or "."
+    if not os.path.isdir(root):
+        yield f"⚠️ Not a directory: `{root}`", "", "", None
+        return
+    manager = session_manager(request)
+    status_message = ""
+    overview_path = None
+    async for event in manager.analyze_repository(root, project_description=task_description, use_cache=use_cache):
+        status_message += f"✓ {event}\n\n"
+        if " - overview saved to " in event:
+            overview_path = event.split(" - overview saved to ")[-1]
+        yield status_message, "*Documenting repository in dependency order...*", "", None
+
+    if overview_path and os.path.exists(overview_path):
+        with open(overview_path, 'r', encoding='utf-8') as f:
+            overview = f.read()
+        yield status_message, f"**✅ Repository Documented!**\n\n---\n\n{overview}", "", os.path.abspath(overview_path)
+    else:
+        yield status_message, "**❌ Repository documentation failed**", "", None
+
+
 # Build the Gradio interface with professional styling
 custom_theme = gr.themes.Soft(
     primary_hue="indigo",
@@ -253,6 +357,21 @@ with gr.Blocks(theme=custom_theme, css="""
                     value=False,
                     info="Show file evolution"
                 )
+                fast_pipeline = gr.Checkbox(
+                    label="⚡ Fast Pipeline",
+                    value=True,
+                    info="Run specialists in parallel"
+                )
+                use_cache = gr.Checkbox(
+                    label="♻️ Use Cache",
+                    value=True,
+                    info="Reuse results for unchanged files"
+                )
+                update_existing = gr.Checkbox(
+                    label="🔁 Update Existing Doc",
+                    value=False,
+                    info="Patch the last doc for changed lines"
+                )
             
             with gr.Row():
                 run_button = gr.Button("🚀 Analyze Code", variant="primary", size="lg")
@@ -278,6 +397,33 @@ with gr.Blocks(theme=custom_theme, css="""
                     ```
                     """
                 )
+            
+            with gr.Accordion("🗂️ Repository", open=False):
+                repo_root = gr.Textbox(
+                    label="Repository Directory",
+                    placeholder="/path/to/your/repo",
+                    lines=1,
+                    info="Indexed incrementally - rescans only re-read changed files"
+                )
+                with gr.Row():
+                    scan_button = gr.Button("🔎 Scan", size="sm")
+                    document_changed_button = gr.Button("📚 Document Changed Files", size="sm")
+                    document_repo_button = gr.Button("🏗️ Document Repository", size="sm")
+                scan_result = gr.Markdown(value="")
+            
+            with gr.Accordion("🔍 Saved Docs", open=False):
+                with gr.Row():
+                    search_query = gr.Textbox(
+                        label="Search",
+                        placeholder="semaphore retry backoff",
+                        lines=1,
+                        scale=3
+                    )
+                    search_button = gr.Button("🔍 Search", size="sm", scale=1)
+                with gr.Row():
+                    doc_id_input = gr.Number(label="Doc ID", precision=0, scale=3)
+                    open_doc_button = gr.Button("📄 Open", size="sm", scale=1)
+                search_results = gr.Markdown(value="")
         
         with gr.Column(scale=2):
             gr.Markdown("### 🔄 Status")
@@ -331,13 +477,54 @@ with gr.Blocks(theme=custom_theme, css="""
     # Event handlers
     run_button.click(
         fn=analyze_code,
-        inputs=[file_path_input, task_description, include_git_diff, include_commit_history],
-        outputs=[status_box, output_markdown, download_info, download_file]
+        inputs=[file_path_input, task_description, include_git_diff, include_commit_history, fast_pipeline, use_cache, update_existing],
+        outputs=[status_box, output_markdown, download_info, download_file],
+        api_name="analyze"
     )
     
     file_path_input.submit(
         fn=analyze_code,
-        inputs=[file_path_input, task_description, include_git_diff, include_commit_history],
+        inputs=[file_path_input, task_description, include_git_diff, include_commit_history, fast_pipeline, use_cache, update_existing],
+        outputs=[status_box, output_markdown, download_info, download_file],
+        api_name=False
+    )
+    
+    search_button.click(
+        fn=search_docs,
+        inputs=[search_query],
+        outputs=[search_results],
+        concurrency_limit=None
+    )
+    
+    search_query.submit(
+        fn=search_docs,
+        inputs=[search_query],
+        outputs=[search_results],
+        concurrency_limit=None
+    )
+    
+    open_doc_button.click(
+        fn=open_doc,
+        inputs=[doc_id_input],
+        outputs=[output_markdown, download_file],
+        concurrency_limit=None
+    )
+    
+    scan_button.click(
+        fn=scan_repository,
+        inputs=[repo_root],
+        outputs=[scan_result]
+    )
+    
+    document_changed_button.click(
+        fn=document_changed_files,
+        inputs=[repo_root, task_description, fast_pipeline, use_cache],
+        outputs=[status_box, output_markdown, download_info, download_file]
+    )
+    
+    document_repo_button.click(
+        fn=document_repository,
+        inputs=[repo_root, task_description, use_cache],
         outputs=[status_box, output_markdown, download_info, download_file]
     )
     
@@ -356,8 +543,13 @@ with gr.Blocks(theme=custom_theme, css="""
     )
 
 
+# Analyses share a queue; at most GRADIO_CONCURRENCY run at once, doc lookups are not limited
+ui.queue(default_concurrency_limit=GRADIO_CONCURRENCY, max_size=GRADIO_MAX_QUEUE)
+
+
 if __name__ == "__main__":
     print("🚀 Starting Code Learning Assistant...")
     print("📍 Access the UI at: http://127.0.0.1:7860")
+    print(f"👥 {GRADIO_CONCURRENCY} concurrent analyses, queue of {GRADIO_MAX_QUEUE}")
     ui.launch(inbrowser=True)
 
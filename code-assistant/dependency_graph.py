@@ -0,0 +1,128 @@
+"""
+Import/dependency graph between a repository's own files.
+
+Only imports that resolve to files in the repository become edges; third
+party and standard library imports are ignored. Python imports are read
+with `ast`; JavaScript/TypeScript relative imports and Ruby
+`require_relative` are matched with regexes. Other languages get no edges
+and are documented independently.
+"""
+import ast
+import os
+import re
+from typing import Dict, List, Set, Tuple
+
+
+_JS_IMPORT = re.compile(r"""(?:from\s+|import\s+|require\(\s*)['"](\.{1,2}/[^'"]+)['"]""")
+_RUBY_REQUIRE = re.compile(r"""require_relative\s*\(?\s*['"]([^'"]+)['"]""")
+_JS_SUFFIXES = ["", ".ts", ".tsx", ".js", ".jsx", "/index.ts", "/index.tsx", "/index.js", "/index.jsx"]
+
+
+def _python_modules(content: str) -> List[Tuple[int, str]]:
+    """(relative level, dotted name) of every import; `from x import y` also yields x.y"""
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        return []
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend((0, alias.name) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            modules.append((node.level, base))
+            modules.extend((node.level, f"{base}.{alias.name}".strip(".")) for alias in node.names)
+    return modules
+
+
+def _python_dependencies(path: str, content: str, root: str, known: Set[str]) -> Set[str]:
+    directory = os.path.dirname(path)
+    # Flat scripts import siblings; package/src layouts import from an ancestor directory
+    bases = []
+    current = directory
+    while True:
+        bases.append(current)
+        if current == root or os.path.dirname(current) == current:
+            break
+        current = os.path.dirname(current)
+
+    found = set()
+    for level, name in _python_modules(content):
+        if not name:
+            continue
+        relative = name.replace(".", os.sep)
+        if level:
+            search = [os.path.normpath(os.path.join(directory, *[".."] * (level - 1)))]
+        else:
+            search = bases
+        for base in search:
+            for candidate in (os.path.join(base, relative + ".py"), os.path.join(base, relative, "__init__.py")):
+                if candidate in known and candidate != path:
+                    found.add(candidate)
+                    break
+    return found
+
+
+def _relative_dependencies(path: str, targets: List[str], suffixes: List[str], known: Set[str]) -> Set[str]:
+    directory = os.path.dirname(path)
+    found = set()
+    for target in targets:
+        base = os.path.normpath(os.path.join(directory, target))
+        for suffix in suffixes:
+            if base + suffix in known and base + suffix != path:
+                found.add(base + suffix)
+                break
+    return found
+
+
+def file_dependencies(path: str, content: str, language: str, root: str, known: Set[str]) -> Set[str]:
+    """Paths in `known` (absolute) that the file at `path` imports"""
+    language = language.lower()
+    if language == "python":
+        return _python_dependencies(path, content, root, known)
+    if language.startswith(("javascript", "typescript")):
+        return _relative_dependencies(path, _JS_IMPORT.findall(content), _JS_SUFFIXES, known)
+    if language == "ruby":
+        return _relative_dependencies(path, _RUBY_REQUIRE.findall(content), ["", ".rb"], known)
+    return set()
+
+
+def build_dependency_graph(files: Dict[str, str], root: str) -> Dict[str, Set[str]]:
+    """
+    `files` maps absolute path -> language (e.g. from RepoIndex.files); returns
+    path -> set of repository files it imports.
+    """
+    root = os.path.abspath(root)
+    known = set(files)
+    graph = {}
+    for path, language in files.items():
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+        except OSError:
+            content = ""
+        graph[path] = file_dependencies(path, content, language, root, known)
+    return graph
+
+
+def topological_order(graph: Dict[str, Set[str]]) -> Tuple[List[str], Dict[str, Set[str]]]:
+    """
+    Dependencies-first order of the graph's files. Import cycles are broken by
+    releasing the file with the fewest unresolved imports first; the returned
+    graph has those edges removed, so it is acyclic and consistent with the order.
+    """
+    remaining = {path: set(deps) & set(graph) for path, deps in graph.items()}
+    acyclic = {path: set(deps) for path, deps in remaining.items()}
+    order = []
+    while remaining:
+        ready = sorted(path for path, deps in remaining.items() if not deps)
+        if not ready:
+            path = min(remaining, key=lambda p: (len(remaining[p]), p))
+            acyclic[path] -= remaining[path]
+            ready = [path]
+        for path in ready:
+            order.append(path)
+            del remaining[path]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order, acyclic
@@ -0,0 +1,107 @@
+"""
+SQLite store of generated learning docs with full-text search.
+
+Every saved doc gets an integer ID and a row with the source file path,
+content hash, timestamp and sections; the markdown is also indexed in an
+FTS5 table (falling back to LIKE queries where SQLite lacks FTS5). The
+markdown file in learning_docs/ is still written for downloads.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT NOT NULL,
+    file_path TEXT,
+    doc_path TEXT,
+    content_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    sections TEXT,
+    content TEXT NOT NULL
+)
+"""
+
+
+class DocStore:
+    """Indexed learning docs in `db_path` (DOC_STORE_PATH, default .learning_docs.sqlite)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("DOC_STORE_PATH", ".learning_docs.sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute(SCHEMA)
+            self._db.execute("CREATE INDEX IF NOT EXISTS docs_by_file ON docs (file_path, created_at)")
+            try:
+                self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(file_name, content)")
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False
+
+    def save(self, content: str, file_name: str, file_path: str = "", doc_path: str = "",
+             sections: Optional[List[str]] = None) -> Dict:
+        """Store a doc; returns {"doc_id", "content_hash", "created_at"}"""
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        created_at = time.time()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                """INSERT INTO docs (file_name, file_path, doc_path, content_hash, created_at, sections, content)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (file_name, os.path.abspath(file_path) if file_path else None, doc_path, content_hash,
+                 created_at, json.dumps(sections or []), content),
+            )
+            doc_id = cursor.lastrowid
+            if self.fts:
+                self._db.execute("INSERT INTO docs_fts (rowid, file_name, content) VALUES (?, ?, ?)",
+                                 (doc_id, file_name, content))
+        return {"doc_id": doc_id, "content_hash": content_hash, "created_at": created_at}
+
+    def _row(self, row: sqlite3.Row) -> Dict:
+        doc = dict(row)
+        doc["sections"] = json.loads(doc.get("sections") or "[]")
+        return doc
+
+    def get(self, doc_id: int) -> Optional[Dict]:
+        row = self._db.execute("SELECT * FROM docs WHERE id = ?", (int(doc_id),)).fetchone()
+        return self._row(row) if row else None
+
+    def latest(self, file_path: str = "", file_name: str = "", since: float = 0.0) -> Optional[Dict]:
+        """Most recent doc for a source file (by path, or by name), created after `since`"""
+        if file_path:
+            where, value = "file_path = ?", os.path.abspath(file_path)
+        else:
+            where, value = "file_name = ?", file_name
+        row = self._db.execute(f"SELECT * FROM docs WHERE {where} AND created_at >= ? ORDER BY id DESC LIMIT 1",
+                               (value, since)).fetchone()
+        return self._row(row) if row else None
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Docs matching `query`, best match first: [{"doc_id", "file_name", "file_path", "created_at", "snippet"}]"""
+        if self.fts:
+            # Quote each term so punctuation in identifiers isn't parsed as FTS syntax
+            terms = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+            if not terms:
+                return []
+            rows = self._db.execute(
+                """SELECT docs.id, docs.file_name, docs.file_path, docs.created_at,
+                          snippet(docs_fts, 1, '**', '**', ' … ', 16) AS snippet
+                   FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid
+                   WHERE docs_fts MATCH ? ORDER BY rank LIMIT ?""",
+                (terms, limit),
+            ).fetchall()
+        else:
+            rows = self._db.execute(
+                """SELECT id, file_name, file_path, created_at, substr(content, 1, 160) AS snippet
+                   FROM docs WHERE content LIKE ? OR file_name LIKE ? ORDER BY id DESC LIMIT ?""",
+                (f"%{query}%", f"%{query}%", limit),
+            ).fetchall()
+        return [{"doc_id": row["id"], "file_name": row["file_name"], "file_path": row["file_path"],
+                 "created_at": row["created_at"], "snippet": row["snippet"]} for row in rows]
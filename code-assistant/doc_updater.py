@@ -0,0 +1,217 @@
+"""
+Incremental regeneration of an existing learning doc.
+
+Finds the hunks changed since the doc was written (a diff against the source
+the repo index stored when the doc was written, or against the commit it
+recorded for older entries), maps them onto function-level chunks of
+the current file and asks each specialist only for edits to its existing
+section. Edits come back as SEARCH/REPLACE blocks applied locally, so an
+unaffected section costs nothing and an affected one costs a few hundred
+output tokens instead of a full rewrite.
+"""
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from chunking import chunk_code, numbered
+from git_backend import GitBackend, paginate_hunks, unified_hunks
+from pipeline import DOCUMENT_SECTIONS, SPECIALISTS, LearningPipeline, build_document
+from tools import load_code_file, write_learning_doc
+
+
+# Lines of context per changed region handed to the specialists
+UPDATE_CONTEXT_LINES = 80
+# Above this share of changed lines a full regeneration is cheaper
+UPDATE_MAX_CHANGED_RATIO = 0.3
+
+SECTION_UPDATE_PROMPT = """The code in {file_name} changed since this documentation section was written.
+
+EXISTING SECTION:
+{section}
+
+DIFF (documented version → current):
+{diff}
+
+CURRENT CODE OF THE CHANGED PARTS (with line numbers):
+```{language}
+{code}
+```
+{task_context}
+If the section is still accurate, reply exactly: NO CHANGES
+
+Otherwise reply ONLY with edit blocks, as many as needed:
+<<<<<<< SEARCH
+text copied exactly from the existing section
+=======
+replacement text
+>>>>>>> REPLACE
+
+Prefer several small blocks over rewriting the section. New content keeps the section's
+style (quoted snippets with line numbers); fix quoted line numbers that moved."""
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@", re.M)
+_EDIT_BLOCK = re.compile(r"<{7} SEARCH\n(.*?)\n={7}\n(.*?)\n?>{7} REPLACE", re.S)
+_COMMENT_OR_BLANK = re.compile(r"^[+-]\s*(#|//|/\*|\*|$)")
+
+
+def split_sections(document: str) -> Dict[str, str]:
+    """Section key -> body of a document built by `build_document`"""
+    headings = {heading: key for key, heading in DOCUMENT_SECTIONS}
+    sections: Dict[str, str] = {}
+    current = None
+    for line in document.split("\n"):
+        if line.startswith("## ") and line[3:].strip() in headings:
+            current = headings[line[3:].strip()]
+            sections[current] = ""
+        elif current:
+            sections[current] += line + "\n"
+    return {key: body.strip() for key, body in sections.items()}
+
+
+def changed_ranges(hunks: List[str]) -> List[Tuple[int, int]]:
+    """(first, last) line ranges of the current file touched by each hunk"""
+    ranges = []
+    for hunk in hunks:
+        for match in _HUNK_HEADER.finditer(hunk):
+            start, count = int(match.group(1)), int(match.group(2) or 1)
+            ranges.append((start, start + max(count, 1) - 1))
+    return ranges
+
+
+def changed_lines(hunks: List[str]) -> List[str]:
+    """The added/removed lines of the hunks (without context or file headers)"""
+    return [line for hunk in hunks for line in hunk.split("\n")
+            if line.startswith(("+", "-")) and not line.startswith(("+++", "---"))]
+
+
+def is_cosmetic(hunks: List[str]) -> bool:
+    """True when every added/removed line is blank or a comment"""
+    return all(_COMMENT_OR_BLANK.match(line) for line in changed_lines(hunks))
+
+
+def apply_edits(section: str, reply: str) -> Optional[str]:
+    """Apply SEARCH/REPLACE blocks; None if the reply has none or a SEARCH text isn't found"""
+    blocks = _EDIT_BLOCK.findall(reply)
+    if not blocks:
+        return None
+    for search, replace in blocks:
+        if search not in section:
+            return None
+        section = section.replace(search, replace, 1)
+    return section
+
+
+class DocUpdater(LearningPipeline):
+    """LearningPipeline that patches the previous doc instead of regenerating it"""
+
+    async def _update_section(self, key: str, section: str, fields: Dict[str, str],
+                              full_fields: Dict[str, str]) -> Tuple[str, str]:
+        """Returns (new section text, "kept" | "updated" | "regenerated")"""
+        agent, _, _ = SPECIALISTS[key]
+        # Edit blocks, not a section - the section quality check doesn't apply
+        reply = await self._timed(key, agent, SECTION_UPDATE_PROMPT.format(section=section, **fields),
+                                  check_quality=False)
+        if reply.strip().upper().startswith("NO CHANGES"):
+            return section, "kept"
+        edited = apply_edits(section, reply)
+        if edited is not None:
+            return edited, "updated"
+        # Edits didn't apply cleanly - fall back to regenerating this section
+        result = (await self.explain(full_fields, keys=[key]))[key]
+        if isinstance(result, Exception):
+            raise result
+        return result, "regenerated"
+
+    async def update(
+        self,
+        file_path: str,
+        previous_doc: str,
+        base_commit: Optional[str],
+        task_description: str = "",
+        include_git_diff: bool = False,
+        include_commit_history: bool = False,
+        base_source: Optional[str] = None
+    ) -> Dict:
+        """
+        Changes are diffed against `base_source` (the documented text) when
+        given, otherwise against `base_commit`:path. Returns the same shape as
+        `run` plus {"changes": key -> kept/updated/regenerated}, or
+        {"status": "full"} when the change is too large (or can't be located)
+        and a full run should be used instead.
+        """
+        started = time.perf_counter()
+        file_info = load_code_file(file_path)
+        if file_info.get("status") == "error":
+            return {"status": "error", "message": file_info["message"]}
+        sections = split_sections(previous_doc)
+        if not all(key in sections for key in SPECIALISTS):
+            return {"status": "full", "message": "The previous doc has missing sections"}
+
+        if base_source is not None:
+            hunks = unified_hunks(file_info["file_name"], base_source, file_info["content"])
+        else:
+            backend = GitBackend.for_path(file_path)
+            if backend is None:
+                return {"status": "full", "message": "No documented source or git repository to diff against"}
+            git_started = time.perf_counter()
+            try:
+                hunks = await asyncio.to_thread(backend.diff_hunks, file_path, base_commit or "HEAD")
+            except ValueError as e:
+                return {"status": "full", "message": str(e)}
+            self.timings["git"] = time.perf_counter() - git_started
+        ranges = changed_ranges(hunks)
+        changed = len(changed_lines(hunks))
+        if changed > UPDATE_MAX_CHANGED_RATIO * file_info["lines"]:
+            return {"status": "full", "message": f"{changed} of {file_info['lines']} lines changed"}
+
+        full_fields = {
+            "content": file_info["content"],
+            "language": file_info["language"].lower(),
+            "file_name": file_info["file_name"],
+            "task_context": f"\nTask context: {task_description}\n" if task_description else "",
+        }
+        self.language = full_fields["language"]
+        changes = {key: "kept" for key in sections}
+        if hunks and not is_cosmetic(hunks):
+            chunks = chunk_code(file_info["content"], file_info["language"], UPDATE_CONTEXT_LINES)
+            affected = [chunk for chunk in chunks
+                        if any(start <= chunk["end"] and end >= chunk["start"] for start, end in ranges)]
+            fields = {
+                **full_fields,
+                "diff": paginate_hunks(hunks)["text"],
+                "code": "\n\n".join(numbered(chunk) for chunk in affected),
+            }
+            keys = list(SPECIALISTS)
+            results = await asyncio.gather(*(self._update_section(key, sections[key], fields, full_fields)
+                                             for key in keys),
+                                           return_exceptions=True)
+            for key, result in zip(keys, results):
+                if isinstance(result, Exception):
+                    changes[key] = f"failed ({result}) - previous text kept"
+                else:
+                    sections[key], changes[key] = result
+
+        if include_git_diff or include_commit_history:
+            sections["history"] = await self._history(file_path, file_info["file_name"], include_commit_history)
+            changes["history"] = "regenerated"
+
+        document = build_document(file_info["file_name"], sections)
+        saved = write_learning_doc(document, file_info["file_name"], file_path, sections=list(sections),
+                                   output_dir=self.output_dir)
+        self.timings["total"] = time.perf_counter() - started
+        return {
+            "status": saved.get("status", "error"),
+            "document": document,
+            "saved_to": saved.get("saved_to"),
+            "doc_id": saved.get("doc_id"),
+            "sections": sections,
+            "cached": list(self.cached),
+            "chunks": {"count": self.chunk_count, "cached": self.cached_chunks},
+            "models": dict(self.models),
+            "escalated": dict(self.escalated),
+            "usage": self.usage,
+            "changes": changes,
+            "changed_lines": changed,
+            "timings": dict(self.timings),
+        }
@@ -0,0 +1,285 @@
+"""
+Long-lived git backend for diffs and commit history.
+
+One `git cat-file --batch` and one `git cat-file --batch-check` process are
+kept per repository and fed object requests over stdin, instead of spawning
+`git log` / `git diff` for every file. Commit objects are immutable, so they
+are parsed once and shared by every file of a batch; history is cached per
+(path, HEAD). Diffs are computed locally with difflib against the base
+blob and split into pages of whole hunks.
+
+Run `python git_backend.py <file>` to compare against subprocess-per-call.
+"""
+import atexit
+import difflib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+
+GIT_DIFF_MAX_LINES = int(os.getenv("GIT_DIFF_MAX_LINES", "400"))
+
+_COMMIT_ID = re.compile(r"^[0-9a-f]{40}(:|$)")
+
+
+class GitBackend:
+    """Object reader for one repository; get instances with `GitBackend.for_path`"""
+
+    _instances: Dict[str, "GitBackend"] = {}
+    _roots: Dict[str, Optional[str]] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._batch: Optional[subprocess.Popen] = None
+        self._check: Optional[subprocess.Popen] = None
+        self._commits: Dict[str, Dict] = {}
+        self._object_ids: Dict[str, Optional[str]] = {}
+        self._history: Dict[Tuple[str, str, int], List[Dict]] = {}
+        self.stats = {"requests": 0, "git_seconds": 0.0, "processes_started": 0,
+                      "history_hits": 0, "history_misses": 0}
+        atexit.register(self.close)
+
+    @classmethod
+    def for_path(cls, path: str) -> Optional["GitBackend"]:
+        """The shared backend of the repository containing `path`, or None outside a repo"""
+        directory = os.path.dirname(os.path.abspath(path)) if not os.path.isdir(path) else os.path.abspath(path)
+        with cls._registry_lock:
+            if directory not in cls._roots:
+                result = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=directory,
+                                        capture_output=True, text=True)
+                cls._roots[directory] = result.stdout.strip() if result.returncode == 0 else None
+            root = cls._roots[directory]
+            if root is None:
+                return None
+            if root not in cls._instances:
+                cls._instances[root] = cls(root)
+            return cls._instances[root]
+
+    def _process(self, mode: str) -> subprocess.Popen:
+        attr = "_batch" if mode == "--batch" else "_check"
+        process = getattr(self, attr)
+        if process is None or process.poll() is not None:
+            process = subprocess.Popen(["git", "cat-file", mode], cwd=self.root, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            setattr(self, attr, process)
+            self.stats["processes_started"] += 1
+        return process
+
+    def _request(self, mode: str, spec: str) -> Tuple[List[str], Optional[bytes]]:
+        """Send one object spec; returns the header fields and (for --batch) the object body"""
+        with self._lock:
+            started = time.perf_counter()
+            process = self._process(mode)
+            process.stdin.write(spec.encode("utf-8") + b"\n")
+            process.stdin.flush()
+            line = process.stdout.readline().decode("utf-8").rstrip("\n")
+            # "<spec> missing" / "<spec> ambiguous" - the spec itself may contain spaces
+            if line.endswith((" missing", " ambiguous")):
+                header = []
+            else:
+                header = line.rsplit(" ", 2)
+            body = None
+            if mode == "--batch" and len(header) == 3:
+                body = process.stdout.read(int(header[2]))
+                process.stdout.read(1)  # Trailing newline
+            self.stats["requests"] += 1
+            self.stats["git_seconds"] += time.perf_counter() - started
+            return header, body
+
+    def object_id(self, spec: str) -> Optional[str]:
+        """Resolve a revision/path spec (e.g. "HEAD~1:src/app.py") to an object id, or None if missing"""
+        if spec in self._object_ids:
+            return self._object_ids[spec]
+        header, _ = self._request("--batch-check", spec)
+        object_id = header[0] if len(header) == 3 else None
+        # Specs anchored to a full commit id are immutable; HEAD/branch-relative ones are not
+        if _COMMIT_ID.match(spec):
+            self._object_ids[spec] = object_id
+        return object_id
+
+    def blob(self, spec: str) -> Optional[str]:
+        header, body = self._request("--batch", spec)
+        if body is None or header[1] != "blob":
+            return None
+        return body.decode("utf-8", errors="replace")
+
+    def commit(self, sha: str) -> Dict:
+        if sha not in self._commits:
+            _, body = self._request("--batch", sha)
+            headers, _, message = (body or b"").decode("utf-8", errors="replace").partition("\n\n")
+            parents, author, timestamp = [], "", 0
+            for line in headers.split("\n"):
+                if line.startswith("parent "):
+                    parents.append(line[7:])
+                elif line.startswith("author "):
+                    name_email, _, when = line[7:].rpartition(">")
+                    author = name_email.split("<")[0].strip()
+                    timestamp = int(when.split()[0]) if when.split() else 0
+            self._commits[sha] = {
+                "hash": sha[:8],
+                "author": author,
+                "date": datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d"),
+                "message": message.strip().split("\n")[0],
+                "parents": parents,
+            }
+        return self._commits[sha]
+
+    def relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+
+    def history(self, path: str, limit: int = 10, max_walk: int = 1000) -> List[Dict]:
+        """
+        Up to `limit` commits that changed `path`, newest first, following first
+        parents from HEAD (at most `max_walk` commits). Renames are not followed.
+        """
+        rel = self.relative(path)
+        head = self.object_id("HEAD")
+        if head is None:
+            return []
+        key = (rel, head, limit)
+        if key in self._history:
+            self.stats["history_hits"] += 1
+            return self._history[key]
+        self.stats["history_misses"] += 1
+
+        commits = []
+        sha, blob = head, self.object_id(f"{head}:{rel}")
+        for _ in range(max_walk):
+            if blob is None or len(commits) >= limit:
+                break
+            commit = self.commit(sha)
+            parent = commit["parents"][0] if commit["parents"] else None
+            parent_blob = self.object_id(f"{parent}:{rel}") if parent else None
+            if blob != parent_blob:
+                commits.append(commit)
+            sha, blob = parent, parent_blob
+        self._history[key] = commits
+        return commits
+
+    def diff_hunks(self, path: str, base: str = "HEAD~1") -> List[str]:
+        """
+        Unified-diff hunks of the working-tree file against `base`:path (empty
+        if identical). Raises ValueError if `base` is not a commit, like `git
+        diff` does; a path missing from an existing base is an added file.
+        """
+        rel = self.relative(path)
+        commit = self.object_id(f"{base}^{{commit}}")
+        if commit is None:
+            raise ValueError(f"unknown revision '{base}'")
+        old = self.blob(f"{commit}:{rel}") or ""
+        try:
+            with open(os.path.join(self.root, rel), "r", encoding="utf-8", errors="replace") as f:
+                new = f.read()
+        except FileNotFoundError:
+            new = ""
+        return unified_hunks(rel, old, new)
+
+    def close(self):
+        for process in (self._batch, self._check):
+            if process is not None and process.poll() is None:
+                process.stdin.close()
+                process.wait(timeout=5)
+        self._batch = self._check = None
+
+
+def unified_hunks(rel: str, old: str, new: str) -> List[str]:
+    """Unified-diff hunks from `old` to `new` text, the first with a git-style file header"""
+    lines = list(difflib.unified_diff(old.splitlines(keepends=True), new.splitlines(keepends=True),
+                                      fromfile=f"a/{rel}", tofile=f"b/{rel}"))
+    hunks: List[str] = []
+    for line in lines[2:]:
+        if line.startswith("@@"):
+            hunks.append("")
+        if hunks:
+            hunks[-1] += line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+    return [f"diff --git a/{rel} b/{rel}\n--- a/{rel}\n+++ b/{rel}\n" + hunks[0]] + hunks[1:] if hunks else []
+
+
+def split_hunks(diff_text: str) -> List[str]:
+    """Split `git diff` output into hunks; each file's header stays attached to its first hunk"""
+    hunks: List[str] = []
+    header = ""
+    for line in diff_text.splitlines(keepends=True):
+        if line.startswith("diff --git"):
+            if header:
+                hunks.append(header)  # Previous file had no hunks (binary, mode change)
+            header = line
+        elif header and not line.startswith("@@"):
+            header += line
+        elif line.startswith("@@"):
+            hunks.append(header + line)
+            header = ""
+        elif hunks:
+            hunks[-1] += line
+        else:
+            hunks.append(line)
+    if header:
+        hunks.append(header)
+    return hunks
+
+
+def paginate_hunks(hunks: List[str], page: int = 1, max_lines: int = GIT_DIFF_MAX_LINES) -> Dict:
+    """
+    Group whole hunks into pages of about `max_lines` lines and return page
+    `page` (1-based): {"text", "page", "pages", "hunks", "truncated"}. A hunk
+    longer than a page is cut to `max_lines` lines.
+    """
+    pages: List[List[str]] = [[]]
+    size = 0
+    truncated = False
+    for hunk in hunks:
+        lines = hunk.splitlines(keepends=True)
+        if len(lines) > max_lines:
+            hunk = "".join(lines[:max_lines]) + f"... ({len(lines) - max_lines} more lines in this hunk)\n"
+            lines = lines[:max_lines + 1]
+            truncated = True
+        if pages[-1] and size + len(lines) > max_lines:
+            pages.append([])
+            size = 0
+        pages[-1].append(hunk)
+        size += len(lines)
+
+    page = min(max(page, 1), len(pages))
+    text = "".join(pages[page - 1])
+    if len(pages) > 1:
+        first = sum(len(p) for p in pages[:page - 1]) + 1
+        text += (f"\n=== Page {page}/{len(pages)} (hunks {first}-{first + len(pages[page - 1]) - 1} "
+                 f"of {len(hunks)}) - request page={page + 1 if page < len(pages) else 1} for more ===\n")
+    return {"text": text, "page": page, "pages": len(pages), "hunks": len(hunks), "truncated": truncated}
+
+
+def benchmark(file_path: str, runs: int = 5) -> Dict[str, float]:
+    """Average seconds per history+diff lookup: subprocess-per-call vs the persistent backend"""
+    started = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run(["git", "log", "-10", "--pretty=format:%H|%an|%ae|%ad|%s", "--date=short", "--follow",
+                        "--", file_path], capture_output=True, text=True)
+        subprocess.run(["git", "diff", "HEAD~1", file_path], capture_output=True, text=True)
+    subprocess_seconds = (time.perf_counter() - started) / runs
+
+    backend = GitBackend.for_path(file_path)
+    started = time.perf_counter()
+    backend.history(file_path)
+    backend.diff_hunks(file_path)
+    cold_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(runs):
+        backend.history(file_path)
+        backend.diff_hunks(file_path)
+    warm_seconds = (time.perf_counter() - started) / runs
+    return {"subprocess": subprocess_seconds, "backend_cold": cold_seconds, "backend_warm": warm_seconds,
+            **{f"backend_{key}": value for key, value in backend.stats.items()}}
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or [__file__]:
+        print(f"📊 {path}")
+        for name, value in benchmark(path).items():
+            print(f"   {name}: {value:.4f}" if isinstance(value, float) else f"   {name}: {value}")
@@ -1,38 +1,80 @@
 
 from agents import Agent, Runner, function_tool
-from tools import read_code_file, save_learning_doc, get_git_diff
+from tools import (
+    current_output_dir,
+    current_source_file,
+    get_doc_store,
+    get_git_diff,
+    read_code_file,
+    resolve_handle,
+    save_learning_doc,
+    search_learning_docs,
+    write_learning_doc,
+)
+from pipeline import DOCUMENT_SECTIONS, SPECIALISTS, LearningPipeline, build_document
+from doc_updater import DocUpdater
+from specialist_cache import SpecialistCache
+from model_router import MODEL_LARGE
+from repo_index import RepoIndex, get_repo_index
+from dependency_graph import build_dependency_graph, topological_order
 import specialist_agents
-from typing import Optional
+from typing import Dict, List, Optional
 import asyncio
+import os
+import time
+
+
+# Errors a retry can't fix - the file is missing or unreadable
+NON_RETRYABLE_ERRORS = (FileNotFoundError, IsADirectoryError, PermissionError, UnicodeDecodeError)
         
 
-# Convert specialist agents to tools
+# Convert specialist agents to tools. They take a handle from read_code_file /
+# get_git_diff and load the content server-side, so the orchestrator never
+# re-generates the file as tool-call arguments.
+async def _run_specialist(key: str, handle: str, focus: str) -> str:
+    entry = resolve_handle(handle)
+    if entry is None:
+        return f"Unknown handle '{handle}'. Call read_code_file first and pass the handle it returns."
+    fields = {
+        "content": entry["content"],
+        "language": entry.get("language", "").lower(),
+        "file_name": entry.get("file_name", ""),
+        "task_context": f"\nTask context: {focus}\n" if focus else "",
+    }
+    # Shares the pipeline's prompts, and its chunking for files too large to send whole
+    pipeline = LearningPipeline(cache=SpecialistCache.from_env())
+    result = (await pipeline.explain(fields, keys=[key]))[key]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
 @function_tool
-async def language_teacher_tool(input: str) -> str:
-    """Explain programming language concepts used in the code"""
-    result = await Runner.run(specialist_agents.language_teacher, input)
-    return str(result.final_output)
+async def language_teacher_tool(handle: str, focus: str = "") -> str:
+    """Explain programming language concepts used in the code. Pass the handle from read_code_file and optional task context as focus."""
+    return await _run_specialist("language", handle, focus)
 
 
 @function_tool
-async def code_explainer_tool(input: str) -> str:
-    """Explain what the code does and how it works"""
-    result = await Runner.run(specialist_agents.code_explainer, input)
-    return str(result.final_output)
+async def code_explainer_tool(handle: str, focus: str = "") -> str:
+    """Explain what the code does and how it works. Pass the handle from read_code_file and optional task context as focus."""
+    return await _run_specialist("explanation", handle, focus)
 
 
 @function_tool
-async def change_documenter_tool(input: str) -> str:
-    """Document the changes and implementation approach"""
-    result = await Runner.run(specialist_agents.change_documenter, input)
-    return str(result.final_output)
+async def change_documenter_tool(handle: str, focus: str = "") -> str:
+    """Document the changes and implementation approach. Pass the handle from read_code_file and optional task context as focus."""
+    return await _run_specialist("documentation", handle, focus)
 
 
 @function_tool
-async def git_diff_analyzer_tool(input: str) -> str:
-    """Analyze git diff output to explain what specifically changed"""
-    result = await Runner.run(specialist_agents.git_diff_analyzer, input)
-    return str(result.final_output)
+async def git_diff_analyzer_tool(handle: str) -> str:
+    """Analyze git diff output to explain what specifically changed. Pass the handle from get_git_diff."""
+    entry = resolve_handle(handle)
+    if entry is None:
+        return f"Unknown handle '{handle}'. Call get_git_diff first and pass the handle it returns."
+    pipeline = LearningPipeline(cache=SpecialistCache.from_env())
+    return await pipeline.analyze_diff(entry.get("file_name", ""), entry["content"])
 
 
 # Documentation Manager - Main orchestrator
@@ -40,49 +82,22 @@ documentation_manager_instructions = """You help developers learn and document t
 
 When given a file to analyze:
 
-1. **Read the code**: Use read_code_file to get the actual file content
+1. **Read the code**: Use read_code_file. It returns a short `handle` (e.g. "file:1a2b3c4d5e")
+   plus the language, file name and line count - not the code itself.
 
-2. **Call Language Teacher**: 
-   CRITICAL: Pass the COMPLETE file content in this format:
-   
-   "Teach me about the programming language concepts in this code. Here's the full code:
-   
-   ```[language]
-   [PASTE THE ENTIRE CODE FILE HERE - ALL LINES]
-   ```
-   
-   REQUIREMENTS:
-   - Quote actual code snippets from above with line numbers
-   - Use analogies (e.g., 'think of this like...')
-   - Compare to Python/JavaScript syntax
-   - Explain WHY these features exist
-   - Share common mistakes beginners make
-   - Give practical pro tips
-   
-   Be SPECIFIC to THIS code, not generic!"
+2. **Call Language Teacher**: language_teacher_tool(handle=<handle>, focus=<task context>)
 
-3. **Call Code Explainer**: 
-   Pass the COMPLETE file content:
-   
-   "Explain how this code works step-by-step. Here's the full code:
-   
-   ```[language]
-   [PASTE THE ENTIRE CODE FILE HERE - ALL LINES]
-   ```
-   
-   REQUIREMENTS:
-   - Start with big picture (what does this code do?)
-   - Walk through each major function/method
-   - Show data flow with arrows (input → process → output)
-   - Quote actual code snippets
-   - Explain the 'why' behind design choices"
+3. **Call Code Explainer**: code_explainer_tool(handle=<handle>, focus=<task context>)
+
+4. **Call Change Documenter**: change_documenter_tool(handle=<handle>, focus=<task context>)
+   asking for PR-ready documentation
 
-4. **Call Change Documenter**: 
-   Pass the COMPLETE file content with task context asking for PR-ready documentation
+   The specialists load the COMPLETE file from the handle themselves and already know
+   their quality requirements - never paste code into these calls.
 
 5. **Optionally analyze git history** (if requested):
-   - Use get_git_diff with include_commit_history=True to get both diff and commit history
-   - Pass the combined output to git_diff_analyzer_tool for comprehensive analysis of:
+   - Use get_git_diff with include_commit_history=True; it returns a diff `handle`
+   - Pass that handle to git_diff_analyzer_tool for comprehensive analysis of:
      * How the file evolved over time (from commit history)
      * What specific changes were made (from diff)
      * Why changes were made (inferred from commit messages)
@@ -107,12 +122,12 @@ When given a file to analyze:
 
 7. **Use save_learning_doc** to save the final document
 
+Use search_learning_docs if earlier docs on related files would help (e.g. a module this file uses).
+
 CRITICAL RULES:
-- ALWAYS pass the FULL code file content to each specialist agent
-- NEVER summarize or truncate the code  
-- Each agent needs the COMPLETE code to analyze properly
-- The specialist outputs should be DETAILED (multiple paragraphs per concept)
-- If outputs seem generic or short, the agents didn't get the full code!"""
+- ALWAYS pass the handle - the specialists read the full file from it
+- NEVER paste, summarize or truncate the code yourself
+- The specialist outputs should be DETAILED (multiple paragraphs per concept)"""
 
 # Gather all tools
 tools = [
@@ -122,26 +137,35 @@ tools = [
     code_explainer_tool,
     change_documenter_tool,
     git_diff_analyzer_tool,
-    save_learning_doc
+    save_learning_doc,
+    search_learning_docs
 ]
 
 documentation_manager = Agent(
     name="Documentation Manager",
     instructions=documentation_manager_instructions,
     tools=tools,
-    model="gpt-4o"  # Using powerful model to ensure it follows complex instructions
+    model=MODEL_LARGE  # Using powerful model to ensure it follows complex instructions
 )
 
 
 class LearningManager:
     """Main manager for code learning and documentation"""
+
+    def __init__(self, index: Optional[RepoIndex] = None, output_dir: Optional[str] = None):
+        self.index = index or get_repo_index()
+        # Where docs are saved (None: learning_docs/); the UI gives each session its own
+        self.output_dir = output_dir
     
     async def analyze_code(
         self, 
         file_path: str, 
         task_description: str = "",
         include_git_diff: bool = False,
-        include_commit_history: bool = False
+        include_commit_history: bool = False,
+        mode: str = "pipeline",
+        use_cache: bool = True,
+        stream: bool = False
     ):
         """
         Analyze and document a code file for learning and PR documentation
@@ -151,10 +175,103 @@ class LearningManager:
             task_description: Context about what was done (e.g., "Added ADPP changes")
             include_git_diff: Whether to include git diff analysis
             include_commit_history: Whether to include commit history analysis
+            mode: "pipeline" runs the specialists concurrently and assembles the
+                  document locally; "update" patches the file's latest doc for the
+                  lines changed since it was written (falling back to "pipeline");
+                  "orchestrator" lets the Documentation Manager drive
+            use_cache: Reuse cached specialist outputs (pipeline mode); False
+                       re-runs every specialist and refreshes the cache
+            stream: Also yield {"document": partial markdown, "active": [agent names]}
+                    dicts while the specialists write (pipeline mode),
+                    {"active": [...]} as the orchestrator calls tools, and
+                    {"saved": {"doc_id", "saved_to"}} once the doc is stored
         """
         
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"No such file: {file_path}")
         yield "Starting code analysis..."
         
+        if mode == "update":
+            self.index.refresh([file_path])
+            indexed = self.index.get(file_path)
+            doc_path = indexed and indexed["doc_path"]
+            if not (doc_path and os.path.exists(doc_path)):
+                yield "No previous doc for this file - running full analysis"
+                mode = "pipeline"
+            elif indexed["documented_hash"] == indexed["hash"] and not (include_git_diff or include_commit_history):
+                stored = get_doc_store().latest(file_path=file_path)
+                doc_ref = f"doc #{stored['id']}; " if stored else ""
+                yield f"Saved to {os.path.relpath(doc_path)} ({doc_ref}doc is up to date - no changes)"
+                if stream and stored:
+                    yield {"saved": {"doc_id": stored["id"], "saved_to": stored["doc_path"]}}
+                with open(doc_path, 'r', encoding='utf-8') as f:
+                    yield f.read()
+                return
+            else:
+                yield "Updating the existing doc for the changed lines..."
+                with open(doc_path, 'r', encoding='utf-8') as f:
+                    previous_doc = f.read()
+                updater = DocUpdater(cache=SpecialistCache.from_env(bypass=not use_cache), output_dir=self.output_dir)
+                result = await updater.update(
+                    file_path, previous_doc, indexed["documented_commit"], task_description,
+                    include_git_diff, include_commit_history, base_source=self.index.documented_source(file_path)
+                )
+                if result["status"] == "full":
+                    yield f"Change too large to patch ({result['message']}) - running full analysis"
+                    mode = "pipeline"
+                elif result["status"] != "success":
+                    raise RuntimeError(result.get("message", "Update failed"))
+                else:
+                    self.index.mark_documented(file_path, result["saved_to"], indexed["hash"])
+                    changes = ", ".join(f"{key}: {change}" for key, change in result["changes"].items())
+                    yield f"🔁 {result['changed_lines']} changed lines - {changes}"
+                    timings = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in result["timings"].items())
+                    yield f"Saved to {result['saved_to']} (doc #{result['doc_id']}; {timings})"
+                    if stream:
+                        yield {"saved": {"doc_id": result["doc_id"], "saved_to": result["saved_to"]}}
+                    yield result["document"]
+                    return
+        
+        if mode == "pipeline":
+            yield "Running specialists concurrently..."
+            self.index.refresh([file_path])
+            indexed = self.index.get(file_path)
+            pipeline = LearningPipeline(cache=SpecialistCache.from_env(bypass=not use_cache),
+                                        output_dir=self.output_dir)
+            run = pipeline.run(file_path, task_description, include_git_diff, include_commit_history)
+            if stream:
+                events: asyncio.Queue = asyncio.Queue()
+                pipeline.on_event = lambda key, kind, text: events.put_nowait((key, kind, text))
+                task = asyncio.ensure_future(run)
+                async for update in self._stream_sections(os.path.basename(file_path), task, events):
+                    yield update
+                result = task.result()
+            else:
+                result = await run
+            if result["status"] != "success":
+                raise RuntimeError(result.get("message", "Pipeline failed"))
+            if indexed:
+                # Hash from before the run, so edits made meanwhile still show as undocumented
+                self.index.mark_documented(file_path, result["saved_to"], indexed["hash"])
+            
+            if result["chunks"]["count"] > 1:
+                yield (f"🧩 Large file: explained {result['chunks']['count']} chunks concurrently "
+                       f"({result['chunks']['cached']} from cache), then merged")
+            if result["cached"]:
+                headings = dict(DOCUMENT_SECTIONS)
+                yield "♻️ From cache: " + ", ".join(headings[key] for key in result["cached"])
+            if pipeline.router.policy != "fixed":
+                yield "🧭 Models: " + ", ".join(f"{key} {model}" for key, model in result["models"].items())
+            if result["escalated"]:
+                yield (f"⬆️ Rewritten by {pipeline.router.large}: "
+                       + ", ".join(f"{key} ({problems})" for key, problems in result["escalated"].items()))
+            timings = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in result["timings"].items())
+            yield f"Saved to {result['saved_to']} (doc #{result['doc_id']}; {timings})"
+            if stream:
+                yield {"saved": {"doc_id": result["doc_id"], "saved_to": result["saved_to"]}}
+            yield result["document"]
+            return
+        
         git_context = ""
         if include_git_diff or include_commit_history:
             # Build the git context instruction
@@ -163,16 +280,16 @@ class LearningManager:
             else:
                 git_context = f"\nSTEP 2: Use get_git_diff with file_path='{file_path}' to see what changed"
             
-            git_context += "\nSTEP 3: Pass the full git output to git_diff_analyzer_tool for detailed analysis"
+            git_context += "\nSTEP 3: Pass the diff handle to git_diff_analyzer_tool for detailed analysis"
         
         prompt = f"""Please analyze and document this code file: {file_path}
 
 Task context: {task_description}
 
-STEP 1: Use read_code_file tool to read the actual file content{git_context}
-STEP 3: Use language_teacher_tool to explain the programming concepts
-STEP 4: Use code_explainer_tool to explain what the code actually does
-STEP 5: Use change_documenter_tool to document the specific changes made
+STEP 1: Use read_code_file tool to get a handle for the file content{git_context}
+STEP 3: Use language_teacher_tool with the file handle to explain the programming concepts
+STEP 4: Use code_explainer_tool with the file handle to explain what the code actually does
+STEP 5: Use change_documenter_tool with the file handle to document the specific changes made
 {'STEP 6: Use git_diff_analyzer_tool to analyze the git diff if available' if include_git_diff else ''}
 FINAL STEP: Use save_learning_doc tool to save the documentation
 
@@ -182,29 +299,268 @@ Please create a comprehensive learning document that covers:
 - Changes made and why
 - Technical implementation details
 
+Pass handles to the specialist tools (with the task context as focus) - never the code itself.
 I want you to analyze the ACTUAL code content and changes, not create generic documentation.
 Focus on what was specifically implemented and why these changes were made."""
 
         yield "Analyzing file and generating documentation..."
         
-        result = await Runner.run(documentation_manager, prompt)
+        started = time.time()
+        token = current_source_file.set(file_path)
+        dir_token = current_output_dir.set(self.output_dir or current_output_dir.get())
+        try:
+            if stream:
+                result = Runner.run_streamed(documentation_manager, prompt)
+                async for event in result.stream_events():
+                    # Show which specialist tool the orchestrator is waiting on
+                    if event.type == "run_item_stream_event" and event.name == "tool_called":
+                        yield {"active": [getattr(event.item.raw_item, "name", "tool")]}
+                    elif event.type == "run_item_stream_event" and event.name == "tool_output":
+                        yield {"active": []}
+            else:
+                result = await Runner.run(documentation_manager, prompt)
+        finally:
+            current_source_file.reset(token)
+            current_output_dir.reset(dir_token)
+        saved = get_doc_store().latest(file_path=file_path, since=started)
+        if saved:
+            yield f"Saved to {saved['doc_path']} (doc #{saved['id']})"
+            if stream:
+                yield {"saved": {"doc_id": saved["id"], "saved_to": saved["doc_path"]}}
         
         # Don't yield "Documentation complete!" here - the UI will add it when displaying final result
         yield result.final_output
     
     
     
+    async def _stream_sections(self, file_name: str, task: asyncio.Future, events: asyncio.Queue):
+        """
+        Turn pipeline events into {"document", "active"} updates: the document is
+        re-assembled from the text so far, at most every 0.1s while tokens arrive
+        """
+        agent_names = {key: agent.name for key, (agent, _, _) in SPECIALISTS.items()}
+        agent_names["history"] = specialist_agents.git_diff_analyzer.name
+        sections: Dict[str, str] = {}
+        active: List[str] = []
+        last_update = 0.0
+        async for key, kind, text in self._drain(task, events):
+            if kind == "start":
+                if key == "chunks":
+                    agent_names["chunks"] = f"{specialist_agents.code_explainer.name} ({text} chunks)"
+                active.append(agent_names[key])
+            elif kind == "done":
+                active.remove(agent_names[key])
+            elif kind == "reset":
+                sections[key] = ""
+            else:
+                sections[key] = sections.get(key, "") + text
+                if time.perf_counter() - last_update < 0.1:
+                    continue
+            last_update = time.perf_counter()
+            yield {"document": build_document(file_name, sections), "active": list(active)}
+
+    async def _analyze_one(self, file_path: str, task_description: str, mode: str, use_cache: bool,
+                           progress: asyncio.Queue) -> Dict:
+        """Run analyze_code for one file, forwarding its status updates as tagged progress events"""
+        saved_to = None
+        async for chunk in self.analyze_code(file_path, task_description, mode=mode, use_cache=use_cache):
+            if chunk and not chunk.startswith("#") and len(chunk) < 500:
+                await progress.put(f"[{file_path}] {chunk}")
+                if chunk.startswith("Saved to "):
+                    saved_to = chunk[len("Saved to "):].split(" (")[0]
+        return {"saved_to": saved_to}
+
+    @staticmethod
+    async def _drain(batch: asyncio.Future, progress: asyncio.Queue):
+        """Yield progress events as they arrive until `batch` is done"""
+        while not batch.done() or not progress.empty():
+            getter = asyncio.ensure_future(progress.get())
+            await asyncio.wait({getter, batch}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        await batch
+
     async def analyze_multiple_files(
         self,
         file_paths: list,
-        project_description: str = ""
+        project_description: str = "",
+        max_concurrency: Optional[int] = None,
+        max_retries: int = 2,
+        backoff_seconds: float = 2.0,
+        mode: str = "pipeline",
+        use_cache: bool = True,
+        skip_unchanged: bool = True
     ):
-        """Analyze multiple files in batch"""
-        for i, file_path in enumerate(file_paths, 1):
-            yield f"Processing file {i}/{len(file_paths)}: {file_path}"
-            
-            async for status in self.analyze_code(file_path, project_description):
-                yield status
-        
-        yield f"Completed analysis of {len(file_paths)} files"
+        """
+        Analyze multiple files concurrently, at most `max_concurrency` at a time
+        (BATCH_MAX_CONCURRENCY, default 4). Yields progress events tagged with
+        the file path as they happen, a status line per file and a final summary.
+        A failing file is retried with exponential backoff and never stops the
+        others; per-file results are kept in `self.batch_results`.
+        With `skip_unchanged`, files whose content matches their last saved doc
+        (per the repo index) are skipped.
+        """
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        progress: asyncio.Queue = asyncio.Queue()
+        self.batch_results = []
+        started = time.perf_counter()
+
+        if skip_unchanged:
+            await asyncio.to_thread(self.index.refresh, file_paths)
+            pending = {row["path"] for row in self.index.needs_docs(file_paths)}
+            unchanged = [path for path in file_paths
+                         if os.path.abspath(path) not in pending and self.index.get(path)]
+            for path in unchanged:
+                self.batch_results.append({"file": path, "status": "skipped", "attempts": 0, "seconds": 0.0,
+                                           "saved_to": self.index.get(path)["doc_path"], "error": None})
+            if unchanged:
+                yield f"⏭️ Skipping {len(unchanged)} unchanged files (docs are up to date)"
+            file_paths = [path for path in file_paths if path not in unchanged]
+
+        async def worker(file_path: str) -> Dict:
+            result = {"file": file_path, "status": "failed", "attempts": 0, "saved_to": None, "error": None}
+            file_started = None
+            for attempt in range(1, max_retries + 2):
+                result["attempts"] = attempt
+                # The slot is released during backoff so other files keep going
+                async with semaphore:
+                    file_started = file_started or time.perf_counter()
+                    await progress.put(f"[{file_path}] Started (attempt {attempt})")
+                    try:
+                        outcome = await self._analyze_one(file_path, project_description, mode, use_cache, progress)
+                        result.update(status="success", saved_to=outcome["saved_to"], error=None)
+                        break
+                    except Exception as e:
+                        result["error"] = str(e)
+                        if isinstance(e, NON_RETRYABLE_ERRORS):
+                            break
+                if attempt > max_retries:
+                    break
+                delay = backoff_seconds * 2 ** (attempt - 1)
+                await progress.put(f"[{file_path}] ✗ Attempt {attempt} failed: {result['error']} - retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+
+            result["seconds"] = round(time.perf_counter() - file_started, 1)
+            mark = "✓" if result["status"] == "success" else "✗"
+            await progress.put(f"[{file_path}] {mark} {result['status']} in {result['seconds']}s"
+                               + (f" → {result['saved_to']}" if result["saved_to"] else "")
+                               + (f" ({result['error']})" if result["status"] != "success" else ""))
+            self.batch_results.append(result)
+            return result
+
+        yield f"Processing {len(file_paths)} files, {max_concurrency} at a time"
+        async for event in self._drain(asyncio.gather(*(worker(path) for path in file_paths)), progress):
+            yield event
+
+        failed = [r for r in self.batch_results if r["status"] == "failed"]
+        skipped = len(self.batch_results) - len(file_paths)
+        wall_time = time.perf_counter() - started
+        total_time = sum(r["seconds"] for r in self.batch_results)
+        summary = (f"Completed analysis of {len(file_paths)} files in {wall_time:.1f}s "
+                   f"(sum of per-file time {total_time:.1f}s): "
+                   f"{len(file_paths) - len(failed)} succeeded, {len(failed)} failed"
+                   + (f", {skipped} skipped as unchanged" if skipped else ""))
+        if failed:
+            summary += "\n" + "\n".join(f"  ✗ {r['file']}: {r['error']}" for r in failed)
+        yield summary
+
+    async def analyze_repository(
+        self,
+        root: str = ".",
+        project_description: str = "",
+        max_concurrency: Optional[int] = None,
+        use_cache: bool = True,
+        skip_unchanged: bool = True
+    ):
+        """
+        Document every source file under `root` in dependency order. Each file
+        waits for the project files it imports, and gets their compact summaries
+        instead of their source; files on independent branches of the import
+        graph run concurrently (at most `max_concurrency`). A file is re-documented
+        when it changed or one of its imports was re-documented; otherwise its
+        stored summary is reused. Ends with a repository overview document.
+        """
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        progress: asyncio.Queue = asyncio.Queue()
+        root = os.path.abspath(root)
+        started = time.perf_counter()
+
+        await asyncio.to_thread(self.index.scan, root)
+        rows = {row["path"]: row for row in self.index.files(root)}
+        graph = await asyncio.to_thread(build_dependency_graph, {path: row["language"] for path, row in rows.items()}, root)
+        order, graph = topological_order(graph)
+        outdated = {row["path"] for row in self.index.needs_docs(root=root)} if skip_unchanged else set(rows)
+
+        finished = {path: asyncio.Event() for path in order}
+        summaries: Dict[str, str] = {}
+        changed_summaries = set()
+        self.batch_results = []
+
+        def name(path: str) -> str:
+            return os.path.relpath(path, root)
+
+        async def worker(path: str) -> Dict:
+            result = {"file": path, "status": "skipped", "attempts": 0, "saved_to": rows[path]["doc_path"],
+                      "error": None, "seconds": 0.0}
+            try:
+                await asyncio.gather(*(finished[dep].wait() for dep in graph[path]))
+                if (path not in outdated and rows[path]["summary"]
+                        and not any(dep in changed_summaries for dep in graph[path])):
+                    summaries[path] = rows[path]["summary"]
+                    await progress.put(f"[{name(path)}] ⏭️ Up to date")
+                    return result
+
+                async with semaphore:
+                    file_started = time.perf_counter()
+                    result["attempts"] = 1
+                    await progress.put(f"[{name(path)}] Started ({len(graph[path])} imports summarized)")
+                    pipeline = LearningPipeline(cache=SpecialistCache.from_env(bypass=not use_cache),
+                                                output_dir=self.output_dir)
+                    outcome = await pipeline.run(
+                        path, project_description,
+                        dependency_summaries={name(dep): summaries[dep] for dep in sorted(graph[path]) if dep in summaries}
+                    )
+                    if outcome["status"] != "success":
+                        raise RuntimeError(outcome.get("message", "Pipeline failed"))
+                    summary = await pipeline.summarize(name(path), outcome["sections"].get("explanation", ""))
+                    summaries[path] = summary
+                    if summary != rows[path]["summary"]:
+                        changed_summaries.add(path)
+                    self.index.mark_documented(path, outcome["saved_to"], rows[path]["hash"], summary=summary)
+                    result.update(status="success", saved_to=outcome["saved_to"],
+                                  seconds=round(time.perf_counter() - file_started, 1))
+                    await progress.put(f"[{name(path)}] ✓ success in {result['seconds']}s → {outcome['saved_to']}")
+            except Exception as e:
+                result.update(status="failed", error=str(e))
+                await progress.put(f"[{name(path)}] ✗ failed ({e})")
+            finally:
+                self.batch_results.append(result)
+                finished[path].set()
+            return result
+
+        edges = sum(len(deps) for deps in graph.values())
+        yield (f"Documenting {len(order)} files in dependency order ({edges} imports, "
+               f"{len(order) - len(outdated & set(order))} up to date, {max_concurrency} at a time)")
+        async for event in self._drain(asyncio.gather(*(worker(path) for path in order)), progress):
+            yield event
+
+        overview = [f"# {os.path.basename(root)} - Repository Overview", "",
+                    "Files in dependency order (each file's imports come before it).", ""]
+        for path in order:
+            imports = ", ".join(f"`{name(dep)}`" for dep in sorted(graph[path])) or "none"
+            overview += [f"## {name(path)}", "", f"**Imports:** {imports}", "",
+                         summaries.get(path, "*No summary - documentation failed.*").strip(), ""]
+        saved = write_learning_doc("\n".join(overview), f"{os.path.basename(root)}_overview",
+                                   output_dir=self.output_dir)
 
+        failed = [r for r in self.batch_results if r["status"] == "failed"]
+        done = [r for r in self.batch_results if r["status"] == "success"]
+        yield (f"Completed repository documentation in {time.perf_counter() - started:.1f}s: "
+               f"{len(done)} documented, {len(order) - len(done) - len(failed)} up to date, {len(failed)} failed"
+               + (f" - overview saved to {saved['saved_to']}" if saved.get("saved_to") else ""))
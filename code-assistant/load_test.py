@@ -0,0 +1,122 @@
+"""
+Load test for the Gradio app: N users analyze files at the same time.
+
+Every model call goes to a local LLM stub (a fixed delay, no network) with
+MODEL_POLICY=fixed, so each section is exactly one call; the app is
+launched on a local port with its real queue settings, and each user is a
+separate gradio_client session. Reports each user's queue wait (submit ->
+first status update) and completion time, and checks that every session
+got its own output directory.
+
+    python load_test.py --users 8 --latency 2 --concurrency 4
+"""
+import argparse
+import asyncio
+import glob
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def install_llm_stub(latency: float):
+    """Replace Runner.run / Runner.run_streamed with a local stub that waits `latency` seconds per call"""
+    from agents import Runner
+
+    async def run(agent, prompt, **kwargs):
+        await asyncio.sleep(latency)
+        return SimpleNamespace(final_output=f"*{agent.name} (stub) - {len(prompt)} prompt characters*")
+
+    class StreamedRun:
+        def __init__(self, agent, prompt):
+            self.final_output = f"*{agent.name} (stub) - {len(prompt)} prompt characters*"
+
+        async def stream_events(self):
+            await asyncio.sleep(latency)
+            return
+            yield
+
+    Runner.run = staticmethod(run)
+    Runner.run_streamed = staticmethod(lambda agent, prompt, **kwargs: StreamedRun(agent, prompt))
+
+
+def simulate_user(url: str, file_path: str) -> dict:
+    from gradio_client import Client
+
+    client = Client(url, verbose=False)
+    submitted = time.perf_counter()
+    job = client.submit(file_path, "", False, False, True, False, False, api_name="/analyze")
+    first_update = None
+    for _ in job:
+        if first_update is None:
+            first_update = time.perf_counter()
+    finished = time.perf_counter()
+    status = job.outputs()[-1][0] if job.outputs() else ""
+    return {
+        "file": os.path.basename(file_path),
+        "queue_wait": (first_update or finished) - submitted,
+        "completion": finished - submitted,
+        "ok": "Documentation complete" in status,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=8, help="simultaneous users")
+    parser.add_argument("--latency", type=float, default=2.0, help="seconds per stubbed model call")
+    parser.add_argument("--concurrency", type=int, default=4, help="GRADIO_CONCURRENCY for the app")
+    parser.add_argument("--port", type=int, default=7861)
+    args = parser.parse_args()
+
+    # Isolated working directory, index and doc store - set before the app is imported
+    workdir = tempfile.mkdtemp(prefix="code_assistant_load_")
+    os.environ["GRADIO_CONCURRENCY"] = str(args.concurrency)
+    os.environ["DOC_STORE_PATH"] = os.path.join(workdir, "docs.sqlite")
+    os.environ["REPO_INDEX_PATH"] = os.path.join(workdir, "index.sqlite")
+    # The stub's one-line output would fail the quality check and escalate every section
+    os.environ["MODEL_POLICY"] = "fixed"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    sys.path.insert(0, HERE)
+    os.chdir(workdir)
+
+    install_llm_stub(args.latency)
+    from code_assistant import ui
+    from tools import get_doc_store
+
+    files = sorted(glob.glob(os.path.join(HERE, "*.py")))
+    ui.launch(server_port=args.port, prevent_thread_lock=True, quiet=True)
+    url = f"http://127.0.0.1:{args.port}/"
+    print(f"🧪 {args.users} users, {args.concurrency} concurrent analyses, {args.latency}s per model call")
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            results = list(pool.map(lambda i: simulate_user(url, files[i % len(files)]), range(args.users)))
+    finally:
+        ui.close()
+    wall = time.perf_counter() - started
+
+    print(f"\n{'user':>4}  {'file':<24} {'queue wait':>10} {'completion':>10}  ok")
+    for i, result in enumerate(results, 1):
+        print(f"{i:>4}  {result['file']:<24} {result['queue_wait']:>9.2f}s {result['completion']:>9.2f}s  "
+              f"{'✅' if result['ok'] else '❌'}")
+    waits = [r["queue_wait"] for r in results]
+    completions = [r["completion"] for r in results]
+    print(f"\n📊 queue wait: median {statistics.median(waits):.2f}s, max {max(waits):.2f}s")
+    print(f"📊 completion: median {statistics.median(completions):.2f}s, max {max(completions):.2f}s")
+    print(f"📊 wall time {wall:.2f}s, {len(results) / wall:.2f} analyses/s")
+
+    # Each session saves into its own learning_docs/<session> directory
+    docs = [get_doc_store().get(i) for i in range(1, args.users + 1)]
+    directories = {os.path.dirname(doc["doc_path"]) for doc in docs if doc}
+    print(f"📁 {len(directories)} output directories for {args.users} sessions "
+          f"{'✅' if len(directories) == args.users else '❌'} ({workdir})")
+
+
+if __name__ == "__main__":
+    main()
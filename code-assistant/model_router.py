@@ -0,0 +1,163 @@
+"""
+Per-call model routing for the specialist agents.
+
+With MODEL_POLICY=size (the default) each agent call goes to MODEL_SMALL or
+MODEL_LARGE depending on how many lines its prompt has, the file's language
+and DOC_DEPTH (quick / standard / deep). Chunk notes and module summaries
+always use the small model. When the small model writes a section that fails
+its quality check (too short, or too few quoted snippets), the section is
+written again by the large model. MODEL_POLICY=fixed keeps every agent on its
+own model, which is MODEL_LARGE by default.
+
+Run `python model_router.py <files>` to compare latency and cost per policy.
+"""
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+
+MODEL_LARGE = os.getenv("MODEL_LARGE", "gpt-4o")
+MODEL_SMALL = os.getenv("MODEL_SMALL", "gpt-4o-mini")
+
+# USD per million (input, output) tokens, for the cost report
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+# Calls that condense code rather than teach it
+SMALL_KEYS = ("chunk", "summary")
+
+# Minimum (words, quoted snippets) for a section written by the small model
+QUALITY_MINIMUMS = {
+    "language": (250, 5),
+    "explanation": (250, 4),
+    "documentation": (120, 1),
+    "history": (150, 2),
+}
+
+_CODE_FENCE = re.compile(r"^\s*```", re.M)
+
+
+def quality_problems(key: str, output: str, input_lines: int) -> List[str]:
+    """Why `output` misses the section's minimums (empty if it passes); short inputs need fewer snippets"""
+    if key not in QUALITY_MINIMUMS:
+        return []
+    min_words, min_snippets = QUALITY_MINIMUMS[key]
+    min_snippets = min(min_snippets, max(1, input_lines // 15))
+    problems = []
+    words = len(output.split())
+    if words < min_words:
+        problems.append(f"{words} words")
+    snippets = len(_CODE_FENCE.findall(output)) // 2
+    if snippets < min_snippets:
+        problems.append(f"{snippets}/{min_snippets} quoted snippets")
+    return problems
+
+
+def estimate_cost(usage: Dict[str, Dict[str, int]]) -> Optional[float]:
+    """USD for `usage` (model -> {"input_tokens", "output_tokens"}), None if a model has no price"""
+    total = 0.0
+    for model, counts in usage.items():
+        if model not in MODEL_PRICES:
+            return None
+        input_price, output_price = MODEL_PRICES[model]
+        total += (counts["input_tokens"] * input_price + counts["output_tokens"] * output_price) / 1_000_000
+    return total
+
+
+class ModelRouter:
+    """
+    Picks the model for one agent call. Inputs up to `small_max_lines` lines
+    (doubled for depth "quick") go to `small`; larger inputs, files in
+    `large_languages` and depth "deep" go to `large`.
+    """
+
+    def __init__(self, policy: str = "size", small: str = MODEL_SMALL, large: str = MODEL_LARGE,
+                 small_max_lines: int = 250, depth: str = "standard",
+                 large_languages: Optional[List[str]] = None):
+        self.policy = policy
+        self.small = small
+        self.large = large
+        self.small_max_lines = small_max_lines
+        self.depth = depth
+        self.large_languages = {language.lower() for language in (large_languages or ["C++", "Rust"])}
+
+    @classmethod
+    def from_env(cls, policy: Optional[str] = None) -> "ModelRouter":
+        return cls(
+            policy=policy or os.getenv("MODEL_POLICY", "size"),
+            small=os.getenv("MODEL_SMALL", MODEL_SMALL),
+            large=os.getenv("MODEL_LARGE", MODEL_LARGE),
+            small_max_lines=int(os.getenv("MODEL_SMALL_MAX_LINES", "250")),
+            depth=os.getenv("DOC_DEPTH", "standard"),
+            large_languages=[language.strip() for language in os.getenv("MODEL_LARGE_LANGUAGES", "C++,Rust").split(",")
+                             if language.strip()],
+        )
+
+    def choose(self, key: str, agent_model: str, input_lines: int, language: str = "") -> str:
+        if self.policy == "fixed":
+            return agent_model
+        if self.depth == "deep":
+            return self.large
+        if key.startswith(SMALL_KEYS):
+            return self.small
+        if language.lower() in self.large_languages and self.depth != "quick":
+            return self.large
+        limit = self.small_max_lines * (2 if self.depth == "quick" else 1)
+        return self.small if input_lines <= limit else self.large
+
+    def escalation(self, model: str, key: str, output: str, input_lines: int) -> List[str]:
+        """Quality problems that send a small-model output to the large model (empty: keep it)"""
+        if self.policy == "fixed" or model == self.large:
+            return []
+        return quality_problems(key, output, input_lines)
+
+
+async def compare_policies(file_paths: List[str], policies: List[str]) -> List[Dict]:
+    """Document `file_paths` once per policy (no cache) and measure wall time, tokens and cost"""
+    from pipeline import LearningPipeline
+
+    output_dir = tempfile.mkdtemp(prefix="model_router_")
+    rows = []
+    for policy in policies:
+        router = ModelRouter.from_env(policy=policy)
+        pipelines = [LearningPipeline(output_dir=output_dir, router=router) for _ in file_paths]
+        started = time.perf_counter()
+        results = await asyncio.gather(*(pipeline.run(path) for pipeline, path in zip(pipelines, file_paths)))
+        usage: Dict[str, Dict[str, int]] = {}
+        for pipeline in pipelines:
+            for model, counts in pipeline.usage.items():
+                total = usage.setdefault(model, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+                for name, value in counts.items():
+                    total[name] += value
+        rows.append({
+            "policy": policy,
+            "seconds": time.perf_counter() - started,
+            "usage": usage,
+            "cost": estimate_cost(usage),
+            "escalated": sum(len(result.get("escalated", {})) for result in results),
+            "failed": sum(result["status"] != "success" for result in results),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [__file__]
+    # Keep the comparison runs out of the real doc store
+    os.environ.setdefault("DOC_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="model_router_"), "docs.sqlite"))
+    print(f"📊 {len(paths)} files, policies: fixed, size")
+    for row in asyncio.run(compare_policies(paths, ["fixed", "size"])):
+        cost = f"${row['cost']:.4f}" if row["cost"] is not None else "unknown (model without a price)"
+        print(f"\n🧭 {row['policy']}: {row['seconds']:.1f}s, cost {cost}, "
+              f"{row['escalated']} escalated sections, {row['failed']} failed files")
+        for model, counts in row["usage"].items():
+            print(f"   {model}: {counts['calls']} calls, {counts['input_tokens']} input / "
+                  f"{counts['output_tokens']} output tokens")
@@ -0,0 +1,372 @@
+"""
+Deterministic fan-out pipeline for learning docs.
+
+Reads the file once, runs the specialist agents concurrently and assembles
+the document from a local template - no orchestrator LLM re-generating
+the specialists' output. Files longer than CHUNK_MAX_LINES are split at
+function/class boundaries, each chunk is explained concurrently, and the
+specialists write their sections from the chunk notes (map-reduce).
+"""
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from agents import Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+import specialist_agents
+from chunking import chunk_code, numbered
+from model_router import ModelRouter
+from specialist_cache import SpecialistCache
+from tools import load_code_file, write_learning_doc, collect_git_diff
+
+
+LANGUAGE_TEACHER_PROMPT = """Teach me about the programming language concepts in this code. Here's the full code:
+
+```{language}
+{content}
+```
+{task_context}
+REQUIREMENTS:
+- Quote actual code snippets from above with line numbers
+- Use analogies (e.g., 'think of this like...')
+- Compare to Python/JavaScript syntax
+- Explain WHY these features exist
+- Share common mistakes beginners make
+- Give practical pro tips
+
+Be SPECIFIC to THIS code, not generic!"""
+
+CODE_EXPLAINER_PROMPT = """Explain how this code works step-by-step. Here's the full code:
+
+```{language}
+{content}
+```
+{task_context}
+REQUIREMENTS:
+- Start with big picture (what does this code do?)
+- Walk through each major function/method
+- Show data flow with arrows (input → process → output)
+- Quote actual code snippets
+- Explain the 'why' behind design choices"""
+
+CHANGE_DOCUMENTER_PROMPT = """Write PR-ready documentation for this file ({file_name}). Here's the full code:
+
+```{language}
+{content}
+```
+{task_context}
+Document what was implemented and why, based on the ACTUAL code above."""
+
+CHUNK_PROMPT = """Lines {start}-{end} of {file_name} ({name}), part {index} of {count}:
+
+```{language}
+{numbered}
+```
+{task_context}
+Write compact notes on this part only, for someone who will combine the notes of all parts:
+- What each function/class does, its inputs and outputs, and what it calls
+- 2-4 short quoted snippets with their line numbers
+- Notable {language} language features used here
+Keep it under 300 words."""
+
+# Reduce prompts: the specialists write their section from the chunk notes
+LANGUAGE_TEACHER_REDUCE_PROMPT = """Teach me about the programming language concepts in {file_name}, a {lines}-line {language} file.
+It was too large to send whole, so here are notes on each part, with quoted snippets and line numbers:
+
+{notes}
+{task_context}
+REQUIREMENTS:
+- Quote code snippets from the notes with line numbers
+- Use analogies (e.g., 'think of this like...')
+- Compare to Python/JavaScript syntax
+- Explain WHY these features exist
+- Share common mistakes beginners make
+- Give practical pro tips
+
+Be SPECIFIC to THIS code, not generic!"""
+
+CODE_EXPLAINER_REDUCE_PROMPT = """Explain how {file_name} ({lines} lines of {language}) works step-by-step.
+It was too large to send whole, so here are notes on each part, with quoted snippets and line numbers:
+
+{notes}
+{task_context}
+REQUIREMENTS:
+- Start with big picture (what does this file do as a whole?)
+- Walk through the major functions/classes and how the parts connect
+- Show data flow with arrows (input → process → output)
+- Quote code snippets from the notes
+- Explain the 'why' behind design choices"""
+
+CHANGE_DOCUMENTER_REDUCE_PROMPT = """Write PR-ready documentation for this file ({file_name}, {lines} lines).
+It was too large to send whole, so here are notes on each part, with quoted snippets and line numbers:
+
+{notes}
+{task_context}
+Document what was implemented and why, based on the ACTUAL code described above."""
+
+SUMMARY_PROMPT = """Summarize {file_name} for files that import it. Here is a detailed explanation of it:
+
+{explanation}"""
+
+GIT_DIFF_PROMPT = """Analyze this git output for {file_name} - explain how the file evolved and what specifically changed:
+
+{diff}"""
+
+
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "8"))
+
+# section key -> (specialist, full-source prompt, chunk-notes prompt)
+SPECIALISTS = {
+    "language": (specialist_agents.language_teacher, LANGUAGE_TEACHER_PROMPT, LANGUAGE_TEACHER_REDUCE_PROMPT),
+    "explanation": (specialist_agents.code_explainer, CODE_EXPLAINER_PROMPT, CODE_EXPLAINER_REDUCE_PROMPT),
+    "documentation": (specialist_agents.change_documenter, CHANGE_DOCUMENTER_PROMPT, CHANGE_DOCUMENTER_REDUCE_PROMPT),
+}
+
+# (key, heading) of each document section, in order
+DOCUMENT_SECTIONS = [
+    ("language", "📚 Language Concepts Explained"),
+    ("explanation", "🔍 How The Code Works"),
+    ("documentation", "📝 Implementation Documentation"),
+    ("history", "📜 Code Evolution & History"),
+]
+
+
+# Sections whose text streams to `on_event` as it is generated
+SECTION_KEYS = {key for key, _ in DOCUMENT_SECTIONS}
+
+
+def build_document(file_name: str, sections: Dict[str, str]) -> str:
+    """Assemble the learning doc from the specialist outputs (missing sections are skipped)"""
+    parts = [f"# {file_name} - Learning Documentation"]
+    for key, heading in DOCUMENT_SECTIONS:
+        if sections.get(key):
+            parts.append(f"## {heading}\n\n{sections[key].strip()}")
+    return "\n\n".join(parts) + "\n"
+
+
+class LearningPipeline:
+    """
+    Runs the specialists for one file concurrently and saves the assembled
+    document. Specialist outputs are served from `cache` when the agent,
+    its instructions, model and prompt are unchanged.
+
+    With `on_event(key, kind, text)`, section specialists are streamed:
+    kind is "start", "delta" (text is the new tokens) or "done"; the chunk
+    map step reports as key "chunks", and "reset" means a section is being
+    rewritten by the large model. Docs are saved to `output_dir` (default
+    learning_docs/). `router` picks each call's model (default: from .env).
+    """
+
+    def __init__(self, cache: Optional[SpecialistCache] = None,
+                 on_event: Optional[Callable[[str, str, str], None]] = None,
+                 output_dir: Optional[str] = None, router: Optional[ModelRouter] = None):
+        self.cache = cache
+        self.on_event = on_event
+        self.output_dir = output_dir
+        self.router = router or ModelRouter.from_env()
+        self.language = ""
+        self.timings: Dict[str, float] = {}
+        self.cached: List[str] = []
+        self.chunk_count = 1
+        self.cached_chunks = 0
+        self.models: Dict[str, str] = {}
+        self.escalated: Dict[str, str] = {}
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+    def _emit(self, key: str, kind: str, text: str = ""):
+        if self.on_event and (key in SECTION_KEYS or key == "chunks"):
+            self.on_event(key, kind, text)
+
+    def _record_usage(self, agent, prompt: str, output: str, result):
+        usage = self.usage.setdefault(str(agent.model), {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+        usage["calls"] += 1
+        responses = getattr(result, "raw_responses", None) or []
+        if responses and all(getattr(response, "usage", None) for response in responses):
+            usage["input_tokens"] += sum(response.usage.input_tokens for response in responses)
+            usage["output_tokens"] += sum(response.usage.output_tokens for response in responses)
+        else:
+            # No usage reported - estimate at ~4 characters per token
+            usage["input_tokens"] += (len(agent.instructions or "") + len(prompt)) // 4
+            usage["output_tokens"] += len(output) // 4
+
+    async def _run_agent(self, key: str, agent, prompt: str) -> str:
+        if not (self.on_event and key in SECTION_KEYS):
+            result = await Runner.run(agent, prompt)
+        else:
+            result = Runner.run_streamed(agent, prompt)
+            async for event in result.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    self._emit(key, "delta", event.data.delta)
+        output = str(result.final_output)
+        self._record_usage(agent, prompt, output, result)
+        return output
+
+    async def _call(self, key: str, agent, prompt: str) -> str:
+        """One agent call, served from the cache when possible"""
+        cache_key = SpecialistCache.key(agent, prompt) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if key.startswith("chunk"):
+                    self.cached_chunks += 1
+                else:
+                    self.cached.append(key)
+                self._emit(key, "delta", cached)
+                return cached
+
+        output = await self._run_agent(key, agent, prompt)
+        if cache_key:
+            self.cache.put(cache_key, output, agent.name)
+        return output
+
+    async def _timed(self, key: str, agent, prompt: str, check_quality: bool = True) -> str:
+        """Run `agent` on the model the router picks, escalating sections that fail the quality check"""
+        started = time.perf_counter()
+        lines = prompt.count("\n") + 1
+        model = self.router.choose(key, str(agent.model), lines, self.language)
+        self._emit(key, "start")
+        try:
+            output = await self._call(key, agent if model == agent.model else agent.clone(model=model), prompt)
+            problems = self.router.escalation(model, key, output, lines) if check_quality else []
+            if problems:
+                self.escalated[key] = ", ".join(problems)
+                if key in self.cached:
+                    self.cached.remove(key)
+                self._emit(key, "reset")
+                model = self.router.large
+                output = await self._call(key, agent.clone(model=model), prompt)
+            self.models["chunks" if key.startswith("chunk") else key] = model
+            return output
+        finally:
+            self._emit(key, "done")
+            if not key.startswith("chunk"):
+                self.timings[key] = time.perf_counter() - started
+
+    async def _chunk_notes(self, fields: Dict[str, str], chunks: List[Dict]) -> str:
+        """Map step: explain every chunk concurrently (at most CHUNK_CONCURRENCY at a time)"""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+        self._emit("chunks", "start", str(len(chunks)))
+
+        async def explain(index: int, chunk: Dict) -> str:
+            prompt = CHUNK_PROMPT.format(index=index, count=len(chunks), numbered=numbered(chunk),
+                                         start=chunk["start"], end=chunk["end"], name=chunk["name"],
+                                         language=fields["language"], file_name=fields["file_name"],
+                                         task_context=fields["task_context"])
+            async with semaphore:
+                return await self._timed(f"chunk {index}", specialist_agents.code_explainer, prompt)
+
+        notes = await asyncio.gather(*(explain(i, chunk) for i, chunk in enumerate(chunks, 1)),
+                                     return_exceptions=True)
+        self.timings["chunks"] = time.perf_counter() - started
+        self._emit("chunks", "done")
+        parts = []
+        for chunk, note in zip(chunks, notes):
+            if isinstance(note, Exception):
+                note = f"*This part could not be explained: {note}*"
+            parts.append(f"### Lines {chunk['start']}-{chunk['end']}: {chunk['name']}\n\n{note.strip()}")
+        return "\n\n".join(parts)
+
+    async def explain(self, fields: Dict[str, str], keys: Optional[List[str]] = None) -> Dict[str, object]:
+        """
+        Run the specialists for `keys` (default: all of SPECIALISTS) concurrently.
+        Large files go through the chunk map step first. Values are the
+        section text, or the exception a specialist raised.
+        """
+        keys = keys or list(SPECIALISTS)
+        self.language = fields["language"]
+        chunks = chunk_code(fields["content"], fields["language"])
+        self.chunk_count = len(chunks)
+        if len(chunks) > 1:
+            notes = await self._chunk_notes(fields, chunks)
+            reduce_fields = {**fields, "notes": notes, "lines": chunks[-1]["end"]}
+            prompts = {key: SPECIALISTS[key][2].format(**reduce_fields) for key in keys}
+        else:
+            prompts = {key: SPECIALISTS[key][1].format(**fields) for key in keys}
+
+        results = await asyncio.gather(*(self._timed(key, SPECIALISTS[key][0], prompts[key]) for key in keys),
+                                       return_exceptions=True)
+        return dict(zip(keys, results))
+
+    async def _history(self, file_path: str, file_name: str, include_commit_history: bool) -> str:
+        started = time.perf_counter()
+        git = await asyncio.to_thread(collect_git_diff, file_path=file_path,
+                                      include_commit_history=include_commit_history)
+        self.timings["git"] = time.perf_counter() - started
+        if git.get("status") != "success":
+            return f"*Git analysis unavailable: {git.get('message', 'unknown error')}*"
+        return await self.analyze_diff(file_name, git["diff"])
+
+    async def analyze_diff(self, file_name: str, diff: str) -> str:
+        """History section from a diff (with optional commit history)"""
+        return await self._timed("history", specialist_agents.git_diff_analyzer,
+                                 GIT_DIFF_PROMPT.format(file_name=file_name, diff=diff))
+
+    async def summarize(self, file_name: str, explanation: str) -> str:
+        """Compact summary of a documented file, built from its explanation section"""
+        return await self._timed("summary", specialist_agents.module_summarizer,
+                                 SUMMARY_PROMPT.format(file_name=file_name, explanation=explanation))
+
+    async def run(
+        self,
+        file_path: str,
+        task_description: str = "",
+        include_git_diff: bool = False,
+        include_commit_history: bool = False,
+        dependency_summaries: Optional[Dict[str, str]] = None
+    ) -> Dict:
+        """
+        Returns {"status", "document", "saved_to", "doc_id", "sections", "cached", "chunks", "models",
+        "escalated", "usage", "timings"};
+        a failed specialist leaves a note in its section instead of failing the run.
+        `dependency_summaries` (name -> summary) describe the project files this
+        one imports, so the specialists don't need their source.
+        """
+        started = time.perf_counter()
+        file_info = load_code_file(file_path)
+        if file_info.get("status") == "error":
+            return {"status": "error", "message": file_info["message"]}
+
+        fields = {
+            "content": file_info["content"],
+            "language": file_info["language"].lower(),
+            "file_name": file_info["file_name"],
+            "task_context": f"\nTask context: {task_description}\n" if task_description else "",
+        }
+        if dependency_summaries:
+            fields["task_context"] += (
+                "\nProject files this code imports (already documented - refer to them, don't re-explain them):\n"
+                + "\n".join(f"\n#### {name}\n{summary.strip()}" for name, summary in dependency_summaries.items())
+                + "\n"
+            )
+        jobs = [self.explain(fields)]
+        if include_git_diff or include_commit_history:
+            jobs.append(self._history(file_path, file_info["file_name"], include_commit_history))
+
+        explained, *history = await asyncio.gather(*jobs, return_exceptions=True)
+        if isinstance(explained, Exception):
+            explained = {key: explained for key in SPECIALISTS}
+        results = {**explained, **({"history": history[0]} if history else {})}
+        sections = {}
+        for key, result in results.items():
+            sections[key] = f"*This section could not be generated: {result}*" if isinstance(result, Exception) else result
+
+        document = build_document(file_info["file_name"], sections)
+        saved = write_learning_doc(document, file_info["file_name"], file_path, sections=list(sections),
+                                   output_dir=self.output_dir)
+        self.timings["total"] = time.perf_counter() - started
+        return {
+            "status": saved.get("status", "error"),
+            "document": document,
+            "saved_to": saved.get("saved_to"),
+            "doc_id": saved.get("doc_id"),
+            "sections": sections,
+            "cached": list(self.cached),
+            "chunks": {"count": self.chunk_count, "cached": self.cached_chunks},
+            "models": dict(self.models),
+            "escalated": dict(self.escalated),
+            "usage": self.usage,
+            "timings": dict(self.timings),
+        }
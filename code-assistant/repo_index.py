@@ -0,0 +1,208 @@
+"""
+SQLite index of a repository's source files.
+
+A scan walks the tree once and records path, size, mtime, content hash,
+language and line count. Rescans only re-read files whose size or mtime
+changed, so they cost a `stat` per file. The index also remembers the hash
+each file had when it was last documented, which is how batch runs and the
+UI tell which files need new docs, the file's compact summary for
+repository mode and the source that was documented (the diff base for
+incremental updates).
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from git_backend import GitBackend
+from tools import LANGUAGE_MAP, detect_language
+
+
+SKIP_DIRS = {".git", "node_modules", "venv", ".venv", "env", "__pycache__", "dist", "build",
+             "learning_docs", ".specialist_cache", ".tox", ".mypy_cache", ".pytest_cache"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT NOT NULL,
+    language TEXT NOT NULL,
+    lines INTEGER NOT NULL,
+    documented_hash TEXT,
+    documented_at REAL,
+    doc_path TEXT,
+    summary TEXT,
+    documented_commit TEXT
+)
+"""
+
+# Compressed source of each file as last documented, kept out of `files` so
+# listings don't load it
+SOURCES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documented_sources (
+    path TEXT PRIMARY KEY,
+    content BLOB NOT NULL
+)
+"""
+
+# Columns added after the first release, created on older index files
+ADDED_COLUMNS = {"summary": "TEXT", "documented_commit": "TEXT"}
+
+
+class RepoIndex:
+    """
+    File metadata index stored in `db_path` (REPO_INDEX_PATH, default
+    .code_index.sqlite). Paths are stored absolute so the same file is
+    matched however it was passed in.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("REPO_INDEX_PATH", ".code_index.sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute(SCHEMA)
+            self._db.execute(SOURCES_SCHEMA)
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(files)")}
+            for column, kind in ADDED_COLUMNS.items():
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE files ADD COLUMN {column} {kind}")
+
+    def _refresh_one(self, path: str) -> str:
+        """Update one file's row; returns "added", "updated", "unchanged" or "missing" """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+            return "missing"
+        row = self._db.execute("SELECT size, mtime, hash FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return "unchanged"
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if row and row["hash"] == digest:
+            # Touched but not edited
+            self._db.execute("UPDATE files SET mtime = ? WHERE path = ?", (stat.st_mtime, path))
+            return "unchanged"
+
+        lines = data.count(b"\n") + 1
+        self._db.execute(
+            """INSERT INTO files (path, size, mtime, hash, language, lines) VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime,
+                   hash = excluded.hash, language = excluded.language, lines = excluded.lines""",
+            (path, stat.st_size, stat.st_mtime, digest, detect_language(path), lines),
+        )
+        return "updated" if row else "added"
+
+    def refresh(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Re-index specific files (e.g. a batch's targets) without walking the tree"""
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "missing": 0}
+        with self._lock, self._db:
+            for path in paths:
+                counts[self._refresh_one(os.path.abspath(path))] += 1
+        return counts
+
+    def scan(self, root: str = ".") -> Dict[str, object]:
+        """
+        Walk `root` for files with a known language and bring the index up to
+        date; rows for files that disappeared under `root` are removed.
+        """
+        started = time.perf_counter()
+        root = os.path.abspath(root)
+        found = []
+        for directory, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+            found.extend(os.path.join(directory, name) for name in files
+                         if os.path.splitext(name)[1][1:] in LANGUAGE_MAP)
+
+        counts = self.refresh(found)
+        with self._lock, self._db:
+            prefix = root.rstrip(os.sep) + os.sep
+            # Exact prefix match - LIKE would treat _ and % in the root as wildcards and ignore case
+            known = {row["path"] for row in self._db.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))}
+            stale = known - set(found)
+            self._db.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in stale))
+        counts["removed"] = len(stale)
+        counts["files"] = len(found)
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+        return counts
+
+    def get(self, path: str) -> Optional[Dict]:
+        row = self._db.execute("SELECT * FROM files WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return dict(row) if row else None
+
+    def files(self, root: str = ".") -> List[Dict]:
+        root = os.path.abspath(root).rstrip(os.sep) + os.sep
+        return [dict(row) for row in self._db.execute(
+            "SELECT * FROM files WHERE substr(path, 1, ?) = ? ORDER BY path", (len(root), root))]
+
+    def needs_docs(self, paths: Optional[Iterable[str]] = None, root: str = ".") -> List[Dict]:
+        """
+        Indexed files whose content changed since they were last documented (or
+        were never documented, or whose doc was deleted). Limited to `paths` if
+        given, otherwise every file under `root`. Call scan/refresh first.
+        """
+        if paths is not None:
+            rows = [row for row in (self.get(path) for path in paths) if row]
+        else:
+            rows = self.files(root)
+        return [row for row in rows
+                if row["documented_hash"] != row["hash"]
+                or not (row["doc_path"] and os.path.exists(row["doc_path"]))]
+
+    def mark_documented(self, path: str, doc_path: Optional[str], content_hash: Optional[str] = None,
+                        summary: Optional[str] = None):
+        """
+        Record that `path` was documented at its current (or the given) hash,
+        with the compact summary shown to the files that import it, the git
+        HEAD at the time and the documented source (the base for incremental
+        updates - kept only while the file still has the documented hash)
+        """
+        path = os.path.abspath(path)
+        backend = GitBackend.for_path(path)
+        commit = backend.object_id("HEAD") if backend else None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+        with self._lock, self._db:
+            if content_hash is None:
+                self._refresh_one(path)
+            self._db.execute(
+                """UPDATE files SET documented_hash = COALESCE(?, hash), documented_at = ?, doc_path = ?,
+                   summary = ?, documented_commit = ? WHERE path = ?""",
+                (content_hash, time.time(), os.path.abspath(doc_path) if doc_path else None, summary, commit, path),
+            )
+            row = self._db.execute("SELECT documented_hash FROM files WHERE path = ?", (path,)).fetchone()
+            if data is not None and row and hashlib.sha256(data).hexdigest() == row["documented_hash"]:
+                self._db.execute("INSERT OR REPLACE INTO documented_sources (path, content) VALUES (?, ?)",
+                                 (path, zlib.compress(data)))
+            else:
+                # Edited while being documented - the documented text is unknown
+                self._db.execute("DELETE FROM documented_sources WHERE path = ?", (path,))
+
+    def documented_source(self, path: str) -> Optional[str]:
+        """The source `path` had when it was last documented, if known"""
+        row = self._db.execute("SELECT content FROM documented_sources WHERE path = ?",
+                               (os.path.abspath(path),)).fetchone()
+        return zlib.decompress(row["content"]).decode("utf-8", errors="replace") if row else None
+
+
+_repo_index: Optional[RepoIndex] = None
+
+
+def get_repo_index() -> RepoIndex:
+    """The process-wide index (one SQLite connection, shared by every session)"""
+    global _repo_index
+    if _repo_index is None:
+        _repo_index = RepoIndex()
+    return _repo_index
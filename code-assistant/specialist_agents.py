@@ -1,5 +1,9 @@
 from agents import Agent
 
+from model_router import MODEL_LARGE
+
+# Every agent defaults to the large model; LearningPipeline routes each call (see model_router.py)
+
 # Language Teacher Agent - Explains programming concepts
 language_teacher_instructions = """You are an engaging and passionate programming language teacher who loves helping people truly understand code.
 
@@ -71,7 +75,7 @@ Remember: You're not just listing features - you're teaching someone to think li
 language_teacher = Agent(
     name="Language Teacher",
     instructions=language_teacher_instructions,
-    model="gpt-4o"  # Using more powerful model for better teaching
+    model=MODEL_LARGE
 )
 
 
@@ -148,7 +152,7 @@ Remember: Your reader wants to understand this code so well they could rewrite i
 code_explainer = Agent(
     name="Code Explainer",
     instructions=code_explainer_instructions,
-    model="gpt-4o"  # Using more powerful model for better analysis
+    model=MODEL_LARGE
 )
 
 
@@ -206,7 +210,7 @@ Create documentation that your teammates will actually WANT to read and that mak
 change_documenter = Agent(
     name="Change Documenter",
     instructions=change_documenter_instructions,
-    model="gpt-4o"  # Using more powerful model for better documentation
+    model=MODEL_LARGE
 )
 
 
@@ -270,6 +274,26 @@ Be a thorough code historian and reviewer, not just a diff summarizer!"""
 git_diff_analyzer = Agent(
     name="Git Diff Analyzer",
     instructions=git_diff_analyzer_instructions,
-    model="gpt-4o"  # Using powerful model for detailed analysis
+    model=MODEL_LARGE
 )
 
+
+
+# Module Summarizer Agent - Compact summaries fed to the docs of dependent files
+module_summarizer_instructions = """You write compact reference summaries of source files for other developers.
+
+Given an explanation of a file, summarize what another file that imports it needs to know:
+- Its purpose in one sentence
+- Its public functions/classes with their inputs and outputs (one line each)
+- Important side effects (files written, network calls, global state)
+
+RULES:
+- At most 150 words, as a short bullet list
+- Name things exactly as they appear in the code
+- No teaching, no history, no opinions"""
+
+module_summarizer = Agent(
+    name="Module Summarizer",
+    instructions=module_summarizer_instructions,
+    model=MODEL_LARGE
+)
@@ -0,0 +1,85 @@
+"""Content-addressed on-disk cache for specialist agent outputs."""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SpecialistCache:
+    """
+    Caches specialist outputs under a key built from the agent name, a hash
+    of its instructions, its model and a hash of the full prompt (file
+    content, task description and prompt template). Editing the code, the
+    task or the agent's instructions therefore misses the cache naturally.
+
+    Entries are JSON files; reading one refreshes its mtime, and the least
+    recently used entries are evicted beyond `max_entries` / `max_bytes`.
+    With `bypass=True` lookups always miss but fresh results are still stored.
+    """
+
+    def __init__(self, directory: str = ".specialist_cache", max_entries: int = 500,
+                 max_bytes: int = 50 * 1024 * 1024, bypass: bool = False):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, bypass: bool = False) -> "SpecialistCache":
+        return cls(
+            directory=os.getenv("SPECIALIST_CACHE_DIR", ".specialist_cache"),
+            max_entries=int(os.getenv("SPECIALIST_CACHE_MAX_ENTRIES", "500")),
+            max_bytes=int(float(os.getenv("SPECIALIST_CACHE_MAX_MB", "50")) * 1024 * 1024),
+            bypass=bypass or os.getenv("SPECIALIST_CACHE_BYPASS", "false").lower() == "true",
+        )
+
+    @staticmethod
+    def key(agent, prompt: str) -> str:
+        return _sha256(json.dumps([agent.name, _sha256(agent.instructions or ""), str(agent.model), _sha256(prompt)]))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        if self.bypass:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used
+            return entry["output"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, key: str, output: str, agent_name: str = ""):
+        path = self._path(key)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"agent": agent_name, "created": time.time(), "output": output}, f)
+        os.replace(path + ".tmp", path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+                _, size, name = entries.pop(0)
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass  # Already evicted by another process
+                total -= size
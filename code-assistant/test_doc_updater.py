@@ -0,0 +1,44 @@
+"""
+Unit tests for the diff helpers in doc_updater.py
+
+Run with: python -m pytest test_doc_updater.py
+"""
+from doc_updater import apply_edits, changed_lines, is_cosmetic
+from git_backend import unified_hunks
+
+
+OLD = "def total(items):\n    return sum(items)\n\n\ndef average(items):\n    return total(items) / len(items)\n"
+
+
+def test_changed_lines_counts_only_added_and_removed_lines():
+    new = OLD.replace("return sum(items)", "return sum(item.price for item in items)")
+    hunks = unified_hunks("cart.py", OLD, new)
+    assert changed_lines(hunks) == ["-    return sum(items)", "+    return sum(item.price for item in items)"]
+
+
+def test_changed_lines_ignores_the_empty_string_after_a_hunk():
+    hunks = unified_hunks("cart.py", OLD, "# Cart helpers\n" + OLD)
+    assert changed_lines(hunks) == ["+# Cart helpers"]
+
+
+def test_comment_only_change_is_cosmetic():
+    hunks = unified_hunks("cart.py", OLD, OLD.replace("def average", "# Mean price\ndef average"))
+    assert is_cosmetic(hunks)
+
+
+def test_code_change_is_not_cosmetic():
+    hunks = unified_hunks("cart.py", OLD, OLD.replace("len(items)", "max(len(items), 1)"))
+    assert not is_cosmetic(hunks)
+
+
+def test_apply_edits_replaces_each_search_block_once():
+    section = "`total` adds the items.\n\n`average` divides by the count."
+    reply = ("<<<<<<< SEARCH\n`average` divides by the count.\n=======\n"
+             "`average` divides by the count (at least 1).\n>>>>>>> REPLACE")
+    assert apply_edits(section, reply) == "`total` adds the items.\n\n`average` divides by the count (at least 1)."
+
+
+def test_apply_edits_rejects_missing_search_text_and_plain_replies():
+    section = "`total` adds the items."
+    assert apply_edits(section, "<<<<<<< SEARCH\nnot there\n=======\nx\n>>>>>>> REPLACE") is None
+    assert apply_edits(section, "NO CHANGES") is None
@@ -1,49 +1,101 @@
 import os
+import hashlib
 import subprocess
-from typing import Dict
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
 from datetime import datetime
 from agents import function_tool
+from doc_store import DocStore
+from git_backend import GIT_DIFF_MAX_LINES, GitBackend, paginate_hunks, split_hunks
 
 
-@function_tool
-def read_code_file(file_path: str) -> Dict[str, str]:
+# Content registered under short handles, so agents pass "file:1a2b3c4d5e"
+# instead of pasting whole files through tool-call arguments
+MAX_HANDLES = 64
+_handles: "OrderedDict[str, Dict]" = OrderedDict()
+_handles_lock = threading.Lock()
+
+
+def register_content(kind: str, content: str, info: Optional[Dict] = None) -> str:
+    """Store content server-side and return its handle (same content, same handle)"""
+    handle = f"{kind}:{hashlib.sha256(content.encode('utf-8')).hexdigest()[:10]}"
+    with _handles_lock:
+        _handles[handle] = {**(info or {}), "content": content}
+        _handles.move_to_end(handle)
+        while len(_handles) > MAX_HANDLES:
+            _handles.popitem(last=False)
+    return handle
+
+
+def resolve_handle(handle: str) -> Optional[Dict]:
+    """The registered entry ({"content", ...info}) for a handle, or None if unknown/expired"""
+    with _handles_lock:
+        return _handles.get(handle.strip())
+
+
+# Plain helpers - called directly by the pipeline and wrapped as agent tools below
+LANGUAGE_MAP = {
+    'ts': 'TypeScript', 'tsx': 'TypeScript React',
+    'js': 'JavaScript', 'jsx': 'JavaScript React',
+    'go': 'Go',
+    'ruby': 'Ruby', 'rb': 'Ruby',
+    'py': 'Python',
+    'java': 'Java',
+    'c': 'C', 'cpp': 'C++', 'cc': 'C++',
+    'rs': 'Rust',
+    'swift': 'Swift',
+    'kt': 'Kotlin',
+    'php': 'PHP',
+}
+
+
+def detect_language(file_path: str) -> str:
+    return LANGUAGE_MAP.get(file_path.split('.')[-1], "Unknown")
+
+
+def load_code_file(file_path: str) -> Dict[str, str]:
     """Read a code file and return its contents with basic info"""
     try:
         with open(file_path, 'r') as f:
             content = f.read()
         
         extension = file_path.split('.')[-1]
-        language_map = {
-            'ts': 'TypeScript', 'tsx': 'TypeScript React',
-            'js': 'JavaScript', 'jsx': 'JavaScript React',
-            'go': 'Go',
-            'ruby': 'Ruby', 'rb': 'Ruby',
-            'py': 'Python',
-            'java': 'Java',
-            'c': 'C', 'cpp': 'C++', 'cc': 'C++',
-            'rs': 'Rust',
-            'swift': 'Swift',
-            'kt': 'Kotlin',
-            'php': 'PHP',
-        }
-        
         return {
             "content": content,
-            "language": language_map.get(extension, "Unknown"),
+            "language": detect_language(file_path),
             "file_name": file_path.split('/')[-1],
-            "lines": len(content.split('\n')),
+            "lines": content.count('\n') + 1,
             "extension": extension
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
-@function_tool
-def save_learning_doc(content: str, file_name: str) -> Dict[str, str]:
-    """Save your learning documentation"""
+_doc_store: Optional[DocStore] = None
+
+# Source file of the current orchestrator run, so docs it saves are recorded against it
+current_source_file: ContextVar[str] = ContextVar("current_source_file", default="")
+# Directory the current run saves docs to (per UI session, so users don't share files)
+current_output_dir: ContextVar[str] = ContextVar("current_output_dir", default="learning_docs")
+
+
+def get_doc_store() -> DocStore:
+    global _doc_store
+    if _doc_store is None:
+        _doc_store = DocStore()
+    return _doc_store
+
+
+def write_learning_doc(content: str, file_name: str, file_path: str = "", sections: Optional[List[str]] = None,
+                       output_dir: Optional[str] = None) -> Dict[str, str]:
+    """Save your learning documentation to `output_dir` (default learning_docs/) and the searchable doc store"""
     try:
-        os.makedirs('learning_docs', exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        output_dir = output_dir or current_output_dir.get()
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         if file_name.endswith('.md'):
             base_name = file_name[:-3]  # Remove .md
@@ -51,68 +103,84 @@ def save_learning_doc(content: str, file_name: str) -> Dict[str, str]:
             base_name = file_name
             
         clean_name = base_name.replace('.', '_')
-        file_path = f"learning_docs/{timestamp}_{clean_name}.md"
+        # Concurrent runs can save docs for same-named files (pkg/a/__init__.py,
+        # pkg/b/__init__.py) in the same second - claim the name exclusively
+        suffix = 1
+        while True:
+            doc_path = os.path.join(output_dir, f"{timestamp}_{clean_name}{f'_{suffix}' if suffix > 1 else ''}.md")
+            try:
+                with open(doc_path, 'x') as f:
+                    f.write(content)
+                break
+            except FileExistsError:
+                suffix += 1
         
-        with open(file_path, 'w') as f:
-            f.write(content)
-        
-        return {"status": "success", "saved_to": file_path}
+        stored = get_doc_store().save(content, file_name, file_path=file_path, doc_path=doc_path, sections=sections)
+        return {"status": "success", "saved_to": doc_path, "doc_id": stored["doc_id"]}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
-@function_tool
-def get_git_diff(file_path: str = "", commits_back: int = 1, compare_with: str = "", include_commit_history: bool = False, history_limit: int = 10) -> Dict[str, str]:
-    """Get git diff to see what changed, optionally with commit history context"""
+def _subprocess_history(history_limit: int, path: str = "") -> List[Dict[str, str]]:
+    """History of the repository or of a directory/deleted file - one `git log` call"""
+    log_cmd = [
+        'git', 'log',
+        f'-{history_limit}',
+        '--pretty=format:%H|%an|%ae|%ad|%s',
+        '--date=short'
+    ]
+    if path:
+        log_cmd += ['--', path]
+    log_result = subprocess.run(log_cmd, capture_output=True, text=True)
+    commits = []
+    if log_result.returncode == 0 and log_result.stdout.strip():
+        for line in log_result.stdout.strip().split('\n'):
+            if line:
+                parts = line.split('|')
+                if len(parts) == 5:
+                    commits.append({
+                        "hash": parts[0][:8],
+                        "author": parts[1],
+                        "date": parts[3],
+                        "message": parts[4]
+                    })
+    return commits
+
+
+def collect_git_diff(file_path: str = "", commits_back: int = 1, compare_with: str = "", include_commit_history: bool = False, history_limit: int = 10, page: int = 1, max_lines: int = GIT_DIFF_MAX_LINES) -> Dict[str, str]:
+    """
+    Get git diff to see what changed, optionally with commit history context.
+    For a single file the persistent cat-file backend is used (no subprocess per
+    call); the diff is split into pages of whole hunks of about `max_lines` lines.
+    """
+    started = time.perf_counter()
     try:
+        # Directories and deleted files go through `git diff`/`git log`
+        backend = GitBackend.for_path(file_path) if file_path and os.path.isfile(file_path) else None
+        base = compare_with or f'HEAD~{max(commits_back, 1)}'
+        
         # Get commit history if requested
         commit_history = ""
         if include_commit_history:
-            log_cmd = [
-                'git', 'log',
-                f'-{history_limit}',
-                '--pretty=format:%H|%an|%ae|%ad|%s',
-                '--date=short',
-                '--follow'
-            ]
-            
-            if file_path:
-                log_cmd.extend(['--', file_path])
-            
-            log_result = subprocess.run(log_cmd, capture_output=True, text=True)
-            
-            if log_result.returncode == 0 and log_result.stdout.strip():
-                commits = []
-                for line in log_result.stdout.strip().split('\n'):
-                    if line:
-                        parts = line.split('|')
-                        if len(parts) == 5:
-                            commits.append({
-                                "hash": parts[0][:8],
-                                "author": parts[1],
-                                "date": parts[3],
-                                "message": parts[4]
-                            })
-                
+            commits = backend.history(file_path, history_limit) if backend else _subprocess_history(history_limit, file_path)
+            if commits:
                 commit_history = f"\n=== COMMIT HISTORY ({len(commits)} recent commits) ===\n\n"
                 for i, commit in enumerate(commits, 1):
                     commit_history += f"{i}. [{commit['date']}] {commit['hash']} - {commit['message']}\n"
                     commit_history += f"   By: {commit['author']}\n\n"
         
         # Get the diff
-        if compare_with:
-            cmd = ['git', 'diff', compare_with, file_path] if file_path else ['git', 'diff', compare_with]
-        elif commits_back > 1:
-            cmd = ['git', 'diff', f'HEAD~{commits_back}', file_path] if file_path else ['git', 'diff', f'HEAD~{commits_back}']
+        if backend:
+            hunks = backend.diff_hunks(file_path, base)
         else:
-            cmd = ['git', 'diff', 'HEAD~1', file_path] if file_path else ['git', 'diff', 'HEAD~1']
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
+            cmd = ['git', 'diff', base, file_path] if file_path else ['git', 'diff', base]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                return {"status": "error", "message": result.stderr}
+            hunks = split_hunks(result.stdout)
         
-        if result.returncode != 0:
-            return {"status": "error", "message": result.stderr}
-        
-        diff_output = result.stdout
+        paged = paginate_hunks(hunks, page, max_lines)
+        diff_output = paged["text"]
         
         if not diff_output.strip():
             diff_output = "No changes found in diff"
@@ -124,8 +192,53 @@ def get_git_diff(file_path: str = "", commits_back: int = 1, compare_with: str =
             "status": "success",
             "diff": full_output,
             "file": file_path if file_path else "all files",
-            "has_commit_history": bool(commit_history)
+            "has_commit_history": bool(commit_history),
+            "page": paged["page"],
+            "pages": paged["pages"],
+            "hunks": paged["hunks"],
+            "truncated": paged["truncated"],
+            "backend": "cat-file" if backend else "subprocess",
+            "seconds": round(time.perf_counter() - started, 4)
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+
+
+# Agent tools - thin wrappers so the orchestrator and the pipeline share one implementation
+@function_tool
+def read_code_file(file_path: str) -> Dict[str, str]:
+    """Read a code file and return a handle for its content plus basic info. Pass the handle to the specialist tools."""
+    info = load_code_file(file_path)
+    if info.get("status") == "error":
+        return info
+    content = info.pop("content")
+    info["handle"] = register_content("file", content, info)
+    return info
+
+
+@function_tool
+def save_learning_doc(content: str, file_name: str) -> Dict[str, str]:
+    """Save your learning documentation. Returns its doc_id."""
+    return write_learning_doc(content, file_name, file_path=current_source_file.get())
+
+
+@function_tool
+def search_learning_docs(query: str, limit: int = 5) -> Dict:
+    """Full-text search of previously generated learning docs. Returns doc_ids, file names and matching snippets."""
+    try:
+        return {"status": "success", "results": get_doc_store().search(query, limit)}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@function_tool
+def get_git_diff(file_path: str = "", commits_back: int = 1, compare_with: str = "", include_commit_history: bool = False, history_limit: int = 10, page: int = 1) -> Dict[str, str]:
+    """Get git diff to see what changed, optionally with commit history context. Returns a handle for the diff text; large diffs are paginated by hunk - check "pages" and request more with page=2, 3..."""
+    result = collect_git_diff(file_path, commits_back, compare_with, include_commit_history, history_limit, page)
+    if result.get("status") != "success":
+        return result
+    diff = result.pop("diff")
+    result["lines"] = len(diff.split('\n'))
+    result["handle"] = register_content("diff", diff, {"file_name": result["file"]})
+    return result
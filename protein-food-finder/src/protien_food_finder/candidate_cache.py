@@ -0,0 +1,49 @@
+"""On-disk cache of preference-agnostic product candidates per (store, location)."""
+import hashlib
+import json
+import os
+import time
+from typing import List, Optional
+
+from protien_food_finder.structured_outputs import ProteinProduct
+
+
+class CandidateCache:
+    """
+    Stores every structured candidate a store specialist found, independent
+    of any user's dietary preferences, so other profiles at the same
+    location reuse the search instead of repeating it.
+    """
+
+    def __init__(self, directory: str = 'candidates', max_age_hours: float = 24):
+        self.directory = directory
+        self.max_age_seconds = max_age_hours * 3600
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, store_name: str, location: str) -> str:
+        key = f"{store_name.lower().strip()}|{' '.join(location.lower().split())}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest()[:16] + '.json')
+
+    def get(self, store_name: str, location: str) -> Optional[List[ProteinProduct]]:
+        """Return cached candidates, or None if missing or older than max_age_hours"""
+        try:
+            with open(self._path(store_name, location), 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry['saved_at'] > self.max_age_seconds:
+            return None
+        return [ProteinProduct(**product) for product in entry['products']]
+
+    def put(self, store_name: str, location: str, products: List[ProteinProduct]):
+        entry = {
+            'store': store_name,
+            'location': location,
+            'saved_at': time.time(),
+            'products': [p.model_dump() for p in products],
+        }
+        path = self._path(store_name, location)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(entry, f)
+        os.replace(path + '.tmp', path)
@@ -1,11 +1,29 @@
 from crewai import Agent, Crew, Process, Task  # pyright: ignore[reportMissingImports]
 from crewai.project import CrewBase, agent, crew, task  # pyright: ignore[reportMissingImports]
 from crewai.agents.agent_builder.base_agent import BaseAgent  # pyright: ignore[reportMissingImports]
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool  # pyright: ignore[reportMissingImports]
+from crewai_tools import SerperDevTool  # pyright: ignore[reportMissingImports]
 from typing import List, Dict, Optional
+import os
+import threading
+import time
 import yaml
 import re
 
+from protien_food_finder.structured_outputs import ProductList, ProteinProduct, RecommendationReport, ShoppingPlan
+from protien_food_finder.history import PriceHistory, product_key
+from protien_food_finder.shopping_optimizer import optimize_shopping
+from protien_food_finder.validation import ProductValidator
+from protien_food_finder.preferences import DietaryProfile
+from protien_food_finder.scheduler import StreamingScheduler
+from protien_food_finder.tools.store_search_tools import BudgetedTool, ProductCollector, SubmitProductTool
+from protien_food_finder.tools.cached_tool import CachedTool, ToolResultCache
+from protien_food_finder.tools.pooled_scrape_tool import PooledScrapeWebsiteTool
+from protien_food_finder.fetcher import PageFetcher
+from protien_food_finder.extraction import ExtractionStats
+from protien_food_finder.routing import ModelRouter
+from protien_food_finder.knowledge import KnowledgeIndex
+from protien_food_finder.report_renderer import write_report
+
 
 @CrewBase
 class ProtienFoodFinder():
@@ -15,18 +33,53 @@ class ProtienFoodFinder():
     tasks_config = 'config/tasks.yaml'
     settings_config = 'src/protien_food_finder/config/settings.yaml'
 
-    def __init__(self):
-        # Initialize tools
-        self.serper_tool = SerperDevTool()
-        self.scraper_tool = ScrapeWebsiteTool()
+    def __init__(self, tool_cache: Optional[ToolResultCache] = None, routing_policy: Optional[str] = None):
+        # Seconds spent in each startup step, printed before the first search
+        self.startup_timings: Dict[str, float] = {}
+        started = time.perf_counter()
 
         # Load settings
         self.settings = self._load_settings()
+        self.startup_timings['settings'] = time.perf_counter() - started
+        # Model, temperature and max_tokens per agent role (settings.yaml `llm` block)
+        self.router = ModelRouter.from_settings(self.settings, policy=routing_policy)
+
+        # Initialize tools - every scrape goes through one pooled, revalidating fetcher
+        self.fetcher = PageFetcher.from_settings(self.settings)
+        self.serper_tool = SerperDevTool()
+        self.extraction_stats = ExtractionStats()
+        self.scraper_tool = PooledScrapeWebsiteTool(
+            fetcher=self.fetcher,
+            extraction_stats=self.extraction_stats,
+            max_chars=self.settings.get('fetcher', {}).get('max_page_chars', 8000),
+        )
+        if tool_cache is not None:
+            # Share search/scrape results with other crews (e.g. parallel evaluation iterations)
+            self.serper_tool = CachedTool(self.serper_tool, tool_cache)
+            self.scraper_tool = CachedTool(self.scraper_tool, tool_cache)
+        self.startup_timings['tools'] = time.perf_counter() - started - sum(self.startup_timings.values())
+
+        # knowledge/ embeddings are persisted by content hash - only changed files are re-embedded
+        self.knowledge: Optional[KnowledgeIndex] = None
+        if self.settings.get('knowledge', {}).get('enabled', True):
+            try:
+                self.knowledge = KnowledgeIndex.from_settings(self.settings).sync()
+            except Exception as e:
+                print(f"⚠️  Could not load the knowledge index, continuing without it: {e}")
+        self.startup_timings['knowledge'] = time.perf_counter() - started - sum(self.startup_timings.values())
 
         # Storage for dynamic agents and tasks
         self.dynamic_agents: List[Agent] = []
         self.dynamic_tasks: List[Task] = []
         self.store_list: List[str] = []
+        self.shopping_plan: Optional[ShoppingPlan] = None
+        self.collectors: Dict[str, ProductCollector] = {}
+        self.dietary_profile = DietaryProfile.from_settings(self.settings.get('dietary_validation', {}))
+        self.output_file = 'output/protein_recommendations.md'
+
+        # Token usage summed over every crew this instance kicks off
+        self.token_usage: Dict[str, int] = {}
+        self._usage_lock = threading.Lock()
 
     def _load_settings(self) -> Dict:
         """Load settings from settings.yaml"""
@@ -47,6 +100,7 @@ class ProtienFoodFinder():
         return Agent(
             config=self.agents_config['store_locator'],
             tools=[self.serper_tool],# type: ignore[index]
+            llm=self.router.llm_for('store_locator'),
             verbose=True
         )
 
@@ -55,6 +109,7 @@ class ProtienFoodFinder():
         return Agent(
             config=self.agents_config['nutrition_researcher'],
             tools=[self.serper_tool, self.scraper_tool],  # Added scraper for detailed product pages
+            llm=self.router.llm_for('nutrition_researcher'),
             verbose=True
         )
 
@@ -62,6 +117,7 @@ class ProtienFoodFinder():
     def nutrition_validator(self) -> Agent:
         return Agent(
             config=self.agents_config['nutrition_validator'],
+            llm=self.router.llm_for('nutrition_validator'),
             verbose=True
         )
 
@@ -69,6 +125,7 @@ class ProtienFoodFinder():
     def recommendation_specialist(self) -> Agent:
         return Agent(
             config=self.agents_config['recommendation_specialist'],
+            llm=self.router.llm_for('recommendation_specialist'),
             verbose=True
         )
 
@@ -102,7 +159,31 @@ class ProtienFoodFinder():
         print(f"📍 Parsed {len(stores)} stores: {stores}")
         return stores
 
-    def create_store_specialist_agent(self, store_name: str, location: str, dietary_preferences: str) -> Optional[Agent]:
+    def create_product_collector(self, store_name: str) -> ProductCollector:
+        """
+        Create the collector that validates a store's candidates as they are found
+        and tells the store specialist when it can stop searching. Candidates are
+        preference-agnostic: only the protein floor applies here, dietary
+        profiles are applied later as a local filter.
+        """
+        limits = self.settings['products_per_store']
+        collector = ProductCollector(
+            store_name,
+            ProductValidator.candidates_only(self.settings),
+            min_products=limits.get('min', 5),
+            max_products=self.candidates_per_store(),
+            time_budget=limits.get('min_time_budget', 120),
+        )
+        self.collectors[store_name] = collector
+        return collector
+
+    def candidates_per_store(self) -> int:
+        """How many preference-agnostic candidates a store search should collect"""
+        limits = self.settings['products_per_store']
+        return self.settings.get('candidate_search', {}).get(
+            'candidates_per_store', limits.get('max', limits.get('default', 5)))
+
+    def create_store_specialist_agent(self, store_name: str, location: str) -> Optional[Agent]:
         """
         Dynamically create a store specialist agent using the template from agents.yaml
         """
@@ -114,8 +195,8 @@ class ProtienFoodFinder():
             store_info = self.settings['stores'].get(store_name, {})
             store_website = store_info.get('website', f"{store_name.lower().replace(' ', '')}.com")
 
-            # Get products count from settings
-            products_count = self.settings['products_per_store'].get('default', 5)
+            # Broad candidate pool - dietary profiles filter it afterwards
+            products_count = self.candidates_per_store()
 
             # Replace variables in template
             agent_config = {
@@ -124,22 +205,27 @@ class ProtienFoodFinder():
                     store_name=store_name,
                     store_website=store_website,
                     location=location,
-                    dietary_preferences=dietary_preferences,
                     products_count=products_count
                 ),
                 'backstory': template['backstory'].format(
                     store_name=store_name,
                     store_website=store_website
                 ),
-                'llm': template.get('llm', 'gpt-4o-mini'),
                 'verbose': template.get('verbose', True),
                 'allow_delegation': template.get('allow_delegation', False)
             }
 
-            # Create agent
+            # Search tools stop working once enough valid products are submitted
+            collector = self.create_product_collector(store_name)
             agent = Agent(
                 config=agent_config,
-                tools=[self.serper_tool, self.scraper_tool],
+                tools=[
+                    BudgetedTool(self.serper_tool, collector),
+                    BudgetedTool(self.scraper_tool, collector),
+                    SubmitProductTool(collector=collector),
+                ],
+                llm=self.router.llm_for('store_specialist'),
+                max_execution_time=self.settings['agent_behavior'].get('timeout_per_agent'),
                 verbose=True
             )
 
@@ -154,7 +240,7 @@ class ProtienFoodFinder():
             else:
                 raise
 
-    def create_store_search_task(self, store_name: str, agent: Agent, location: str, dietary_preferences: str, find_stores_task_obj: Task) -> Optional[Task]:
+    def create_store_search_task(self, store_name: str, agent: Agent, location: str, find_stores_task_obj: Task) -> Optional[Task]:
         """
         Dynamically create a store search task using the template from tasks.yaml
         """
@@ -166,8 +252,8 @@ class ProtienFoodFinder():
             store_info = self.settings['stores'].get(store_name, {})
             store_website = store_info.get('website', f"{store_name.lower().replace(' ', '')}.com")
 
-            # Get products count from settings
-            products_count = self.settings['products_per_store'].get('default', 5)
+            # Broad candidate pool - dietary profiles filter it afterwards
+            products_count = self.candidates_per_store()
 
             # Replace variables in template
             task_config = {
@@ -175,7 +261,6 @@ class ProtienFoodFinder():
                     store_name=store_name,
                     store_website=store_website,
                     location=location,
-                    dietary_preferences=dietary_preferences,
                     products_count=products_count
                 ),
                 'expected_output': template['expected_output'].format(
@@ -191,7 +276,9 @@ class ProtienFoodFinder():
                 description=task_config['description'],
                 expected_output=task_config['expected_output'],
                 agent=task_config['agent'],
-                context=task_config['context']
+                context=task_config['context'],
+                guardrail=self.store_task_guardrail(store_name, agent),
+                guardrail_max_retries=self.router.retries,
             )
 
             print(f"✅ Created task for {store_name}")
@@ -205,6 +292,132 @@ class ProtienFoodFinder():
             else:
                 raise
 
+    def store_task_guardrail(self, store_name: str, agent: Agent):
+        """Escalate a store search whose agent never submitted a schema-valid product"""
+        collector = self.collectors.get(store_name)
+
+        def check(_output) -> Optional[str]:
+            if collector is None or collector.products or collector.rejected:
+                return None
+            return (f"No product for {store_name} was submitted with valid nutrition fields. "
+                    f"Call 'Submit product candidate' for every product you found.")
+
+        return self.router.guardrail(agent, 'store_specialist', check)
+
+    def recommendation_guardrail(self, agent: Agent):
+        """Escalate a recommendation answer that does not parse as a RecommendationReport"""
+
+        def check(output) -> Optional[str]:
+            if isinstance(getattr(output, 'pydantic', None), RecommendationReport):
+                return None
+            return "Your answer did not match the RecommendationReport schema. Return every required field."
+
+        return self.router.guardrail(agent, 'recommendation_specialist', check)
+
+    def render_recommendations(self, output, output_file: Optional[str] = None):
+        """
+        Task callback for the recommendation task: render its RecommendationReport
+        locally into the markdown report (raw text is saved if it did not parse).
+        """
+        output_file = output_file or self.output_file
+        report = getattr(output, 'pydantic', None)
+        if isinstance(report, RecommendationReport):
+            write_report(report, output_file, plan=self.shopping_plan,
+                         top_per_store=self.settings.get('report', {}).get('top_items_per_store', 3))
+            return
+
+        print("⚠️  Recommendation output was not a RecommendationReport - saving it unrendered")
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        with open(output_file, 'w') as f:
+            f.write(str(getattr(output, 'raw', output)))
+
+    def user_knowledge(self, dietary_preferences: str) -> str:
+        """Relevant knowledge/ chunks for the recommendation task, or '' without an index"""
+        if self.knowledge is None:
+            return ""
+        try:
+            chunks = self.knowledge.search(dietary_preferences,
+                                           top_k=self.settings.get('knowledge', {}).get('top_k', 3))
+        except Exception as e:
+            print(f"⚠️  Knowledge search failed: {e}")
+            return ""
+        # Braces would be taken for task input placeholders
+        text = "\n".join(chunks).replace("{", "(").replace("}", ")")
+        return "\n\nWHAT WE KNOW ABOUT THE USER:\n" + text if text else ""
+
+    def print_startup_timings(self):
+        print("\n⏱️  Startup timings:")
+        for step, seconds in self.startup_timings.items():
+            print(f"   - {step}: {seconds:.2f}s")
+        if self.knowledge is not None:
+            print(f"   📚 {self.knowledge.summary()}")
+
+    def collect_products(self, result) -> List[ProteinProduct]:
+        """
+        Collect this run's product observations from a crew result: the
+        candidates submitted to the store collectors plus any ProductList task
+        output, once per store + product. The recommendation report only
+        repeats products already observed, and collectors filled from the
+        candidate cache hold observations recorded by an earlier run, so
+        neither is counted again.
+        """
+        candidates: List[ProteinProduct] = [p for collector in self.collectors.values()
+                                            if not collector.from_cache for p in collector.products]
+        for task_output in getattr(result, 'tasks_output', None) or []:
+            model = getattr(task_output, 'pydantic', None)
+            if isinstance(model, ProductList):
+                candidates.extend(model.products)
+        products: Dict[str, ProteinProduct] = {}
+        for product in candidates:
+            products.setdefault(product_key(product.store, product.product_name), product)
+        return list(products.values())
+
+    def validated_store_products(self, profile: Optional[DietaryProfile] = None) -> List[ProteinProduct]:
+        """Store candidates that pass a dietary profile (the current run's profile by default)"""
+        validator = ProductValidator(profile or self.dietary_profile)
+        return validator.filter(p for collector in self.collectors.values() for p in collector.products)
+
+    def plan_shopping(self, products: List[ProteinProduct]) -> ShoppingPlan:
+        """Run the local shopping optimizer with the settings.yaml budget and visit cost"""
+        shopping = self.settings.get('shopping', {})
+        plan = optimize_shopping(
+            products,
+            budget=shopping.get('budget', 100.0),
+            store_visit_cost=shopping.get('store_visit_cost', 0.0),
+            protein_target=shopping.get('protein_target_grams'),
+            max_stores=shopping.get('max_stores'),
+            max_items=shopping.get('max_items'),
+        )
+        print(f"🛒 Shopping plan: {len(plan.strategies)} stores, "
+              f"${plan.estimated_total_budget:.2f}, {plan.total_protein}g protein")
+        return plan
+
+    def record_usage(self, crew_output):
+        """Add a crew output's token usage to this run's total"""
+        usage = getattr(crew_output, 'token_usage', None)
+        if usage is None:
+            return
+        with self._usage_lock:
+            for key, value in usage.model_dump().items():
+                if isinstance(value, int):
+                    self.token_usage[key] = self.token_usage.get(key, 0) + value
+
+    def record_history(self, result) -> int:
+        """Append this run's product observations to the price/nutrition history"""
+        history_settings = self.settings.get('history', {})
+        if not history_settings.get('enabled', True):
+            return 0
+
+        try:
+            history = PriceHistory(history_settings.get('directory', 'history'))
+            recorded = history.append(self.collect_products(result))
+            print(f"🗄️  Recorded {recorded} product observations ({len(history)} total in history)")
+            return recorded
+        except Exception as e:
+            # History is a side channel - never fail the run because of it
+            print(f"⚠️  Could not record price history: {e}")
+            return 0
+
     @task
     def find_stores_task(self) -> Task:
         return Task(
@@ -227,19 +440,15 @@ class ProtienFoodFinder():
     def create_recommendations_task(self) -> Task:
         return Task(
             config=self.tasks_config['create_recommendations'],
+            output_pydantic=RecommendationReport,
+            callback=self.render_recommendations,
         )
 
-    def build_dynamic_crew(self, location: str, dietary_preferences: str) -> Crew:
+    def find_stores(self, location: str):
         """
-        Build a dynamic crew that:
-        1. Finds stores first
-        2. Parses store names from output
-        3. Creates one agent and task per store
-        4. Runs all store tasks in parallel (if configured)
-        5. Validates and makes recommendations
+        Run just the store finding task and parse the store names from its output.
+        Returns the executed task (used as context by store searches) and the store list.
         """
-        print(f"\n🏗️  Building dynamic crew for location: {location}")
-
         # Step 1: Find stores
         print("\n📍 Step 1: Finding stores...")
         store_locator_agent = self.store_locator()
@@ -257,12 +466,55 @@ class ProtienFoodFinder():
 
         # Execute to get store list
         find_stores_result = initial_crew.kickoff(inputs={'location': location})
+        self.record_usage(find_stores_result)
         find_stores_output = str(find_stores_result)
 
         # Step 2: Parse stores
         print("\n🔍 Step 2: Parsing stores from output...")
         stores = self.parse_stores_from_output(find_stores_output)
         self.store_list = stores
+        return find_stores_task_obj, stores
+
+    def run_streaming(self, location: str, dietary_preferences: str):
+        """
+        Run the dynamic workflow without stage barriers: every store is searched
+        and validated in its own pipeline, merged as it finishes, then recommended.
+        Falls back to the legacy crew if no stores are found.
+        """
+        self.dietary_profile = DietaryProfile.from_text(
+            dietary_preferences, default_min_protein=self.dietary_profile.min_protein_grams)
+        scheduler = StreamingScheduler(self)
+        result = scheduler.run(location, dietary_preferences)
+        if result is None:
+            print("⚠️  No store produced any products. Falling back to legacy workflow.")
+            return self.crew().kickoff(inputs={'location': location, 'dietary_preferences': dietary_preferences})
+        return result
+
+    def run_profiles(self, location: str, profiles: Dict[str, str]) -> Optional[Dict]:
+        """
+        Serve several dietary profiles at one location with a single, shared
+        store search. `profiles` maps a profile name to its dietary_preferences
+        text. Returns the recommendation output per profile.
+        """
+        return StreamingScheduler(self).run_profiles(location, profiles)
+
+    def build_dynamic_crew(self, location: str, dietary_preferences: str) -> Crew:
+        """
+        Build a dynamic crew that:
+        1. Finds stores first
+        2. Parses store names from output
+        3. Creates one agent and task per store
+        4. Runs all store tasks in parallel (if configured)
+        5. Validates and makes recommendations
+        """
+        print(f"\n🏗️  Building dynamic crew for location: {location}")
+        self.dietary_profile = DietaryProfile.from_text(
+            dietary_preferences, default_min_protein=self.dietary_profile.min_protein_grams)
+        if self.dietary_profile.unparsed:
+            print(f"⚠️  No local rule for {', '.join(self.dietary_profile.unparsed)} - left to the validator")
+
+        find_stores_task_obj, stores = self.find_stores(location)
+        store_locator_agent = find_stores_task_obj.agent
 
         if not stores:
             print("⚠️  No stores found. Falling back to legacy workflow.")
@@ -271,7 +523,7 @@ class ProtienFoodFinder():
         # Step 3: Create dynamic agents and tasks
         print(f"\n🤖 Step 3: Creating {len(stores)} store specialist agents...")
         for store_name in stores:
-            agent = self.create_store_specialist_agent(store_name, location, dietary_preferences)
+            agent = self.create_store_specialist_agent(store_name, location)
             if agent:
                 self.dynamic_agents.append(agent)
 
@@ -280,7 +532,6 @@ class ProtienFoodFinder():
                     store_name,
                     agent,
                     location,
-                    dietary_preferences,
                     find_stores_task_obj
                 )
                 if task:
@@ -297,21 +548,36 @@ class ProtienFoodFinder():
         validator_agent = self.nutrition_validator()
         recommender_agent = self.recommendation_specialist()
 
+        def attach_shopping_plan(_validation_output):
+            # Runs once validation finishes: optimize locally, let the recommender narrate
+            try:
+                self.shopping_plan = self.plan_shopping(self.validated_store_products())
+                recommend_task.description += (
+                    "\n\nSHOPPING STRATEGY (already optimized - narrate it, do not re-plan):\n"
+                    + self.shopping_plan.to_markdown()
+                )
+            except Exception as e:
+                print(f"⚠️  Shopping optimizer failed, leaving strategy to the LLM: {e}")
+
         # Validation task needs all store tasks as context
         validate_task = Task(
             description=self.tasks_config['validate_products']['description'],
             expected_output=self.tasks_config['validate_products']['expected_output'],
             agent=validator_agent,
-            context=self.dynamic_tasks  # Context from all store searches
+            context=self.dynamic_tasks,  # Context from all store searches
+            callback=attach_shopping_plan
         )
 
         # Recommendation task needs validation task as context
         recommend_task = Task(
-            description=self.tasks_config['create_recommendations']['description'],
+            description=self.tasks_config['create_recommendations']['description'] + self.user_knowledge(dietary_preferences),
             expected_output=self.tasks_config['create_recommendations']['expected_output'],
             agent=recommender_agent,
             context=[validate_task] + self.dynamic_tasks,  # Context from validation and all searches
-            output_file='output/protein_recommendations.md'
+            output_pydantic=RecommendationReport,
+            callback=self.render_recommendations,
+            guardrail=self.recommendation_guardrail(recommender_agent),
+            guardrail_max_retries=self.router.retries,
         )
 
         # Combine all agents and tasks
@@ -0,0 +1,265 @@
+"""Parallel evaluation runner: concurrent crew iterations scored into one comparison report."""
+import json
+import os
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from protien_food_finder.crew import ProtienFoodFinder
+from protien_food_finder.report_renderer import REQUIRED_SECTIONS
+from protien_food_finder.tools.cached_tool import ToolResultCache
+
+
+JUDGE_PROMPT = """You are grading a grocery recommendation report for a user with these dietary preferences:
+{dietary_preferences}
+
+Score it from 1 to 10 for dietary compliance, completeness of nutrition and price data, and usefulness.
+Reply with the number only.
+
+REPORT:
+{report}"""
+
+
+class IterationResult(BaseModel):
+    """Outcome of one evaluation iteration."""
+    iteration: int = Field(description="Iteration number (1-based)")
+    policy: Optional[str] = Field(default=None, description="Model routing policy the iteration ran with")
+    status: str = Field(default="success", description="success or error")
+    error: Optional[str] = Field(default=None, description="Error message if the iteration failed")
+    latency_seconds: float = Field(default=0.0, description="Wall time of the iteration")
+    total_tokens: int = Field(default=0, description="Tokens used across every crew in the iteration")
+    prompt_tokens: int = Field(default=0, description="Prompt tokens")
+    completion_tokens: int = Field(default=0, description="Completion tokens")
+    cost_usd: float = Field(default=0.0, description="Estimated model cost from per-model token usage")
+    escalations: int = Field(default=0, description="Tasks retried on the fallback model")
+    stores: int = Field(default=0, description="Stores searched")
+    stores_covered: int = Field(default=0, description="Stores with enough validated products for the report")
+    plan_meets_target: bool = Field(default=False, description="Whether the shopping plan reached the protein target")
+    section_score: float = Field(default=0.0, description="Share of required report sections present (0-1)")
+    local_score: float = Field(default=0.0, description="Deterministic score (0-10)")
+    judge_score: Optional[float] = Field(default=None, description="LLM judge score (1-10), if an eval LLM is set")
+    report_file: Optional[str] = Field(default=None, description="Recommendation report written by the iteration")
+
+    @property
+    def score(self) -> float:
+        scores = [self.local_score] + ([self.judge_score] if self.judge_score is not None else [])
+        return sum(scores) / len(scores)
+
+
+def missing_sections(report: str) -> List[str]:
+    return [heading for heading in REQUIRED_SECTIONS
+            if not re.search(rf"^#+\s*{re.escape(heading)}", report, re.M | re.I)]
+
+
+def section_score(report: str) -> float:
+    return 1 - len(missing_sections(report)) / len(REQUIRED_SECTIONS)
+
+
+def local_score(result: IterationResult) -> float:
+    """Weighted 0-10 score: report structure, store coverage and shopping plan"""
+    coverage = result.stores_covered / result.stores if result.stores else 0.0
+    return round(10 * (0.5 * result.section_score + 0.375 * coverage + 0.125 * result.plan_meets_target), 2)
+
+
+class EvaluationRunner:
+    """
+    Runs `iterations` independent crew runs concurrently (at most `max_workers`
+    at a time) with one shared search/scrape cache, then writes a comparison
+    report with per-iteration score, latency and token usage.
+
+    With `offline=True` the tools only replay results recorded in
+    `fixture_path` (record them with `record=True`). `rescore()` re-grades
+    reports from an earlier evaluation without running anything.
+    `routing_policy` overrides the settings.yaml model routing policy.
+    """
+
+    def __init__(self, inputs: Dict[str, str], iterations: int, max_workers: int = 3,
+                 eval_llm: Optional[str] = None, fixture_path: str = 'fixtures/tool_results.json',
+                 offline: bool = False, record: bool = False, output_dir: str = 'output/evaluation',
+                 routing_policy: Optional[str] = None):
+        self.inputs = inputs
+        self.routing_policy = routing_policy
+        self.iterations = iterations
+        self.max_workers = max_workers
+        self.eval_llm = eval_llm
+        self.output_dir = output_dir
+        self.record = record
+        self.tool_cache = ToolResultCache(fixture_path, offline=offline)
+
+    def _judge(self, report: str) -> Optional[float]:
+        if not self.eval_llm or not report:
+            return None
+        from crewai import LLM  # pyright: ignore[reportMissingImports]
+
+        reply = LLM(model=self.eval_llm, temperature=0).call([{
+            "role": "user",
+            "content": JUDGE_PROMPT.format(dietary_preferences=self.inputs['dietary_preferences'], report=report),
+        }])
+        match = re.search(r'\d+(?:\.\d+)?', str(reply))
+        return min(10.0, float(match.group())) if match else None
+
+    def _run_iteration(self, iteration: int) -> IterationResult:
+        finder = ProtienFoodFinder(tool_cache=self.tool_cache, routing_policy=self.routing_policy)
+        finder.output_file = os.path.join(self.output_dir, f"iteration_{iteration}.md")
+        # Every iteration must exercise the store searches being evaluated
+        finder.settings.setdefault('candidate_search', {})['max_age_hours'] = 0
+
+        started = time.perf_counter()
+        if finder.settings['agent_behavior'].get('parallel_execution', False):
+            finder.run_streaming(self.inputs['location'], self.inputs['dietary_preferences'])
+        else:
+            result = finder.build_dynamic_crew(self.inputs['location'], self.inputs['dietary_preferences']).kickoff(
+                inputs=self.inputs)
+            finder.record_usage(result)
+        latency = time.perf_counter() - started
+
+        top_items = finder.settings.get('report', {}).get('top_items_per_store', 3)
+        validated = finder.validated_store_products()
+        usage_by_model = finder.router.usage_by_model()
+        if not usage_by_model:
+            # LLM objects without per-instance usage: price the whole run at the default model
+            usage_by_model = {finder.router.route('default')['model']: finder.token_usage}
+        result = IterationResult(
+            iteration=iteration,
+            policy=finder.router.policy,
+            latency_seconds=round(latency, 1),
+            total_tokens=finder.token_usage.get('total_tokens', 0),
+            prompt_tokens=finder.token_usage.get('prompt_tokens', 0),
+            completion_tokens=finder.token_usage.get('completion_tokens', 0),
+            cost_usd=finder.router.cost(usage_by_model),
+            escalations=len(finder.router.escalations),
+            stores=len(finder.collectors),
+            stores_covered=sum(
+                1 for store in finder.collectors if sum(p.store == store for p in validated) >= top_items
+            ),
+            plan_meets_target=bool(finder.shopping_plan and finder.shopping_plan.meets_protein_target),
+            report_file=finder.output_file,
+        )
+        return self._score(result)
+
+    def _score(self, result: IterationResult) -> IterationResult:
+        report = ""
+        if result.report_file and os.path.exists(result.report_file):
+            with open(result.report_file, 'r') as f:
+                report = f.read()
+        result.section_score = section_score(report)
+        result.local_score = local_score(result)
+        result.judge_score = self._judge(report)
+        return result
+
+    def run(self) -> List[IterationResult]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        print(f"\n🧪 Evaluating {self.iterations} iterations, {self.max_workers} at a time"
+              f"{' (offline fixtures)' if self.tool_cache.offline else ''}...")
+
+        started = time.perf_counter()
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._run_iteration, i): i for i in range(1, self.iterations + 1)}
+            for future in as_completed(futures):
+                iteration = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = IterationResult(iteration=iteration, status="error", error=str(e))
+                print(f"   - iteration {iteration}: {result.status}, score {result.score:.1f}, "
+                      f"{result.latency_seconds:.1f}s, {result.total_tokens} tokens")
+                results.append(result)
+        wall_time = time.perf_counter() - started
+
+        if self.record:
+            self.tool_cache.save()
+        results.sort(key=lambda r: r.iteration)
+        self.write_report(results, wall_time)
+        return results
+
+    def rescore(self) -> List[IterationResult]:
+        """Re-grade the reports of the last evaluation in output_dir - no crew runs, no tools"""
+        with open(os.path.join(self.output_dir, 'results.json'), 'r') as f:
+            results = [IterationResult(**r) for r in json.load(f)['iterations']]
+        results = [self._score(r) if r.status == "success" else r for r in results]
+        self.write_report(results, wall_time=None)
+        return results
+
+    def write_report(self, results: List[IterationResult], wall_time: Optional[float]) -> str:
+        """Write results.json and a markdown comparison report; returns the report path"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, 'results.json'), 'w') as f:
+            json.dump({'wall_time_seconds': wall_time, 'iterations': [r.model_dump() for r in results]}, f, indent=2)
+
+        ok = [r for r in results if r.status == "success"]
+        lines = [
+            "# Evaluation Report",
+            "",
+            f"**Location:** {self.inputs['location']}  ",
+            f"**Iterations:** {len(results)} ({len(ok)} succeeded)  ",
+            f"**Tool cache:** {self.tool_cache.hits} hits / {self.tool_cache.misses} misses  ",
+            f"**Routing policy:** {self.routing_policy or 'from settings.yaml'}",
+        ]
+        if wall_time is not None and ok:
+            sequential = sum(r.latency_seconds for r in ok)
+            lines.append(f"**Wall time:** {wall_time:.1f}s (sum of iterations {sequential:.1f}s, "
+                         f"{sequential / wall_time:.1f}x from concurrency)")
+
+        lines += [
+            "",
+            "| Iteration | Status | Score | Local | Judge | Latency (s) | Tokens | Cost ($) | Escalations | Stores covered | Sections |",
+            "|---|---|---|---|---|---|---|---|---|---|---|",
+        ]
+        for r in results:
+            judge = f"{r.judge_score:.1f}" if r.judge_score is not None else "-"
+            lines.append(f"| {r.iteration} | {r.status} | {r.score:.1f} | {r.local_score:.1f} | {judge} | "
+                         f"{r.latency_seconds:.1f} | {r.total_tokens} | {r.cost_usd:.4f} | {r.escalations} | "
+                         f"{r.stores_covered}/{r.stores} | "
+                         f"{r.section_score:.0%} |")
+
+        if ok:
+            lines += ["", "## Summary", ""]
+            for label, values in (("Score", [r.score for r in ok]),
+                                  ("Latency (s)", [r.latency_seconds for r in ok]),
+                                  ("Tokens", [r.total_tokens for r in ok]),
+                                  ("Cost ($)", [r.cost_usd for r in ok])):
+                precision = 4 if label.startswith("Cost") else 1
+                lines.append(f"- **{label}:** mean {statistics.mean(values):.{precision}f}, "
+                             f"min {min(values):.{precision}f}, max {max(values):.{precision}f}")
+        errors = [r for r in results if r.status != "success"]
+        if errors:
+            lines += ["", "## Errors", ""] + [f"- Iteration {r.iteration}: {r.error}" for r in errors]
+
+        path = os.path.join(self.output_dir, 'evaluation_report.md')
+        with open(path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"\n📊 Evaluation report written to {path}")
+        return path
+
+
+def compare_policies(results: Dict[str, List[IterationResult]], output_dir: str = 'output/evaluation') -> str:
+    """Write a side-by-side latency/cost/score table for several routing policies; returns the path"""
+    lines = [
+        "# Routing Policy Comparison",
+        "",
+        "| Policy | Iterations | Mean score | Mean latency (s) | Mean tokens | Mean cost ($) | Escalations |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for policy, policy_results in results.items():
+        ok = [r for r in policy_results if r.status == "success"]
+        if not ok:
+            lines.append(f"| {policy} | 0/{len(policy_results)} | - | - | - | - | - |")
+            continue
+        lines.append(
+            f"| {policy} | {len(ok)}/{len(policy_results)} | {statistics.mean(r.score for r in ok):.1f} | "
+            f"{statistics.mean(r.latency_seconds for r in ok):.1f} | "
+            f"{statistics.mean(r.total_tokens for r in ok):.0f} | "
+            f"{statistics.mean(r.cost_usd for r in ok):.4f} | {sum(r.escalations for r in ok)} |"
+        )
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, 'policy_comparison.md')
+    with open(path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"\n📊 Routing policy comparison written to {path}")
+    return path
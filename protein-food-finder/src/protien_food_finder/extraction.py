@@ -0,0 +1,212 @@
+"""Deterministic nutrition extraction from product pages (schema.org JSON-LD and nutrition-facts panels)."""
+import json
+import re
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+from bs4 import BeautifulSoup
+
+
+# schema.org NutritionInformation property -> ProteinProduct field
+JSON_LD_FIELDS = {
+    'proteinContent': 'protein_grams',
+    'sugarContent': 'sugar_g',
+    'calories': 'calories',
+    'fatContent': 'total_fat_g',
+    'carbohydrateContent': 'carbs_g',
+    'fiberContent': 'fiber_g',
+    'servingSize': 'serving_size',
+}
+
+# Nutrition-facts panel label -> ProteinProduct field (first match wins)
+PANEL_PATTERNS = {
+    'protein_grams': r'\bProtein\s*:?\s*(\d+(?:\.\d+)?)\s*g',
+    'sugar_g': r'\b(?:Total\s+)?Sugars?\s*:?\s*(\d+(?:\.\d+)?)\s*g',
+    'calories': r'\bCalories\s*:?\s*(\d+)',
+    'total_fat_g': r'\bTotal\s+Fat\s*:?\s*(\d+(?:\.\d+)?)\s*g',
+    'carbs_g': r'\bTotal\s+Carbohydrates?\s*:?\s*(\d+(?:\.\d+)?)\s*g',
+    'fiber_g': r'\bDietary\s+Fiber\s*:?\s*(\d+(?:\.\d+)?)\s*g',
+    'serving_size': r'\bServing\s+Size\s*:?\s*([^\n]{1,40}?)(?:\n|Servings|Amount|Calories|$)',
+}
+
+PANEL_MARKERS = re.compile(r'Nutrition\s+Facts|Nutrition\s+Information|Supplement\s+Facts', re.I)
+
+PRICE_PATTERN = re.compile(r'[$£€]\s?\d+(?:[.,]\d{2})?')
+
+
+def _number(value: Any) -> Optional[float]:
+    """'25 g', '25g', '120 calories', 25 -> float"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r'\d+(?:\.\d+)?', str(value or ''))
+    return float(match.group()) if match else None
+
+
+def _normalize(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert raw extracted strings to ProteinProduct field types"""
+    result = {}
+    for field, value in fields.items():
+        if value is None:
+            continue
+        if field in ('product_name', 'serving_size'):
+            result[field] = str(value).strip()
+            continue
+        number = _number(value)
+        if number is None:
+            continue
+        result[field] = int(round(number)) if field in ('protein_grams', 'calories') else number
+    return result
+
+
+def _walk(node: Any) -> Iterator[Dict]:
+    """Yield every JSON-LD object, descending into @graph, lists and nested values"""
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+    elif isinstance(node, dict):
+        yield node
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                yield from _walk(value)
+
+
+def _types(node: Dict) -> set:
+    types = node.get('@type', [])
+    return set(types if isinstance(types, list) else [types])
+
+
+def extract_from_json_ld(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
+    product_name = None
+    price = None
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except (json.JSONDecodeError, TypeError):
+            continue
+
+        for node in _walk(data):
+            types = _types(node)
+            if types & {'Product', 'Recipe', 'MenuItem'}:
+                product_name = product_name or node.get('name')
+                offers = node.get('offers')
+                offers = offers[0] if isinstance(offers, list) and offers else offers
+                if isinstance(offers, dict) and price is None:
+                    price = offers.get('price') or offers.get('lowPrice')
+
+            nutrition = node if 'NutritionInformation' in types else node.get('nutrition')
+            if isinstance(nutrition, dict) and nutrition.get('proteinContent') is not None:
+                fields = {field: nutrition.get(key) for key, field in JSON_LD_FIELDS.items()}
+                fields.update(product_name=product_name or node.get('name'), price=price)
+                return _normalize(fields)
+    return None
+
+
+def extract_from_panel(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a nutrition-facts panel out of the page text"""
+    marker = PANEL_MARKERS.search(text)
+    if not marker:
+        return None
+    panel = text[marker.start():marker.start() + 2000]
+
+    fields = {}
+    for field, pattern in PANEL_PATTERNS.items():
+        match = re.search(pattern, panel, re.I)
+        if match:
+            fields[field] = match.group(1)
+    fields = _normalize(fields)
+    return fields if 'protein_grams' in fields else None
+
+
+def nutrition_snippet(text: str, radius: int = 600) -> Optional[str]:
+    """The part of the page around the nutrition panel (None if the page has no panel marker)"""
+    match = PANEL_MARKERS.search(text)
+    if not match:
+        return None
+    start = max(0, match.start() - radius // 3)
+    return text[start:match.start() + radius]
+
+
+def page_price(text: str) -> Optional[str]:
+    """The first price shown on the page ('$4.99'), for pages whose structured data has none"""
+    match = PRICE_PATTERN.search(text)
+    return match.group().replace(' ', '') if match else None
+
+
+def page_text(soup: BeautifulSoup) -> str:
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    text = re.sub(r'[ \t]+', ' ', soup.get_text("\n"))
+    return re.sub(r'\s*\n\s*', '\n', text).strip()
+
+
+class ExtractionStats:
+    """
+    How many product pages were parsed locally versus handed to the LLM.
+    Pages without a nutrition panel (listings, search results) are counted
+    separately as 'full_page' and are not product pages.
+    """
+
+    def __init__(self):
+        self.counts = {'json_ld': 0, 'panel': 0, 'snippet': 0, 'full_page': 0}
+        self._lock = threading.Lock()
+
+    def record(self, method: str):
+        with self._lock:
+            self.counts[method] += 1
+
+    @property
+    def total(self) -> int:
+        """Product pages: pages with structured nutrition data or a nutrition panel"""
+        return self.counts['json_ld'] + self.counts['panel'] + self.counts['snippet']
+
+    @property
+    def local_share(self) -> float:
+        return (self.counts['json_ld'] + self.counts['panel']) / self.total if self.total else 0.0
+
+    def summary(self) -> str:
+        c = self.counts
+        return (f"{self.local_share:.0%} of {self.total} product pages extracted without the LLM "
+                f"({c['json_ld']} JSON-LD, {c['panel']} nutrition panel); "
+                f"{c['snippet']} trimmed snippets sent to the LLM; "
+                f"{c['full_page']} other pages (no nutrition panel) sent as page text")
+
+
+def extract_page(html: str, stats: Optional[ExtractionStats] = None, max_chars: int = 8000) -> str:
+    """
+    Turn a product page into the smallest text the agent needs: locally
+    parsed nutrition facts (with the page title and price) when possible,
+    otherwise the nutrition-panel snippet, otherwise the (truncated) page
+    text - listing pages without a panel keep all their products.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    method = 'json_ld'
+    fields = extract_from_json_ld(soup)
+    text = page_text(soup)
+    if fields is None:
+        method = 'panel'
+        fields = extract_from_panel(text)
+
+    if fields is not None:
+        if stats:
+            stats.record(method)
+        if fields.get('product_name') is None:
+            fields['product_name'] = title
+        if fields.get('price') is None:
+            fields['price'] = page_price(text)
+        facts = ", ".join(f"{k}={v}" for k, v in fields.items() if v is not None)
+        return (f"PAGE: {title or 'untitled'}\n"
+                f"NUTRITION FACTS (parsed from the page's {'structured data' if method == 'json_ld' else 'nutrition panel'}, "
+                f"verified - use as-is): {facts}")
+
+    snippet = nutrition_snippet(text)
+    if snippet:
+        if stats:
+            stats.record('snippet')
+        price = page_price(text)
+        return (f"PAGE: {title or 'untitled'}\n" + (f"PRICE: {price}\n" if price else "")
+                + f"NUTRITION PANEL EXCERPT:\n{snippet}")
+
+    if stats:
+        stats.record('full_page')
+    return text[:max_chars]
@@ -0,0 +1,155 @@
+"""Pooled page fetcher with per-host limits and ETag/Last-Modified revalidation against a local store."""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class FetchResult:
+    """A fetched page plus how it was obtained."""
+
+    def __init__(self, url: str, text: str, status: int, source: str, elapsed: float, bytes_downloaded: int):
+        self.url = url
+        self.text = text
+        self.status = status
+        self.source = source  # 'network', 'revalidated' (304) or 'fresh' (served from the store)
+        self.elapsed = elapsed
+        self.bytes_downloaded = bytes_downloaded
+
+
+class PageFetcher:
+    """
+    Fetches pages through one pooled HTTP session shared by every agent.
+
+    - Connections are kept alive per host (requests/urllib3 pools)
+    - At most `max_per_host` requests run concurrently against one host
+    - Bodies are stored gzip-compressed on disk with their ETag/Last-Modified;
+      a page younger than `max_age` is served without any request, an older
+      one is revalidated with a conditional GET (304 = no body downloaded)
+    """
+
+    def __init__(self, cache_dir: str = 'page_cache', max_per_host: int = 4, pool_size: int = 20,
+                 max_age: float = 600, timeout: float = 15):
+        self.cache_dir = cache_dir
+        self.max_per_host = max_per_host
+        self.max_age = max_age
+        self.timeout = timeout
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max_per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (compatible; protien-food-finder)',
+            'Accept-Encoding': 'gzip, deflate',
+        })
+
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'network': 0, 'revalidated': 0, 'fresh': 0,
+                      'bytes_downloaded': 0, 'fetch_seconds': 0.0}
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'PageFetcher':
+        fetcher_settings = settings.get('fetcher', {})
+        return cls(
+            cache_dir=fetcher_settings.get('cache_directory', 'page_cache'),
+            max_per_host=fetcher_settings.get('max_connections_per_host', 4),
+            max_age=fetcher_settings.get('max_age_seconds', 600),
+            timeout=fetcher_settings.get('timeout_seconds', 15),
+        )
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def _paths(self, url: str):
+        digest = hashlib.sha256(url.encode()).hexdigest()[:32]
+        base = os.path.join(self.cache_dir, digest)
+        return base + '.json', base + '.html.gz'
+
+    def _load(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rt', encoding='utf-8') as f:
+                meta['text'] = f.read()
+            return meta
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return None
+
+    def _store(self, url: str, text: str, headers, fetched_at: float):
+        meta_path, body_path = self._paths(url)
+        with gzip.open(body_path + '.tmp', 'wt', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(body_path + '.tmp', body_path)
+        self._touch(url, {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': fetched_at,
+        })
+
+    def _touch(self, url: str, meta: Dict):
+        meta_path, _ = self._paths(url)
+        meta = {k: v for k, v in meta.items() if k != 'text'}
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def _record(self, result: FetchResult):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats[result.source] += 1
+            self.stats['bytes_downloaded'] += result.bytes_downloaded
+            self.stats['fetch_seconds'] += result.elapsed
+
+    def fetch(self, url: str) -> FetchResult:
+        started = time.perf_counter()
+        stored = self._load(url)
+        if stored and time.time() - stored['fetched_at'] < self.max_age:
+            result = FetchResult(url, stored['text'], 200, 'fresh', time.perf_counter() - started, 0)
+            self._record(result)
+            return result
+
+        headers = {}
+        if stored:
+            if stored.get('etag'):
+                headers['If-None-Match'] = stored['etag']
+            if stored.get('last_modified'):
+                headers['If-Modified-Since'] = stored['last_modified']
+
+        with self._host_limit(url):
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        # Bytes on the wire (compressed), not the decoded body size
+        downloaded = int(response.headers.get('Content-Length') or len(response.content))
+
+        if response.status_code == 304 and stored:
+            stored['fetched_at'] = time.time()
+            self._touch(url, stored)
+            result = FetchResult(url, stored['text'], 200, 'revalidated', time.perf_counter() - started, 0)
+        else:
+            response.raise_for_status()
+            self._store(url, response.text, response.headers, time.time())
+            result = FetchResult(url, response.text, response.status_code, 'network',
+                                 time.perf_counter() - started, downloaded)
+        self._record(result)
+        return result
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['requests']} page fetches: {s['network']} downloaded, {s['revalidated']} revalidated (304), "
+                f"{s['fresh']} served from store; {s['bytes_downloaded'] / 1024:.0f} KB downloaded "
+                f"in {s['fetch_seconds']:.1f}s")
@@ -0,0 +1,269 @@
+"""Columnar price/nutrition history for ProteinProduct observations across runs."""
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from protien_food_finder.structured_outputs import ProteinProduct
+
+
+# One flat binary file per column. Rows are appended in place and read back
+# with np.memmap, so scans never load more than the pages they touch.
+COLUMNS = {
+    'timestamp': np.int64,
+    'product_id': np.int32,
+    'store_id': np.int32,
+    'category_id': np.int32,
+    'protein_grams': np.float32,
+    'price': np.float32,
+    'calories': np.float32,
+    'sugar_g': np.float32,
+}
+
+SECONDS_PER_DAY = 86400
+
+
+def _key(name: str) -> str:
+    """Normalize a product/store/category name for dictionary lookups."""
+    return " ".join(name.lower().split())
+
+
+def product_key(store: str, product_name: str) -> str:
+    """Identity of a product: the same name at two stores is two products."""
+    return f"{_key(store)}\x1f{_key(product_name)}"
+
+
+def _float_or_nan(value: Optional[float]) -> float:
+    return float(value) if value is not None else np.nan
+
+
+class PriceHistory:
+    """
+    Append-only, memory-mappable history of product observations.
+
+    Strings (product, store, category) are interned into a small JSON
+    dictionary; products are keyed by store plus name. Everything else lives
+    in fixed-width numeric columns under `directory`. Missing numbers are
+    stored as NaN.
+
+    An append writes every column and then commits the new row count to
+    `rows.json`; bytes past the committed count (left by a crash mid-append)
+    are truncated before the next append, so the columns never drift apart.
+    """
+
+    def __init__(self, directory: str = 'history'):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._dictionary_path = os.path.join(self.directory, 'dictionary.json')
+        self._rows_path = os.path.join(self.directory, 'rows.json')
+        self._dictionary = self._load_dictionary()
+        self._index = {
+            kind: {_key(name): i for i, name in enumerate(names)}
+            for kind, names in self._dictionary.items() if kind != 'product_stores'
+        }
+        self._index['products'] = {
+            product_key(store, name): i
+            for i, (name, store) in enumerate(zip(self._dictionary['products'], self._dictionary['product_stores']))
+        }
+
+    def _load_dictionary(self) -> Dict[str, List[str]]:
+        try:
+            with open(self._dictionary_path, 'r') as f:
+                dictionary = json.load(f)
+        except FileNotFoundError:
+            dictionary = {'products': [], 'stores': [], 'categories': []}
+        # Histories written before products were keyed by store have no product_stores
+        stores = dictionary.setdefault('product_stores', [])
+        stores.extend([''] * (len(dictionary['products']) - len(stores)))
+        return dictionary
+
+    def _save_dictionary(self):
+        tmp_path = self._dictionary_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._dictionary, f)
+        os.replace(tmp_path, self._dictionary_path)
+
+    def _intern(self, kind: str, name: str) -> int:
+        key = _key(name)
+        if key not in self._index[kind]:
+            self._index[kind][key] = len(self._dictionary[kind])
+            self._dictionary[kind].append(name.strip())
+        return self._index[kind][key]
+
+    def _intern_product(self, store: str, name: str) -> int:
+        key = product_key(store, name)
+        if key not in self._index['products']:
+            self._index['products'][key] = len(self._dictionary['products'])
+            self._dictionary['products'].append(name.strip())
+            self._dictionary['product_stores'].append(store.strip())
+        return self._index['products'][key]
+
+    def _lookup(self, kind: str, name: str) -> Optional[int]:
+        return self._index[kind].get(_key(name))
+
+    def _product_ids(self, product_name: str, store: Optional[str] = None) -> List[int]:
+        """Ids of a product name - at one store, or at every store that sold it"""
+        name = _key(product_name)
+        return [i for i, (candidate, candidate_store) in
+                enumerate(zip(self._dictionary['products'], self._dictionary['product_stores']))
+                if _key(candidate) == name and (store is None or _key(candidate_store) == _key(store))]
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self.directory, f"{column}.bin")
+
+    def _column_rows(self) -> List[int]:
+        rows = []
+        for column, dtype in COLUMNS.items():
+            path = self._column_path(column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            rows.append(size // np.dtype(dtype).itemsize)
+        return rows
+
+    def __len__(self) -> int:
+        """Committed rows (older histories without rows.json: rows present in every column)"""
+        complete = min(self._column_rows())
+        try:
+            with open(self._rows_path, 'r') as f:
+                return min(json.load(f)['rows'], complete)
+        except FileNotFoundError:
+            return complete
+
+    def _commit_rows(self, rows: int):
+        tmp_path = self._rows_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'rows': rows}, f)
+        os.replace(tmp_path, self._rows_path)
+
+    def _truncate(self, rows: int):
+        """Drop any partially appended rows so every column ends at `rows`"""
+        for column, dtype in COLUMNS.items():
+            path = self._column_path(column)
+            if os.path.exists(path) and os.path.getsize(path) > rows * np.dtype(dtype).itemsize:
+                os.truncate(path, rows * np.dtype(dtype).itemsize)
+
+    def append(self, products: Iterable[ProteinProduct], timestamp: Optional[float] = None) -> int:
+        """Append one observation per product. Returns the number of rows written."""
+        products = list(products)
+        if not products:
+            return 0
+
+        ts = int(timestamp if timestamp is not None else time.time())
+        dictionary_size = sum(len(names) for names in self._dictionary.values())
+        rows = len(self)
+        self._truncate(rows)
+
+        values = {column: [] for column in COLUMNS}
+        for product in products:
+            values['timestamp'].append(ts)
+            values['product_id'].append(self._intern_product(product.store, product.product_name))
+            values['store_id'].append(self._intern('stores', product.store))
+            values['category_id'].append(self._intern('categories', product.category))
+            values['protein_grams'].append(float(product.protein_grams))
+            values['price'].append(_float_or_nan(product.price))
+            values['calories'].append(_float_or_nan(product.calories))
+            values['sugar_g'].append(_float_or_nan(product.sugar_g))
+
+        # Dictionary first, so every id written to a column is resolvable
+        if sum(len(names) for names in self._dictionary.values()) != dictionary_size:
+            self._save_dictionary()
+
+        for column, dtype in COLUMNS.items():
+            with open(self._column_path(column), 'ab') as f:
+                f.write(np.asarray(values[column], dtype=dtype).tobytes())
+        # The rows only exist once the count is committed
+        self._commit_rows(rows + len(products))
+
+        return len(products)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Memory-map every column, truncated to the number of complete rows."""
+        rows = len(self)
+        mapped = {}
+        for column, dtype in COLUMNS.items():
+            if rows == 0:
+                mapped[column] = np.empty(0, dtype=dtype)
+            else:
+                mapped[column] = np.memmap(self._column_path(column), dtype=dtype, mode='r', shape=(rows,))
+        return mapped
+
+    def _window_mask(self, cols: Dict[str, np.ndarray], store: Optional[str], days: Optional[float],
+                     now: Optional[float]) -> Optional[np.ndarray]:
+        mask = np.ones(len(cols['timestamp']), dtype=bool)
+        if store is not None:
+            store_id = self._lookup('stores', store)
+            if store_id is None:
+                return None
+            mask &= cols['store_id'] == store_id
+        if days is not None:
+            cutoff = int((now if now is not None else time.time()) - days * SECONDS_PER_DAY)
+            mask &= cols['timestamp'] >= cutoff
+        return mask
+
+    def cheapest_protein_per_dollar(self, store: Optional[str] = None, days: Optional[float] = 30,
+                                    limit: int = 10, now: Optional[float] = None) -> List[Dict]:
+        """
+        Best protein-per-dollar value per product over the last `days` days.
+
+        Each product appears once, using its best observation in the window.
+        Results are sorted from best to worst value.
+        """
+        cols = self.columns()
+        mask = self._window_mask(cols, store, days, now)
+        if mask is None:
+            return []
+
+        price = cols['price']
+        mask &= np.isfinite(price) & (price > 0)
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return []
+
+        ratio = cols['protein_grams'][rows] / price[rows]
+        product_ids = cols['product_id'][rows]
+
+        # Sort by product, then best ratio first, and keep each product's first row
+        order = np.lexsort((-ratio, product_ids))
+        _, first = np.unique(product_ids[order], return_index=True)
+        best = order[first]
+        best = best[np.argsort(-ratio[best], kind='stable')][:limit]
+
+        products = self._dictionary['products']
+        stores = self._dictionary['stores']
+        return [
+            {
+                'product_name': products[cols['product_id'][rows[i]]],
+                'store': stores[cols['store_id'][rows[i]]],
+                'protein_grams': float(cols['protein_grams'][rows[i]]),
+                'price': round(float(price[rows[i]]), 2),
+                'protein_per_dollar': round(float(ratio[i]), 2),
+                'observed_at': int(cols['timestamp'][rows[i]]),
+            }
+            for i in best
+        ]
+
+    def price_trend(self, product_name: str, store: Optional[str] = None, days: Optional[float] = 90,
+                    now: Optional[float] = None) -> List[Dict]:
+        """Chronological price observations for one product (at `store`, or at every store)."""
+        product_ids = self._product_ids(product_name, store)
+        if not product_ids:
+            return []
+
+        cols = self.columns()
+        mask = self._window_mask(cols, store, days, now)
+        if mask is None:
+            return []
+        mask &= np.isin(cols['product_id'], product_ids) & np.isfinite(cols['price'])
+        rows = np.flatnonzero(mask)
+        rows = rows[np.argsort(cols['timestamp'][rows], kind='stable')]
+
+        stores = self._dictionary['stores']
+        return [
+            {
+                'store': stores[cols['store_id'][r]],
+                'price': round(float(cols['price'][r]), 2),
+                'observed_at': int(cols['timestamp'][r]),
+            }
+            for r in rows
+        ]
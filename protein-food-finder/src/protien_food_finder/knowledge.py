@@ -0,0 +1,120 @@
+"""Persisted embedding index for the knowledge/ directory, re-embedding only files whose content changed."""
+import glob
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class KnowledgeIndex:
+    """
+    Local vector index over the text files in `source_dir`.
+
+    Each file's chunks and embeddings are stored under its content hash
+    (`<sha256>.json` / `<sha256>.npy`), so a fresh run only embeds files
+    that are new or changed since the last run; everything else is loaded
+    from disk with no embedding calls.
+    """
+
+    def __init__(self, source_dir: str = 'knowledge', index_dir: str = 'knowledge_index',
+                 embedding_model: str = 'text-embedding-3-small', chunk_size: int = 800, chunk_overlap: int = 100):
+        self.source_dir = source_dir
+        self.index_dir = index_dir
+        self.embedding_model = embedding_model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        self.chunks: List[str] = []
+        self.vectors: Optional[np.ndarray] = None
+        self.stats = {'files': 0, 'reused': 0, 'embedded': 0, 'chunks_embedded': 0, 'seconds': 0.0}
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'KnowledgeIndex':
+        knowledge_settings = settings.get('knowledge', {})
+        return cls(
+            source_dir=knowledge_settings.get('source_directory', 'knowledge'),
+            index_dir=knowledge_settings.get('index_directory', 'knowledge_index'),
+            embedding_model=knowledge_settings.get('embedding_model', 'text-embedding-3-small'),
+            chunk_size=knowledge_settings.get('chunk_size', 800),
+            chunk_overlap=knowledge_settings.get('chunk_overlap', 100),
+        )
+
+    def _chunk(self, text: str) -> List[str]:
+        step = max(1, self.chunk_size - self.chunk_overlap)
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), step) if text[i:i + self.chunk_size].strip()]
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        from openai import OpenAI  # pyright: ignore[reportMissingImports]
+
+        response = OpenAI().embeddings.create(model=self.embedding_model, input=texts)
+        vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+        # Normalized once here so search is a plain dot product
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def _paths(self, digest: str):
+        base = os.path.join(self.index_dir, digest)
+        return base + '.json', base + '.npy'
+
+    def sync(self) -> 'KnowledgeIndex':
+        """Load the index, embedding only files whose content hash is not stored yet"""
+        started = time.perf_counter()
+        self.stats = {'files': 0, 'reused': 0, 'embedded': 0, 'chunks_embedded': 0, 'seconds': 0.0}
+        chunks: List[str] = []
+        vectors: List[np.ndarray] = []
+        current = set()
+
+        for path in sorted(glob.glob(os.path.join(self.source_dir, '**', '*.txt'), recursive=True)):
+            with open(path, 'r') as f:
+                text = f.read()
+            # The model is part of the key: switching models must re-embed
+            digest = hashlib.sha256(f"{self.embedding_model}\n{text}".encode()).hexdigest()
+            chunks_path, vectors_path = self._paths(digest)
+            current.update(os.path.basename(p) for p in (chunks_path, vectors_path))
+            self.stats['files'] += 1
+
+            if os.path.exists(chunks_path) and os.path.exists(vectors_path):
+                with open(chunks_path, 'r') as f:
+                    file_chunks = json.load(f)['chunks']
+                file_vectors = np.load(vectors_path)
+                self.stats['reused'] += 1
+            else:
+                file_chunks = self._chunk(text)
+                if not file_chunks:
+                    continue
+                file_vectors = self._embed(file_chunks)
+                np.save(vectors_path, file_vectors)
+                with open(chunks_path, 'w') as f:
+                    json.dump({'source': path, 'chunks': file_chunks}, f)
+                self.stats['embedded'] += 1
+                self.stats['chunks_embedded'] += len(file_chunks)
+
+            chunks.extend(file_chunks)
+            vectors.append(file_vectors)
+
+        # Drop entries for file versions that no longer exist
+        for name in os.listdir(self.index_dir):
+            if name not in current:
+                os.remove(os.path.join(self.index_dir, name))
+
+        self.chunks = chunks
+        self.vectors = np.vstack(vectors) if vectors else None
+        self.stats['seconds'] = time.perf_counter() - started
+        return self
+
+    def search(self, query: str, top_k: int = 3) -> List[str]:
+        """Most relevant chunks for a query (all chunks, unembedded query, if there are few)"""
+        if self.vectors is None:
+            return []
+        if len(self.chunks) <= top_k:
+            return list(self.chunks)
+        scores = self.vectors @ self._embed([query])[0]
+        return [self.chunks[i] for i in np.argsort(-scores)[:top_k]]
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"Knowledge index: {s['files']} files ({s['reused']} reused, {s['embedded']} embedded, "
+                f"{s['chunks_embedded']} chunks) in {s['seconds']:.2f}s")
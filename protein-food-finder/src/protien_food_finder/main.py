@@ -1,12 +1,16 @@
 #!/usr/bin/env python
 import sys
 import os
+import time
 import warnings
 
 from datetime import datetime
 from dotenv import load_dotenv
 
+_import_started = time.perf_counter()
 from protien_food_finder.crew import ProtienFoodFinder
+from protien_food_finder.evaluation import EvaluationRunner, compare_policies
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 # Load environment variables from .env file
 load_dotenv()
@@ -14,13 +18,13 @@ load_dotenv()
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 # Validate required API keys are set
-def validate_api_keys():
+def validate_api_keys(require_serper: bool = True):
     """Validate that required API keys are configured."""
     missing_keys = []
     
     if not os.getenv("GOOGLE_API_KEY"):
         missing_keys.append("GOOGLE_API_KEY")
-    if not os.getenv("SERPER_API_KEY"):
+    if require_serper and not os.getenv("SERPER_API_KEY"):
         missing_keys.append("SERPER_API_KEY")
     
     if missing_keys:
@@ -73,6 +77,8 @@ def run():
 
         # Create crew instance
         crew_instance = ProtienFoodFinder()
+        crew_instance.startup_timings = {'imports': IMPORT_SECONDS, **crew_instance.startup_timings}
+        crew_instance.print_startup_timings()
 
         if use_dynamic:
             # Use dynamic workflow - builds crew based on found stores
@@ -81,16 +87,29 @@ def run():
             print("   - Create one specialist agent per store")
             print("   - Continue even if some stores fail\n")
 
-            # Build and run dynamic crew
-            dynamic_crew = crew_instance.build_dynamic_crew(
-                location=inputs['location'],
-                dietary_preferences=inputs['dietary_preferences']
-            )
-            result = dynamic_crew.kickoff(inputs=inputs)
+            if crew_instance.settings['agent_behavior'].get('parallel_execution', False):
+                # Stream stores through search -> validate -> merge without stage barriers
+                print("   - Store pipelines run in parallel and merge as they finish\n")
+                result = crew_instance.run_streaming(
+                    location=inputs['location'],
+                    dietary_preferences=inputs['dietary_preferences']
+                )
+            else:
+                # Build and run dynamic crew
+                dynamic_crew = crew_instance.build_dynamic_crew(
+                    location=inputs['location'],
+                    dietary_preferences=inputs['dietary_preferences']
+                )
+                result = dynamic_crew.kickoff(inputs=inputs)
         else:
             # Use legacy workflow - static agents
             print("⚙️  Using LEGACY workflow (static agents)\n")
             result = crew_instance.crew().kickoff(inputs=inputs)
+
+        crew_instance.record_history(result)
+        print(f"🌐 {crew_instance.fetcher.summary()}")
+        print(f"🔬 {crew_instance.extraction_stats.summary()}")
+        print(f"🧭 {crew_instance.router.summary()}")
         
         print("\n" + "="*80)
         print("✅ CREW EXECUTION COMPLETED")
@@ -157,13 +176,13 @@ def replay():
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
 
-def test():
+def _evaluation_runner(n_iterations: int, eval_llm: str = None, routing_policy: str = None,
+                       output_dir: str = 'output/evaluation') -> EvaluationRunner:
     """
-    Test the crew execution and returns the results.
+    Build the parallel evaluation runner. Tuned via environment variables:
+    EVAL_MAX_WORKERS (default 3), EVAL_OFFLINE=true to replay recorded tool
+    results only, EVAL_RECORD_FIXTURES=true to record them.
     """
-    # Validate API keys before testing
-    validate_api_keys()
-    
     inputs = {
         'location': 'Belmont, CA 94002',
         'dietary_preferences': '''
@@ -171,9 +190,53 @@ def test():
         - No dietary restrictions
         '''
     }
+    return EvaluationRunner(
+        inputs,
+        iterations=n_iterations,
+        max_workers=int(os.getenv("EVAL_MAX_WORKERS", "3")),
+        eval_llm=eval_llm,
+        offline=os.getenv("EVAL_OFFLINE", "false").lower() == "true",
+        record=os.getenv("EVAL_RECORD_FIXTURES", "false").lower() == "true",
+        output_dir=output_dir,
+        routing_policy=routing_policy,
+    )
+
+def test():
+    """
+    Test the crew execution and returns the results.
+    Iterations run concurrently and share one search/scrape cache; scores,
+    latency and token usage land in output/evaluation/evaluation_report.md.
+    Set EVAL_POLICIES=uniform,tiered to evaluate several model routing
+    policies and compare their latency and cost.
+    """
+    offline = os.getenv("EVAL_OFFLINE", "false").lower() == "true"
+    # Validate API keys before testing (offline runs replay recorded searches)
+    validate_api_keys(require_serper=not offline)
     
     try:
-        ProtienFoodFinder().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        n_iterations = int(sys.argv[1])
+        eval_llm = sys.argv[2] if len(sys.argv) > 2 else None
+        policies = [p.strip() for p in os.getenv("EVAL_POLICIES", "").split(",") if p.strip()]
+        if not policies:
+            return _evaluation_runner(n_iterations, eval_llm=eval_llm).run()
+
+        results = {
+            policy: _evaluation_runner(n_iterations, eval_llm=eval_llm, routing_policy=policy,
+                                       output_dir=os.path.join('output/evaluation', policy)).run()
+            for policy in policies
+        }
+        compare_policies(results)
+        return results
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
+
+def rescore():
+    """
+    Re-grade the reports from the last test() run without running the crew.
+    """
+    try:
+        return _evaluation_runner(0, eval_llm=sys.argv[1] if len(sys.argv) > 1 else None).rescore()
+
+    except Exception as e:
+        raise Exception(f"An error occurred while rescoring the evaluation: {e}")
@@ -0,0 +1,112 @@
+"""Dietary preference profiles applied locally over a shared, preference-agnostic candidate set."""
+import re
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class DietaryProfile(BaseModel):
+    """
+    Hard rules and soft preferences for one user.
+
+    `exclude_keywords` is a substring match on the product name (plus the
+    contains_beef / contains_pork flags), not an ingredient-list check.
+    Preferences the parser has no rule for are kept in `unparsed` and left
+    to the recommender.
+    """
+    name: str = Field(default="default", description="Profile name")
+    min_protein_grams: int = Field(default=20, description="Minimum protein per serving")
+    max_sugar_grams: Optional[float] = Field(default=None, description="Maximum sugar per serving, if any")
+    exclude_keywords: List[str] = Field(default_factory=list, description="Ingredients that disqualify a product")
+    gluten_free: Optional[str] = Field(default=None, description="'required', 'preferred' or None")
+    unparsed: List[str] = Field(default_factory=list,
+                                description="Preference lines no local rule was derived from")
+
+    @classmethod
+    def from_settings(cls, rules: Dict, name: str = "default") -> 'DietaryProfile':
+        """Build a profile from the settings.yaml `dietary_validation` block"""
+        return cls(
+            name=name,
+            min_protein_grams=rules.get('min_protein_grams', 20),
+            max_sugar_grams=rules.get('max_sugar_grams'),
+            exclude_keywords=[k.lower() for k in rules.get('exclude_keywords', [])],
+            gluten_free='preferred' if rules.get('gluten_free') else None,
+        )
+
+    @classmethod
+    def from_text(cls, dietary_preferences: str, name: str = "default",
+                  default_min_protein: int = 20) -> 'DietaryProfile':
+        """
+        Parse the free-form dietary_preferences bullet list used in main.py, e.g.
+        "High protein (20g+ per serving)", "No beef, pork, turkey, or tuna",
+        "Reduced/low sugar (5-10g max)", "Gluten-free preferred".
+        Lines that yield no rule ("Vegetarian", "vegan, nut-free") are kept
+        in `unparsed`; lines that only allow something are ignored.
+        """
+        min_protein = default_min_protein
+        max_sugar = None
+        exclude: List[str] = []
+        gluten_free = None
+        unparsed: List[str] = []
+
+        for raw_line in dietary_preferences.splitlines():
+            line = raw_line.strip(" -*\t").lower()
+            if not line:
+                continue
+
+            parsed = False
+            grams = [float(g) for g in re.findall(r'(\d+(?:\.\d+)?)\s*g\b', line)]
+            if 'protein' in line and grams:
+                min_protein = int(min(grams))
+                parsed = True
+            if 'sugar' in line and grams:
+                max_sugar = max(grams)
+                parsed = True
+
+            if 'gluten' in line and 'free' in line:
+                gluten_free = 'preferred' if 'prefer' in line else 'required'
+                parsed = True
+
+            # "No beef, pork, turkey, or tuna" and "fish (not tuna)"
+            excluded_phrases = re.findall(r'\(not ([^)]+)\)', line)
+            if line.startswith('no ') and 'restriction' not in line:
+                excluded_phrases.append(line[3:])
+            for phrase in excluded_phrases:
+                for word in re.split(r',|\bor\b|\band\b', phrase):
+                    word = word.strip(" .")
+                    if word and word not in exclude:
+                        exclude.append(word)
+                        parsed = True
+
+            permissive = line.endswith('allowed') or 'restriction' in line
+            if not parsed and not permissive:
+                unparsed.append(raw_line.strip(" -*\t"))
+
+        return cls(
+            name=name,
+            min_protein_grams=min_protein,
+            max_sugar_grams=max_sugar,
+            exclude_keywords=exclude,
+            gluten_free=gluten_free,
+            unparsed=unparsed,
+        )
+
+    def unchecked_note(self) -> str:
+        """Prompt text listing the preferences the local filter did not apply (empty if none)"""
+        if not self.unparsed:
+            return ""
+        lines = "\n".join(f"- {line}" for line in self.unparsed)
+        return ("NOT CHECKED BY THE LOCAL FILTER - apply these preferences yourself and drop "
+                f"products that clearly violate them:\n{lines}")
+
+    def describe(self) -> str:
+        parts = [f"{self.min_protein_grams}g+ protein"]
+        if self.max_sugar_grams is not None:
+            parts.append(f"max {self.max_sugar_grams:g}g sugar")
+        if self.exclude_keywords:
+            parts.append(f"no {', '.join(self.exclude_keywords)}")
+        if self.gluten_free:
+            parts.append(f"gluten-free {self.gluten_free}")
+        if self.unparsed:
+            parts.append(f"not filtered locally: {', '.join(self.unparsed)}")
+        return "; ".join(parts)
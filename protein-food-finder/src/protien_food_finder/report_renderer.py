@@ -0,0 +1,136 @@
+"""Renders a RecommendationReport into the fixed markdown layout described in REPORT_FORMAT.md."""
+import os
+import re
+from typing import Dict, List, Optional
+
+from protien_food_finder.structured_outputs import (
+    ProteinProduct,
+    Recommendation,
+    RecommendationReport,
+    ShoppingPlan,
+)
+
+
+# Section headings of every recommendation report, in order
+REQUIRED_SECTIONS = [
+    "Top 3 Items By Store",
+    "Frozen & Shelf-Stable Options",
+    "Most Convenient Options",
+    "Best Value Options",
+    "Shopping Strategy",
+    "Summary",
+]
+
+SHELF_STABLE_KEYWORDS = re.compile(
+    r'frozen|shelf[- ]stable|powder|protein bar|\bbars?\b|shake|canned|jerky|dried|pouch', re.I)
+
+
+def _price(product: ProteinProduct) -> str:
+    return f"${product.price:.2f}" if product.price is not None else "price n/a"
+
+
+def _protein_per_dollar(product: ProteinProduct) -> Optional[float]:
+    if not product.price:
+        return None
+    return product.protein_grams / product.price
+
+
+def _product_line(product: ProteinProduct) -> str:
+    serving = f" ({product.serving_size})" if product.serving_size else ""
+    return f"{product.product_name} - Protein: {product.protein_grams}g per serving{serving}, Price: {_price(product)}"
+
+
+def _unique(products: List[ProteinProduct]) -> List[ProteinProduct]:
+    seen = set()
+    unique = []
+    for product in products:
+        key = (product.store.lower().strip(), product.product_name.lower().strip())
+        if key not in seen:
+            seen.add(key)
+            unique.append(product)
+    return unique
+
+
+def _top_by_store(recommendations: List[Recommendation], per_store: int) -> Dict[str, List[Recommendation]]:
+    by_store: Dict[str, List[Recommendation]] = {}
+    for rec in sorted(recommendations, key=lambda r: r.rank):
+        items = by_store.setdefault(rec.product.store, [])
+        if len(items) < per_store:
+            items.append(rec)
+    return by_store
+
+
+def render_report(report: RecommendationReport, plan: Optional[ShoppingPlan] = None,
+                  top_per_store: int = 3, best_value_count: int = 5) -> str:
+    """
+    Build the markdown report. Tables, headings and numbers are produced
+    here; the LLM only supplies the picks, rationales and summary text.
+    A locally optimized `plan` replaces the report's own shopping strategies.
+    """
+    products = _unique([rec.product for rec in report.top_recommendations] + list(report.most_convenient))
+    lines = [f"# High-Protein Food Recommendations for {report.location}", ""]
+
+    lines += [f"## {REQUIRED_SECTIONS[0]}", ""]
+    for store, recs in _top_by_store(report.top_recommendations, top_per_store).items():
+        lines.append(f"### {store}")
+        lines.extend(f"{i}. {_product_line(rec.product)}, Why: {rec.rationale}" for i, rec in enumerate(recs, 1))
+        lines.append("")
+
+    lines += [f"## {REQUIRED_SECTIONS[1]}", ""]
+    shelf_stable = [p for p in products
+                    if SHELF_STABLE_KEYWORDS.search(" ".join(filter(None, [p.product_name, p.category, p.notes])))]
+    lines.extend(f"- {_product_line(p)} ({p.store})" for p in shelf_stable)
+    if not shelf_stable:
+        lines.append("No frozen or shelf-stable products among the recommendations.")
+    lines.append("")
+
+    lines += [f"## {REQUIRED_SECTIONS[2]}", ""]
+    lines.extend(f"- {_product_line(p)} ({p.store})" + (f" - {p.notes}" if p.notes else "")
+                 for p in report.most_convenient)
+    if not report.most_convenient:
+        lines.append("No ready-to-eat products among the recommendations.")
+    lines.append("")
+
+    lines += [f"## {REQUIRED_SECTIONS[3]}", ""]
+    priced = sorted((p for p in products if _protein_per_dollar(p) is not None),
+                    key=_protein_per_dollar, reverse=True)[:best_value_count]
+    lines.extend(f"{i}. {p.product_name} from {p.store} - {_protein_per_dollar(p):.1f}g protein per dollar"
+                 for i, p in enumerate(priced, 1))
+    if not priced:
+        lines.append("No prices were found for the recommended products.")
+    lines.append("")
+
+    lines += [f"## {REQUIRED_SECTIONS[4]}", ""]
+    strategies = plan.strategies if plan is not None else sorted(report.shopping_strategies, key=lambda s: s.priority)
+    for strategy in strategies:
+        lines.append(f"### Priority {strategy.priority}: {strategy.store_name}")
+        lines.append("**Products to buy:**")
+        lines.extend(f"- {name}" for name in strategy.products_to_buy)
+        if strategy.estimated_cost is not None:
+            lines.append(f"**Estimated cost:** ${strategy.estimated_cost:.2f}")
+        lines.append("")
+    if plan is not None and plan.unpriced_products:
+        lines += [f"**Not planned (no price found):** {', '.join(plan.unpriced_products)}", ""]
+
+    budget = plan.estimated_total_budget if plan is not None else report.estimated_total_budget
+    lines += [
+        f"## {REQUIRED_SECTIONS[5]}",
+        "",
+        f"- **Total protein potential:** {report.total_protein_potential}g",
+        f"- **Estimated budget:** ${budget:.2f}" if budget is not None else "- **Estimated budget:** unknown",
+        f"- **Variety:** {report.variety_score}",
+        "",
+        report.summary,
+    ]
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def write_report(report: RecommendationReport, output_file: str, plan: Optional[ShoppingPlan] = None,
+                 top_per_store: int = 3) -> str:
+    """Render a report to `output_file`; returns the markdown"""
+    markdown = render_report(report, plan=plan, top_per_store=top_per_store)
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    with open(output_file, 'w') as f:
+        f.write(markdown)
+    print(f"📝 Report rendered to {output_file}")
+    return markdown
@@ -0,0 +1,115 @@
+"""Per-role model routing driven by the settings.yaml `llm` block."""
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from crewai import LLM  # pyright: ignore[reportMissingImports]
+
+
+class ModelRouter:
+    """
+    Picks the model, temperature and max_tokens for each agent role from the
+    active routing policy, e.g. a small fast model for store searches and a
+    stronger one for the final recommendation.
+
+    Roles not listed in the policy use `default_model`. When a role's output
+    fails its schema check, `guardrail()` swaps that agent to
+    `fallback_model` once and lets the task retry.
+    """
+
+    def __init__(self, llm_settings: Dict, policy: Optional[str] = None):
+        self.settings = llm_settings
+        self.policy = policy or llm_settings.get('policy', 'uniform')
+        self.routes: Dict[str, Dict] = llm_settings.get('policies', {}).get(self.policy) or {}
+        self.fallback_model = llm_settings.get('fallback_model')
+        self.retries = llm_settings.get('escalation_retries', 1)  # guardrail_max_retries for routed tasks
+        self.prices: Dict[str, Dict[str, float]] = llm_settings.get('prices_per_million_tokens', {})
+        self.escalations: List[str] = []
+        # Every LLM handed out, so token usage can be attributed per model
+        self._llms: List[Tuple[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Dict, policy: Optional[str] = None) -> 'ModelRouter':
+        return cls(settings.get('llm', {}), policy=policy)
+
+    def route(self, role: str) -> Dict[str, Any]:
+        """Model, temperature and max_tokens for a role under the active policy"""
+        route = self.routes.get(role, {})
+        return {
+            'model': route.get('model', self.settings.get('default_model', 'gpt-4o-mini')),
+            'temperature': route.get('temperature', self.settings.get('temperature', 0.7)),
+            'max_tokens': route.get('max_tokens', self.settings.get('max_tokens', 4000)),
+        }
+
+    def _build(self, route: Dict[str, Any]) -> LLM:
+        llm = LLM(**route)
+        with self._lock:
+            self._llms.append((route['model'], llm))
+        return llm
+
+    def llm_for(self, role: str) -> LLM:
+        return self._build(self.route(role))
+
+    def escalate(self, agent, role: str) -> bool:
+        """Move an agent to the fallback model; False if there is nothing bigger to move to"""
+        route = self.route(role)
+        if not self.fallback_model or route['model'] == self.fallback_model:
+            return False
+        route['model'] = self.fallback_model
+        route['max_tokens'] = max(route['max_tokens'], self.settings.get('max_tokens', 4000))
+        agent.llm = self._build(route)
+        with self._lock:
+            self.escalations.append(role)
+        print(f"⬆️  {role}: output failed its schema check, retrying with {self.fallback_model}")
+        return True
+
+    def guardrail(self, agent, role: str, check: Callable[[Any], Optional[str]]) -> Callable:
+        """
+        Task guardrail that escalates to the fallback model on the first
+        failed check. `check` returns an error message or None. After one
+        escalation the output is accepted as-is so a run never fails here.
+        """
+        escalated = []
+
+        def validate(output) -> Tuple[bool, Any]:
+            error = check(output)
+            if error is None or escalated:
+                return True, output
+            escalated.append(True)
+            if not self.escalate(agent, role):
+                return True, output
+            return False, error
+
+        return validate
+
+    def usage_by_model(self) -> Dict[str, Dict[str, int]]:
+        """Prompt/completion tokens per model, from every LLM this router created"""
+        usage: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            llms = list(self._llms)
+        for model, llm in llms:
+            summary = getattr(llm, 'get_token_usage_summary', None)
+            if summary is None:
+                continue
+            metrics = summary()
+            totals = usage.setdefault(model, {'prompt_tokens': 0, 'completion_tokens': 0})
+            totals['prompt_tokens'] += getattr(metrics, 'prompt_tokens', 0) or 0
+            totals['completion_tokens'] += getattr(metrics, 'completion_tokens', 0) or 0
+        return usage
+
+    def cost(self, usage_by_model: Optional[Dict[str, Dict[str, int]]] = None) -> float:
+        """Estimated USD cost from per-model token usage and the settings price table"""
+        usage_by_model = usage_by_model if usage_by_model is not None else self.usage_by_model()
+        total = 0.0
+        for model, usage in usage_by_model.items():
+            price = self.prices.get(model, {})
+            total += usage.get('prompt_tokens', 0) * price.get('input', 0.0) / 1_000_000
+            total += usage.get('completion_tokens', 0) * price.get('output', 0.0) / 1_000_000
+        return round(total, 4)
+
+    def summary(self) -> str:
+        usage = self.usage_by_model()
+        models = ", ".join(f"{model} {u['prompt_tokens'] + u['completion_tokens']} tokens"
+                           for model, u in usage.items()) or "no per-model usage reported"
+        return (f"Routing policy '{self.policy}': {models}; est. ${self.cost(usage):.4f}; "
+                f"{len(self.escalations)} escalations")
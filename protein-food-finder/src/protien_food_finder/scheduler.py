@@ -0,0 +1,269 @@
+"""Streaming store pipeline: per-store search -> validate -> incremental merge, then recommend."""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from crewai import Agent, Crew, Process, Task  # pyright: ignore[reportMissingImports]
+
+from protien_food_finder.candidate_cache import CandidateCache
+from protien_food_finder.preferences import DietaryProfile
+from protien_food_finder.structured_outputs import ProteinProduct, RecommendationReport
+from protien_food_finder.validation import ProductValidator
+
+
+SORT_KEYS = {
+    'protein_per_dollar': lambda p: -(p.protein_grams / p.price) if p.price else 0.0,
+    'protein_grams': lambda p: -p.protein_grams,
+    'price': lambda p: p.price if p.price is not None else float('inf'),
+}
+
+
+class IncrementalRanking:
+    """Per-store ranking that is updated as each store's validated products arrive."""
+
+    def __init__(self, sort_by: str = 'protein_per_dollar', top_per_store: int = 3):
+        self.sort_key = SORT_KEYS.get(sort_by, SORT_KEYS['protein_per_dollar'])
+        self.top_per_store = top_per_store
+        self.by_store: Dict[str, List[ProteinProduct]] = {}
+        self.unstructured: Dict[str, str] = {}
+
+    def add(self, store_name: str, products: List[ProteinProduct]):
+        self.by_store[store_name] = sorted(products, key=self.sort_key)
+
+    def add_unstructured(self, store_name: str, validated_text: str):
+        """Stores whose agent never submitted structured products keep their validated text"""
+        self.unstructured[store_name] = validated_text
+
+    @property
+    def products(self) -> List[ProteinProduct]:
+        return [p for products in self.by_store.values() for p in products]
+
+    def to_markdown(self) -> str:
+        sections = []
+        for store_name, products in self.by_store.items():
+            lines = [f"## {store_name}"]
+            for i, p in enumerate(products, 1):
+                price = f"${p.price:.2f}" if p.price is not None else "price unknown"
+                sugar = f", {p.sugar_g}g sugar" if p.sugar_g is not None else ""
+                marker = " (TOP PICK)" if i <= self.top_per_store else ""
+                lines.append(f"{i}. {p.product_name}{marker} - {p.protein_grams}g protein"
+                             f" ({p.serving_size or 'serving size unknown'}), {price}{sugar}, {p.category}")
+            sections.append("\n".join(lines))
+        for store_name, text in self.unstructured.items():
+            sections.append(f"## {store_name}\n{text}")
+        return "\n\n".join(sections)
+
+
+class StreamingScheduler:
+    """
+    Runs one small pipeline per store instead of one barrier-synchronized crew.
+
+    Each store search runs in its own thread and collects a broad,
+    preference-agnostic candidate set, cached per (store, location). As soon
+    as a store finishes, its candidates are filtered locally for every
+    dietary profile and merged into that profile's ranking, while slower
+    stores are still searching. Total latency is roughly the slowest store
+    plus the final recommendation, and N profiles at one location share a
+    single search.
+    """
+
+    def __init__(self, finder):
+        self.finder = finder
+        self.settings = finder.settings
+        behavior = self.settings.get('agent_behavior', {})
+        self.max_workers = behavior.get('max_parallel_agents', 5)
+        self.report = self.settings.get('report', {})
+        cache_settings = self.settings.get('candidate_search', {})
+        self.cache = CandidateCache(cache_settings.get('cache_directory', 'candidates'),
+                                    cache_settings.get('max_age_hours', 24))
+        self.rankings: Dict[str, IncrementalRanking] = {}
+        self.profiles: Dict[str, DietaryProfile] = {}
+        self.timings: Dict[str, float] = {}
+
+    def _new_ranking(self) -> IncrementalRanking:
+        return IncrementalRanking(self.report.get('sort_by', 'protein_per_dollar'),
+                                  self.report.get('top_items_per_store', 3))
+
+    def _run_store(self, store_name: str, location: str, agent, task: Task,
+                   profiles: Dict[str, str]) -> Dict[str, str]:
+        """
+        Search one store and cache its candidates. Runs in a worker thread.
+        Returns per-profile validated text for a store whose agent never
+        submitted structured products (empty otherwise).
+        """
+        started = time.perf_counter()
+        self.finder.record_usage(
+            Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=True, cache=True).kickoff(
+                inputs={'location': location}))
+
+        validated_text = {}
+        candidates = self.finder.collectors[store_name].products
+        if candidates:
+            self.cache.put(store_name, location, candidates)
+        else:
+            # Nothing structured was submitted - validate this store's text on its own
+            for name, dietary_preferences in profiles.items():
+                validate_task = Task(
+                    description=self.finder.tasks_config['validate_products']['description'],
+                    expected_output=self.finder.tasks_config['validate_products']['expected_output'],
+                    # A fresh agent per thread - the @agent methods return one shared instance
+                    agent=Agent(config=self.finder.agents_config['nutrition_validator'],
+                                llm=self.finder.router.llm_for('nutrition_validator'), verbose=True),
+                    context=[task],
+                )
+                output = Crew(agents=[validate_task.agent], tasks=[validate_task],
+                              process=Process.sequential, verbose=True).kickoff(
+                    inputs={'location': location, 'dietary_preferences': dietary_preferences})
+                self.finder.record_usage(output)
+                validated_text[name] = str(output)
+
+        self.timings[store_name] = time.perf_counter() - started
+        return validated_text
+
+    def _merge(self, store_name: str, validated_text: Dict[str, str], profiles: Dict[str, DietaryProfile]):
+        """Filter one store's shared candidates for every profile and merge them into its ranking"""
+        candidates = self.finder.collectors[store_name].products
+        for name, profile in profiles.items():
+            if name in validated_text:
+                self.rankings[name].add_unstructured(store_name, validated_text[name])
+            else:
+                self.rankings[name].add(store_name, ProductValidator(profile).filter(candidates))
+
+    def collect(self, location: str, profiles: Dict[str, str]) -> bool:
+        """
+        Search every store once (or reuse cached candidates) and stream the
+        results into each profile's ranking. Returns False if no ranking
+        received any products or validated text (e.g. every store failed).
+        """
+        started = time.perf_counter()
+        parsed = {
+            name: DietaryProfile.from_text(text, name=name,
+                                           default_min_protein=self.finder.dietary_profile.min_protein_grams)
+            for name, text in profiles.items()
+        }
+        for name, profile in parsed.items():
+            if profile.unparsed:
+                print(f"⚠️  {name}: no local rule for {', '.join(profile.unparsed)} - left to the recommender")
+        self.profiles = parsed
+        self.rankings = {name: self._new_ranking() for name in profiles}
+
+        find_stores_task_obj, stores = self.finder.find_stores(location)
+        self.timings['find_stores'] = time.perf_counter() - started
+
+        pipelines = []
+        for store_name in stores:
+            cached = self.cache.get(store_name, location)
+            if cached is not None:
+                collector = self.finder.create_product_collector(store_name)
+                collector.products = cached
+                collector.from_cache = True
+                self._merge(store_name, {}, parsed)
+                print(f"♻️  {store_name}: reusing {len(cached)} cached candidates for {location}")
+                continue
+
+            agent = self.finder.create_store_specialist_agent(store_name, location)
+            if not agent:
+                continue
+            task = self.finder.create_store_search_task(store_name, agent, location, find_stores_task_obj)
+            if task:
+                self.finder.dynamic_agents.append(agent)
+                self.finder.dynamic_tasks.append(task)
+                pipelines.append((store_name, agent, task))
+
+        if not pipelines and not self.finder.collectors:
+            return False
+
+        print(f"\n🌊 Streaming {len(pipelines)} store pipelines ({self.max_workers} at a time)...")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._run_store, store_name, location, agent, task, profiles): store_name
+                for store_name, agent, task in pipelines
+            }
+            for future in as_completed(futures):
+                store_name = futures[future]
+                try:
+                    validated_text = future.result()
+                except Exception as e:
+                    print(f"❌ {store_name} pipeline failed: {e}")
+                    if not self.settings['agent_behavior'].get('continue_on_failure', True):
+                        raise
+                    continue
+
+                self._merge(store_name, validated_text, parsed)
+                print(f"✅ {store_name} merged after {self.timings[store_name]:.1f}s "
+                      f"({len(self.finder.collectors[store_name].products)} candidates)")
+
+        self.timings['stores'] = time.perf_counter() - started
+        # Collectors exist for every store that was started, so check what actually arrived
+        return any(ranking.products or ranking.unstructured for ranking in self.rankings.values())
+
+    def recommend(self, location: str, name: str, dietary_preferences: str, output_file: str):
+        """Plan and write recommendations for one profile from its merged ranking"""
+        started = time.perf_counter()
+        ranking = self.rankings[name]
+        self.finder.shopping_plan = self.finder.plan_shopping(ranking.products)
+
+        recommender = Agent(config=self.finder.agents_config['recommendation_specialist'],
+                            llm=self.finder.router.llm_for('recommendation_specialist'), verbose=True)
+        recommend_task = Task(
+            description=self.finder.tasks_config['create_recommendations']['description']
+            + "\n\nVALIDATED PRODUCTS BY STORE:\n{validated_products}"
+            + "\n\nSHOPPING STRATEGY (already optimized - narrate it, do not re-plan):\n{shopping_plan}"
+            + "\n\n{unchecked_preferences}"
+            + self.finder.user_knowledge(dietary_preferences),
+            expected_output=self.finder.tasks_config['create_recommendations']['expected_output'],
+            agent=recommender,
+            output_pydantic=RecommendationReport,
+            callback=lambda output: self.finder.render_recommendations(output, output_file),
+            guardrail=self.finder.recommendation_guardrail(recommender),
+            guardrail_max_retries=self.finder.router.retries,
+        )
+        result = Crew(
+            agents=[recommend_task.agent],
+            tasks=[recommend_task],
+            process=Process.sequential,
+            verbose=True,
+        ).kickoff(inputs={
+            'location': location,
+            'dietary_preferences': dietary_preferences,
+            'validated_products': ranking.to_markdown(),
+            'shopping_plan': self.finder.shopping_plan.to_markdown(),
+            'unchecked_preferences': self.profiles[name].unchecked_note(),
+        })
+        self.finder.record_usage(result)
+        self.timings[f'recommend ({name})'] = time.perf_counter() - started
+        return result
+
+    def run_profiles(self, location: str, profiles: Dict[str, str]) -> Optional[Dict]:
+        """
+        Serve several dietary profiles at one location from a single store search.
+        `profiles` maps a profile name to its dietary_preferences text; the
+        first profile writes the finder's output_file, the others
+        <output_file>_<name>.md.
+        Returns the recommendation crew output per profile, or None if no
+        store produced candidates.
+        """
+        started = time.perf_counter()
+        if not self.collect(location, profiles):
+            return None
+
+        results = {}
+        root, ext = os.path.splitext(self.finder.output_file)
+        for i, (name, dietary_preferences) in enumerate(profiles.items()):
+            output_file = self.finder.output_file if i == 0 else f"{root}_{name}{ext}"
+            results[name] = self.recommend(location, name, dietary_preferences, output_file)
+        self.timings['total'] = time.perf_counter() - started
+
+        print("\n⏱️  Streaming timings:")
+        for stage, seconds in self.timings.items():
+            print(f"   - {stage}: {seconds:.1f}s")
+        return results
+
+    def run(self, location: str, dietary_preferences: str):
+        """
+        Run the full streaming workflow for one profile.
+        Returns the recommendation crew output, or None if no store produced candidates.
+        """
+        results = self.run_profiles(location, {'default': dietary_preferences})
+        return results['default'] if results else None
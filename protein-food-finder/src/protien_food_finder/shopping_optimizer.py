@@ -0,0 +1,130 @@
+"""Local shopping-route optimizer: which stores to visit and what to buy there under a budget."""
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from protien_food_finder.structured_outputs import ProteinProduct, ShoppingPlan, ShoppingStrategy
+
+
+def _key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _cheapest_offers(by_store: Dict[str, List[ProteinProduct]], stores: Iterable[str]) -> List[ProteinProduct]:
+    """The same product sold at several visited stores only needs to be bought once, at the cheapest."""
+    offers: Dict[str, ProteinProduct] = {}
+    for store in stores:
+        for product in by_store[store]:
+            key = _key(product.product_name)
+            if key not in offers or product.price < offers[key].price:
+                offers[key] = product
+    # Cheapest protein first (dollars per gram), larger items win ties
+    return sorted(offers.values(), key=lambda p: (p.price / p.protein_grams, -p.protein_grams))
+
+
+def _fill(offers: List[ProteinProduct], budget: float, protein_target: Optional[int],
+          max_items: Optional[int]) -> Tuple[List[ProteinProduct], bool]:
+    """
+    Greedy knapsack over one store subset.
+
+    Buys the cheapest protein first until the target is reached (or, with no
+    target, until the budget or item limit runs out), then drops any item the
+    target no longer needs, most expensive first.
+    """
+    chosen: List[ProteinProduct] = []
+    spent = 0.0
+    protein = 0
+    for product in offers:
+        if max_items is not None and len(chosen) >= max_items:
+            break
+        if protein_target is not None and protein >= protein_target:
+            break
+        if spent + product.price > budget:
+            continue
+        chosen.append(product)
+        spent += product.price
+        protein += product.protein_grams
+
+    met = protein_target is None or protein >= protein_target
+    if met and protein_target is not None:
+        for product in sorted(chosen, key=lambda p: -p.price):
+            if protein - product.protein_grams >= protein_target:
+                chosen.remove(product)
+                protein -= product.protein_grams
+    return chosen, met
+
+
+def optimize_shopping(products: List[ProteinProduct],
+                      budget: float,
+                      store_visit_cost: float = 0.0,
+                      protein_target: Optional[int] = None,
+                      max_stores: Optional[int] = None,
+                      max_items: Optional[int] = None) -> ShoppingPlan:
+    """
+    Choose which stores to visit and what to buy at each.
+
+    Every visited store adds `store_visit_cost` dollars to the cost of the
+    plan, so a slightly cheaper item is only worth an extra stop when the
+    savings outweigh the visit. Store subsets are enumerated exhaustively
+    (store lists are small); within a subset items are chosen greedily by
+    price per gram of protein.
+
+    With a `protein_target`, the cheapest plan reaching it wins. Plans that
+    cannot reach it are ranked by protein, so the result degrades to
+    "most protein for the budget".
+    """
+    priced = [p for p in products if p.price and p.price > 0 and p.protein_grams > 0]
+    unpriced = sorted({p.product_name for p in products if not (p.price and p.price > 0)})
+
+    by_store: Dict[str, List[ProteinProduct]] = {}
+    for product in priced:
+        by_store.setdefault(product.store, []).append(product)
+    stores = sorted(by_store)
+
+    best_score = None
+    best_choice: List[ProteinProduct] = []
+    best_met = protein_target is None
+    max_subset = min(len(stores), max_stores) if max_stores else len(stores)
+
+    for size in range(1, max_subset + 1):
+        visit_cost = store_visit_cost * size
+        if visit_cost >= budget:
+            break
+        for subset in combinations(stores, size):
+            chosen, met = _fill(_cheapest_offers(by_store, subset), budget - visit_cost, protein_target, max_items)
+            # A store nothing is bought at is a wasted visit - a smaller subset covers this plan
+            if not chosen or len({p.store for p in chosen}) < size:
+                continue
+
+            cost = sum(p.price for p in chosen) + visit_cost
+            protein = sum(p.protein_grams for p in chosen)
+            if protein_target is not None and met:
+                score = (1, -cost, protein)
+            else:
+                score = (0, protein, -cost)
+            if best_score is None or score > best_score:
+                best_score, best_choice, best_met = score, chosen, met
+
+    # Visit the store with the biggest haul first
+    planned: Dict[str, List[ProteinProduct]] = {}
+    for product in best_choice:
+        planned.setdefault(product.store, []).append(product)
+    ordered = sorted(planned.items(), key=lambda item: (-sum(p.protein_grams for p in item[1]), item[0]))
+
+    strategies = [
+        ShoppingStrategy(
+            store_name=store,
+            products_to_buy=[p.product_name for p in items],
+            estimated_cost=round(sum(p.price for p in items), 2),
+            priority=priority,
+        )
+        for priority, (store, items) in enumerate(ordered, 1)
+    ]
+
+    return ShoppingPlan(
+        strategies=strategies,
+        estimated_total_budget=round(sum(p.price for p in best_choice), 2),
+        total_protein=sum(p.protein_grams for p in best_choice),
+        store_visit_cost=store_visit_cost,
+        meets_protein_target=best_met,
+        unpriced_products=unpriced,
+    )
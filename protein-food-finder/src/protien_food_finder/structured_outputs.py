@@ -92,3 +92,27 @@ class RecommendationReport(BaseModel):
     estimated_total_budget: Optional[float] = Field(default=None, description="Estimated budget for all recommendations")
     variety_score: str = Field(description="Assessment of protein source variety (e.g., 'Excellent', 'Good', 'Fair')")
     summary: str = Field(description="Overall summary and key takeaways")
+
+
+class ShoppingPlan(BaseModel):
+    """Locally optimized shopping plan produced by shopping_optimizer."""
+    strategies: List[ShoppingStrategy] = Field(description="Stores to visit, in priority order, with what to buy")
+    estimated_total_budget: float = Field(description="Total cost of all products in the plan")
+    total_protein: int = Field(description="Total protein grams (per serving) across all planned products")
+    store_visit_cost: float = Field(default=0.0, description="Dollar-equivalent cost charged for each store visit")
+    meets_protein_target: bool = Field(default=True, description="Whether the plan reaches the protein target")
+    unpriced_products: List[str] = Field(default_factory=list, description="Products left out because they have no price")
+
+    def to_markdown(self) -> str:
+        """Render the plan as a compact markdown block for the recommendation prompt."""
+        lines = []
+        for strategy in self.strategies:
+            lines.append(f"### Priority {strategy.priority}: {strategy.store_name} (${strategy.estimated_cost:.2f})")
+            lines.extend(f"- {name}" for name in strategy.products_to_buy)
+        lines.append(f"\n**Estimated total:** ${self.estimated_total_budget:.2f} "
+                     f"for {self.total_protein}g protein across {len(self.strategies)} store(s)")
+        if not self.meets_protein_target:
+            lines.append("**Note:** the protein target could not be reached within the budget")
+        if self.unpriced_products:
+            lines.append(f"**Not planned (no price found):** {', '.join(self.unpriced_products)}")
+        return "\n".join(lines)
@@ -0,0 +1,83 @@
+"""Tool-result cache shared between crews, with record/replay fixtures for offline runs."""
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from crewai.tools import BaseTool  # pyright: ignore[reportMissingImports]
+from pydantic import ConfigDict
+
+
+class ToolResultCache:
+    """
+    Thread-safe cache of tool results keyed by tool name and arguments.
+
+    Load it from a fixture file to replay recorded search/scrape results.
+    In offline mode a cache miss never reaches the network.
+    """
+
+    def __init__(self, fixture_path: Optional[str] = None, offline: bool = False):
+        self.fixture_path = fixture_path
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._results: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if fixture_path and os.path.exists(fixture_path):
+            with open(fixture_path, 'r') as f:
+                self._results = json.load(f)
+
+    @staticmethod
+    def key(tool_name: str, args: tuple, kwargs: Dict) -> str:
+        return json.dumps([tool_name, list(args), kwargs], sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return self._results[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Any):
+        with self._lock:
+            self._results[key] = result
+
+    def save(self):
+        """Write every cached result to the fixture file for later offline replay"""
+        if not self.fixture_path:
+            return
+        os.makedirs(os.path.dirname(self.fixture_path) or '.', exist_ok=True)
+        with self._lock:
+            with open(self.fixture_path, 'w') as f:
+                json.dump(self._results, f, indent=2, default=str)
+
+
+class CachedTool(BaseTool):
+    """Wraps a tool so identical calls from any crew share one result."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseTool
+    cache: ToolResultCache
+
+    def __init__(self, inner: BaseTool, cache: ToolResultCache):
+        super().__init__(
+            name=inner.name,
+            # BaseTool prefixes descriptions with the name/arguments; keep only the original text
+            description=inner.description.split("Tool Description: ", 1)[-1],
+            args_schema=inner.args_schema,
+            inner=inner,
+            cache=cache,
+        )
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        key = self.cache.key(self.name, args, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if self.cache.offline:
+            return f"No recorded result for this {self.name} call (offline evaluation). Use the results you already have."
+
+        result = self.inner.run(*args, **kwargs)
+        self.cache.put(key, result)
+        return result
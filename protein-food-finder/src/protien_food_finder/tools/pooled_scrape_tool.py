@@ -0,0 +1,30 @@
+"""Drop-in replacement for ScrapeWebsiteTool that reads pages through the shared PageFetcher."""
+from typing import Optional, Type
+
+from crewai.tools import BaseTool  # pyright: ignore[reportMissingImports]
+from pydantic import BaseModel, ConfigDict, Field
+
+from protien_food_finder.extraction import ExtractionStats, extract_page
+from protien_food_finder.fetcher import PageFetcher
+
+
+class PooledScrapeWebsiteToolInput(BaseModel):
+    """Input schema for PooledScrapeWebsiteTool."""
+    website_url: str = Field(..., description="Mandatory website url to read the file")
+
+
+class PooledScrapeWebsiteTool(BaseTool):
+    # Same name and arguments as ScrapeWebsiteTool so prompts and agents are unchanged
+    name: str = "Read website content"
+    description: str = "A tool that can be used to read a website content."
+    args_schema: Type[BaseModel] = PooledScrapeWebsiteToolInput
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    fetcher: PageFetcher
+    # Nutrition facts are parsed locally first; only unparsed pages reach the LLM as text
+    extraction_stats: Optional[ExtractionStats] = None
+    max_chars: int = 8000
+
+    def _run(self, website_url: str) -> str:
+        page = self.fetcher.fetch(website_url)
+        return extract_page(page.text, stats=self.extraction_stats, max_chars=self.max_chars)
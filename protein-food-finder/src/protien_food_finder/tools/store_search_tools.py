@@ -0,0 +1,116 @@
+"""Tools that let a store specialist stop as soon as it has enough valid products."""
+import threading
+import time
+from typing import Any, List, Optional, Type
+
+from crewai.tools import BaseTool  # pyright: ignore[reportMissingImports]
+from pydantic import BaseModel, ConfigDict
+
+from protien_food_finder.structured_outputs import ProteinProduct
+from protien_food_finder.validation import ProductValidator
+
+
+class ProductCollector:
+    """
+    Validates product candidates for one store as the agent finds them.
+
+    The store is done once `max_products` valid products are collected, or
+    once `min_products` are collected and `time_budget` seconds have passed
+    since the first search.
+    """
+
+    def __init__(self, store_name: str, validator: ProductValidator,
+                 min_products: int, max_products: int, time_budget: float):
+        self.store_name = store_name
+        self.validator = validator
+        self.min_products = min_products
+        self.max_products = max_products
+        self.time_budget = time_budget
+        self.products: List[ProteinProduct] = []
+        self.rejected = 0
+        self.started_at: Optional[float] = None
+        # Filled from the candidate cache instead of a search this run
+        self.from_cache = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    @property
+    def done(self) -> bool:
+        count = len(self.products)
+        return count >= self.max_products or (count >= self.min_products and self.elapsed >= self.time_budget)
+
+    def stop_message(self) -> str:
+        return (f"STOP SEARCHING: {len(self.products)} validated products already collected for "
+                f"{self.store_name}. Do not call any more tools - give your final answer now "
+                f"listing the submitted products.")
+
+    def submit(self, product: ProteinProduct) -> str:
+        """Validate one candidate and tell the agent whether to keep going."""
+        self.start()
+        with self._lock:
+            if self.done:
+                return self.stop_message()
+
+            reasons = self.validator.check(product)
+            if reasons:
+                self.rejected += 1
+                return f"REJECTED {product.product_name}: {'; '.join(reasons)}. Keep searching."
+
+            key = product.product_name.lower().strip()
+            if any(p.product_name.lower().strip() == key for p in self.products):
+                return f"ALREADY SUBMITTED {product.product_name}. Look for a different product."
+
+            self.products.append(product)
+
+        if self.done:
+            return self.stop_message()
+        return (f"ACCEPTED {product.product_name} ({len(self.products)}/{self.max_products} valid "
+                f"products for {self.store_name}). Keep searching.")
+
+
+class SubmitProductTool(BaseTool):
+    name: str = "Submit product candidate"
+    description: str = (
+        "Submit one product candidate with its nutrition facts as soon as you find it. "
+        "It is validated immediately against the dietary rules. The reply tells you "
+        "whether it was accepted and when you have enough products to stop searching."
+    )
+    args_schema: Type[BaseModel] = ProteinProduct
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    collector: ProductCollector
+
+    def _run(self, **kwargs: Any) -> str:
+        kwargs['store'] = self.collector.store_name
+        return self.collector.submit(ProteinProduct(**kwargs))
+
+
+class BudgetedTool(BaseTool):
+    """Wraps a search/scrape tool so it refuses to run once the store is done."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseTool
+    collector: ProductCollector
+
+    def __init__(self, inner: BaseTool, collector: ProductCollector):
+        super().__init__(
+            name=inner.name,
+            # BaseTool prefixes descriptions with the name/arguments; keep only the original text
+            description=inner.description.split("Tool Description: ", 1)[-1],
+            args_schema=inner.args_schema,
+            inner=inner,
+            collector=collector,
+        )
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        self.collector.start()
+        if self.collector.done:
+            return self.collector.stop_message()
+        return self.inner.run(*args, **kwargs)
@@ -0,0 +1,53 @@
+"""Rule-based product validation against a DietaryProfile."""
+from typing import Dict, Iterable, List
+
+from protien_food_finder.preferences import DietaryProfile
+from protien_food_finder.structured_outputs import ProteinProduct
+
+
+class ProductValidator:
+    """
+    Checks a ProteinProduct against a profile's hard rules.
+
+    A gluten-free *preference* never rejects a product, and unknown sugar
+    content is allowed through for the same reason.
+    """
+
+    def __init__(self, profile: DietaryProfile):
+        self.profile = profile
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'ProductValidator':
+        return cls(DietaryProfile.from_settings(settings.get('dietary_validation', {})))
+
+    @classmethod
+    def candidates_only(cls, settings: Dict) -> 'ProductValidator':
+        """
+        Preference-agnostic validator for store searches: only the protein
+        floor applies, every dietary rule is left to the per-profile filter.
+        """
+        rules = settings.get('dietary_validation', {})
+        return cls(DietaryProfile(name="candidates", min_protein_grams=rules.get('min_protein_grams', 20)))
+
+    def check(self, product: ProteinProduct) -> List[str]:
+        """Return the reasons a product fails validation (empty if it passes)."""
+        profile = self.profile
+        reasons = []
+        if product.protein_grams < profile.min_protein_grams:
+            reasons.append(f"only {product.protein_grams}g protein (need {profile.min_protein_grams}g+)")
+        if profile.max_sugar_grams is not None and product.sugar_g is not None and product.sugar_g > profile.max_sugar_grams:
+            reasons.append(f"{product.sugar_g}g sugar (max {profile.max_sugar_grams:g}g)")
+        if profile.gluten_free == 'required' and product.is_gluten_free is not True:
+            reasons.append("not confirmed gluten-free")
+
+        name = product.product_name.lower()
+        for keyword in profile.exclude_keywords:
+            if keyword in name or (keyword == 'beef' and product.contains_beef) or (keyword == 'pork' and product.contains_pork):
+                reasons.append(f"excluded ingredient: {keyword}")
+        return reasons
+
+    def is_valid(self, product: ProteinProduct) -> bool:
+        return not self.check(product)
+
+    def filter(self, products: Iterable[ProteinProduct]) -> List[ProteinProduct]:
+        return [p for p in products if self.is_valid(p)]
@@ -0,0 +1,78 @@
+"""
+Unit tests for the page extraction in extraction.py, on small fixture pages
+
+Run with: python -m pytest test_extraction.py (after `uv pip install -e .`)
+"""
+from protien_food_finder.extraction import ExtractionStats, extract_page, nutrition_snippet
+
+
+JSON_LD_PAGE = """<html><head><title>Greek Yogurt 32oz | Store</title>
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "Product", "name": "Plain Greek Yogurt",
+ "offers": {"@type": "Offer", "price": "5.49"},
+ "nutrition": {"@type": "NutritionInformation", "proteinContent": "18 g", "calories": "100 calories",
+               "sugarContent": "6 g", "servingSize": "170 g"}}
+</script></head><body><h1>Plain Greek Yogurt</h1></body></html>"""
+
+PANEL_PAGE = """<html><head><title>Turkey Jerky 2.85oz</title></head><body>
+<h1>Turkey Jerky</h1><span class="price">$7.99</span>
+<p>High protein snack made with real turkey.</p>
+<div><h2>Nutrition Facts</h2><p>Serving Size 1 oz</p><p>Calories 80</p>
+<p>Total Fat 1g</p><p>Total Carbohydrate 6g</p><p>Total Sugars 5g</p><p>Protein 11g</p></div>
+</body></html>"""
+
+# A panel marker but no parsable protein line - only the excerpt around it goes to the LLM
+UNPARSED_PANEL_PAGE = """<html><head><title>Protein Bar</title></head><body>
+<span>$2.49</span><p>{filler}</p><h2>Nutrition Facts</h2><img alt="nutrition label"></body></html>"""
+
+LISTING_PAGE = "<html><head><title>Protein snacks</title></head><body><ul>{items}</ul></body></html>".format(
+    items="".join(f"<li>Protein bar flavour {i} - 20g protein - ${i}.99</li>" for i in range(30)))
+
+
+def test_json_ld_facts_keep_title_and_price():
+    stats = ExtractionStats()
+    result = extract_page(JSON_LD_PAGE, stats=stats)
+    assert result.startswith("PAGE: Greek Yogurt 32oz | Store\n")
+    assert "protein_grams=18" in result
+    assert "price=5.49" in result
+    assert "product_name=Plain Greek Yogurt" in result
+    assert stats.counts["json_ld"] == 1
+
+
+def test_panel_facts_keep_title_and_page_price():
+    stats = ExtractionStats()
+    result = extract_page(PANEL_PAGE, stats=stats)
+    assert "nutrition panel" in result
+    assert "protein_grams=11" in result
+    assert "calories=80" in result
+    assert "price=$7.99" in result
+    assert "product_name=Turkey Jerky 2.85oz" in result
+    assert stats.counts["panel"] == 1
+
+
+def test_snippet_only_on_a_panel_marker():
+    page = UNPARSED_PANEL_PAGE.format(filler="word " * 400)
+    stats = ExtractionStats()
+    result = extract_page(page, stats=stats)
+    assert "NUTRITION PANEL EXCERPT" in result
+    assert "PRICE: $2.49" in result
+    assert stats.counts["snippet"] == 1
+
+
+def test_listing_page_without_panel_keeps_every_product():
+    assert nutrition_snippet("Protein bar - 20g protein") is None
+    stats = ExtractionStats()
+    result = extract_page(LISTING_PAGE, stats=stats)
+    assert "NUTRITION PANEL EXCERPT" not in result
+    assert "flavour 0 " in result and "flavour 29 " in result
+    assert stats.counts["full_page"] == 1
+
+
+def test_stats_count_only_product_pages():
+    stats = ExtractionStats()
+    for page in (JSON_LD_PAGE, PANEL_PAGE, LISTING_PAGE, LISTING_PAGE):
+        extract_page(page, stats=stats)
+    assert stats.total == 2
+    assert stats.local_share == 1.0
+    assert "100% of 2 product pages" in stats.summary()
+    assert "2 other pages" in stats.summary()